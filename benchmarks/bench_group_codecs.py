@@ -0,0 +1,47 @@
+"""Compares the struct-based codecs of CamDataGroup1-5 with the construct schemas.
+
+Usage: python benchmarks/bench_group_codecs.py [number]"""
+
+import sys
+import timeit
+from sigma_ptpy.enum import AspectRatio, ColorMode, DestToSave, ExposureMode, HDR, LOCVignetting, WhiteBalance
+from sigma_ptpy.schema import CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5
+
+
+SAMPLES = [
+    (CamDataGroup1(ShutterSpeed=0x20, ISOAuto=1, ExpComp=0xf8),
+     b"\x13\xff\x7f\x20\x20\x00\x01\xf8\x00\x00\x01\tk\x03\x01\xd0\x02\x08\x00\x00\x1d"),
+    (CamDataGroup2(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Auto),
+     b"\x0e\x3f\xfc\x07\x02\x04\x01\x00\x03\x00\x00\x00\x01\x01\x10l"),
+    (CamDataGroup3(ColorMode=ColorMode.Standard, DestToSave=DestToSave.InComputer),
+     b"\x10\xff\xa3\x00\x00\x00\x01\x03\x02\x00\xd0\x00\x00\x02\x05\x05\x02\x96"),
+    (CamDataGroup4(HDR=HDR.Off, LOCVignetting=LOCVignetting.Auto),
+     b"\x11\xf0\x3f\x00\x03\x01\x03\xff\x0e\x00\x01\x01\x02\x01\xfe\x02\x02\x05\x60"),
+    (CamDataGroup5(IntervalTimerSecond=10, IntervalTimerFrame=3, AspectRatio=AspectRatio.W3H2),
+     b"\x0c\x2b\x00\x0a\x00\x01\x00\x00\x01\x58\x1b\x03\x01\xba"),
+]
+
+
+def measure(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main(number=2000):
+    print("{:<14} {:<7} {:>14} {:>14} {:>8}".format("class", "op", "construct [us]", "struct [us]", "speedup"))
+    for obj, rawdata in SAMPLES:
+        codec, names = obj._Codec, obj._Settable
+        assert codec.decode(rawdata) == codec.decode_construct(rawdata)
+        assert codec.encode(obj, names) == codec.encode_construct(obj, names)
+
+        cases = [
+            ("decode", lambda: codec.decode_construct(rawdata), lambda: codec.decode(rawdata)),
+            ("encode", lambda: codec.encode_construct(obj, names), lambda: codec.encode(obj, names)),
+        ]
+        for op, slow, fast in cases:
+            t0, t1 = measure(slow, number), measure(fast, number)
+            print("{:<14} {:<7} {:>14.2f} {:>14.2f} {:>7.1f}x".format(
+                type(obj).__name__, op, t0 * 1e6, t1 * 1e6, t0 / t1))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,58 @@
+"""Measures the import time of sigma_ptpy with `python -X importtime`.
+
+Each statement runs in a new interpreter, and the median of the total import time is reported with
+heavy dependencies loaded by the statement.
+
+Usage: python benchmarks/bench_import.py [number]"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+
+STATEMENTS = [
+    "import sigma_ptpy",
+    "import sigma_ptpy.schema, sigma_ptpy.enum, sigma_ptpy.apex",
+    "import sigma_ptpy.cache, sigma_ptpy.settings, sigma_ptpy.pipeline",
+    "from sigma_ptpy import SigmaPTPy",
+]
+
+DEPENDENCIES = ("ptpy", "usb", "construct", "rainbow_logging_handler", "numpy")
+
+
+def import_time(statement):
+    """Runs a statement in a new interpreter.
+
+    Returns:
+        tuple: the total import time in seconds and top-level modules imported."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+    total = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # top level
+            total += int(cumulative)
+        modules.add(name.strip().split(".")[0])
+    return total / 1e6, modules
+
+
+def main(number=5):
+    print("{:<68} {:>10}  {}".format("statement", "time [ms]", "dependencies"))
+    for statement in STATEMENTS:
+        import_time(statement)  # warm up caches of bytecode
+        results = [import_time(statement) for _ in range(number)]
+        elapsed = statistics.median(t for t, _ in results)
+        deps = [name for name in DEPENDENCIES if name in results[0][1]]
+        print("{:<68} {:>10.1f}  {}".format(statement, elapsed * 1e3, ", ".join(deps) or "-"))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,71 @@
+"""Replays a recorded session file and measures decoding of the recorded responses.
+
+The whole session is first parsed and replayed as fast as possible, then every
+recorded response is decoded with its schema repeatedly. The results of the same file are
+comparable between versions of this library.
+
+Usage: python benchmarks/bench_replay.py session-file [number]"""
+
+import collections
+import io
+import sys
+import timeit
+from sigma_ptpy.schema import (
+    ApiConfig, BigPartialPictFile, CamCanSetInfo5, CamCaptStatus, CamDataGroup1, CamDataGroup2, CamDataGroup3,
+    CamDataGroup4, CamDataGroup5, CamDataGroupFocus, PictFileInfo2, ViewFrame)
+from sigma_ptpy.session import SessionReplayer
+
+
+SCHEMAS = {
+    'SigmaConfigApi': ApiConfig,
+    'SigmaGetCamDataGroup1': CamDataGroup1,
+    'SigmaGetCamDataGroup2': CamDataGroup2,
+    'SigmaGetCamDataGroup3': CamDataGroup3,
+    'SigmaGetCamDataGroup4': CamDataGroup4,
+    'SigmaGetCamDataGroup5': CamDataGroup5,
+    'SigmaGetCamDataGroupFocus': CamDataGroupFocus,
+    'SigmaGetCamCanSetInfo5': CamCanSetInfo5,
+    'SigmaGetCamCaptStatus': CamCaptStatus,
+    'SigmaGetPictFileInfo2': PictFileInfo2,
+    'SigmaGetViewFrame': ViewFrame,
+    'SigmaGetBigPartialPictFile': BigPartialPictFile,
+}
+
+
+def main(path, number=20):
+    with open(path, "rb") as f:
+        content = f.read()
+    transactions = SessionReplayer(io.BytesIO(content)).transactions
+    recorded = sum(t.Duration for t in transactions)
+
+    responses = collections.defaultdict(list)
+    for t in transactions:
+        if t.OperationCode in SCHEMAS and t.ResponseCode == 'OK' and t.Data:
+            responses[t.OperationCode].append(t.Data)
+
+    def replay():
+        replayer = SessionReplayer(io.BytesIO(content))
+        for t in transactions:
+            try:
+                replayer.transact(t.OperationCode, t.Parameter, t.Payload)
+            except Exception:
+                pass
+
+    elapsed = min(timeit.repeat(replay, number=1, repeat=number))
+    print("{} transactions: {:.3f} s recorded, {:.3f} ms replayed".format(
+        len(transactions), recorded, elapsed * 1e3))
+
+    print("{:<28} {:>8} {:>14}".format("operation", "count", "decode [us]"))
+    for opcode, payloads in sorted(responses.items()):
+        klass = SCHEMAS[opcode]
+
+        def decode():
+            for payload in payloads:
+                klass().decode(payload)
+
+        elapsed = min(timeit.repeat(decode, number=1, repeat=number)) / len(payloads)
+        print("{:<28} {:>8} {:>14.2f}".format(opcode, len(payloads), elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], *map(int, sys.argv[2:]))
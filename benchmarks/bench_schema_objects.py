@@ -0,0 +1,74 @@
+"""Compares lazy `__slots__` schema objects with eagerly decoded `__dict__` objects.
+
+The memory per object includes the response kept by a lazy object.
+
+Usage: python benchmarks/bench_schema_objects.py [number]"""
+
+import sys
+import timeit
+import tracemalloc
+from sigma_ptpy.schema import CamDataGroup1, CamDataGroup3, CamDataGroup4
+
+
+SAMPLES = [
+    (CamDataGroup1, b"\x13\xff\x7f\x20\x20\x00\x01\xf8\x00\x00\x01\tk\x03\x01\xd0\x02\x08\x00\x00\x1d"),
+    (CamDataGroup3, b"\x10\xff\xa3\x00\x00\x00\x01\x03\x02\x00\xd0\x00\x00\x02\x05\x05\x02\x96"),
+    (CamDataGroup4, b"\x11\xf0\x3f\x00\x03\x01\x03\xff\x0e\x00\x01\x01\x02\x01\xfe\x02\x02\x05\x60"),
+]
+
+
+class Eager(object):
+    """The previous representation, which decodes all fields into `__dict__`."""
+
+    def __init__(self, klass, rawdata):
+        for name, value in klass._Codec.decode(rawdata).items():
+            if not name.startswith('_'):
+                setattr(self, name, value)
+
+
+def measure(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def read(make, rawdata, names):
+    obj = make(rawdata)
+    return [getattr(obj, name) for name in names]
+
+
+def memory(make, rawdata, count=10000):
+    responses = [bytes(bytearray(rawdata)) for _ in range(count)]
+    tracemalloc.start()
+    objects = [make(response) for response in responses]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del responses, objects
+    return size / count
+
+
+def main(number=20000):
+    print("{:<14} {:<12} {:>10} {:>10} {:>8}".format("class", "case", "eager", "lazy", "ratio"))
+    for klass, rawdata in SAMPLES:
+        def lazy(response):
+            obj = klass()
+            obj.decode(response)
+            return obj
+
+        def eager(response):
+            return Eager(klass, response)
+
+        names = klass._Fields[:3]
+        cases = [
+            ("bytes/obj", memory(eager, rawdata), memory(lazy, rawdata)),
+            ("decode [us]", measure(lambda: eager(rawdata), number) * 1e6,
+             measure(lambda: lazy(rawdata), number) * 1e6),
+            ("3 fields [us]", measure(lambda: read(eager, rawdata, names), number) * 1e6,
+             measure(lambda: read(lazy, rawdata, names), number) * 1e6),
+            ("all [us]", measure(lambda: vars(eager(rawdata)), number) * 1e6,
+             measure(lambda: lazy(rawdata).as_dict(), number) * 1e6),
+        ]
+        for case, t0, t1 in cases:
+            print("{:<14} {:<12} {:>10.2f} {:>10.2f} {:>7.2f}x".format(klass.__name__, case, t0, t1, t0 / t1))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,290 @@
+"""Micro-benchmarks of the codecs and converters, which do not need a camera.
+
+Every case is timed with `timeit` (the best of several repeats) and its memory is traced with
+`tracemalloc` in a separate run. Results are printed as a table and can be saved as JSON, and are
+compared with a stored baseline (benchmarks/baseline.json by default) if it exists. A baseline is
+specific to a host, so save a new one before comparing changes on another machine.
+
+Usage:
+    python benchmarks/bench_suite.py [-k PATTERN] [--json PATH] [--baseline PATH] [--save-baseline]
+    python -m pytest benchmarks/bench_suite.py  # runs every case once as a smoke test"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+import unittest
+from sigma_ptpy import apex, ifd
+from sigma_ptpy.enum import (
+    AspectRatio, CaptureMode, ColorMode, DestToSave, DirectoryType, ExposureMode, FocusArea, FocusMode, HDR,
+    LOCVignetting, WhiteBalance)
+from sigma_ptpy.schema import (
+    _CAN_SET_INFO5_FIELDS, ApiConfig, BigPartialPictFile, CamCanSetInfo5, CamCaptStatus, CamDataGroup1,
+    CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5, CamDataGroupFocus, PictFileInfo2, SnapCommand,
+    ViewFrame)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# responses of a SIGMA fp
+GROUPS = [
+    (CamDataGroup1(ShutterSpeed=0x20, ISOAuto=1, ExpComp=0xf8),
+     b"\x13\xff\x7f\x20\x20\x00\x01\xf8\x00\x00\x01\tk\x03\x01\xd0\x02\x08\x00\x00\x1d"),
+    (CamDataGroup2(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Auto),
+     b"\x0e\x3f\xfc\x07\x02\x04\x01\x00\x03\x00\x00\x00\x01\x01\x10l"),
+    (CamDataGroup3(ColorMode=ColorMode.Standard, DestToSave=DestToSave.InComputer),
+     b"\x10\xff\xa3\x00\x00\x00\x01\x03\x02\x00\xd0\x00\x00\x02\x05\x05\x02\x96"),
+    (CamDataGroup4(HDR=HDR.Off, LOCVignetting=LOCVignetting.Auto),
+     b"\x11\xf0\x3f\x00\x03\x01\x03\xff\x0e\x00\x01\x01\x02\x01\xfe\x02\x02\x05\x60"),
+    (CamDataGroup5(IntervalTimerSecond=10, IntervalTimerFrame=3, AspectRatio=AspectRatio.W3H2),
+     b"\x0c\x2b\x00\x0a\x00\x01\x00\x00\x01\x58\x1b\x03\x01\xba"),
+]
+CAPT_STATUS = b"\x06\x00\x00\x01\x04\x00\x03\x0E"
+PICT_FILE_INFO2 = \
+    b"\x38\x00\x00\x00\x01\x00\x00\x00\x0C\x00\x00\x00\x80\x05\x00\x57" \
+    b"\x42\x3E\x0A\x00\x24\x00\x00\x00\x2D\x00\x00\x00\x4A\x50\x47\x00" \
+    b"\x70\x17\xA0\x0F\x31\x30\x30\x53\x49\x47\x4D\x41\x00\x53\x44\x49" \
+    b"\x4D\x30\x30\x30\x31\x2E\x4A\x50\x47\x00\x03\x00"
+API_CONFIG = \
+    b"\x4a\x00\x00\x00\x04\x00\x00\x00\x01\x00\x02\x00\x09\x00\x00\x00\x3c\x00\x00\x00\x02" \
+    b"\x00\x02\x00\x09\x00\x00\x00\x45\x00\x00\x00\x03\x00\x02\x00\x04\x00\x00\x00\x56\x38" \
+    b"\x32\x00\x05\x00\x0b\x00\x01\x00\x00\x00\x52\xb8\x9e\x3f\x00\x00\x00\x00\x53\x49\x47" \
+    b"\x4d\x41\x20\x66\x70\x00\x39\x31\x34\x30\x32\x30\x38\x31\x00\xa9"
+FOCUS = CamDataGroupFocus(
+    FocusMode=FocusMode.AF_S, FocusArea=FocusArea(1), DMFSize=2, DMFPos=[120, 80])
+
+
+def partial_pict_file(size):
+    return size.to_bytes(4, byteorder="little") + bytes(size)
+
+
+def focus_with_detection(frames):
+    """Returns the IFD data of CamDataGroupFocus with `frames` distance measurement frames."""
+    return bytes(ifd.encode_entries([
+        (1, DirectoryType.UInt8, FocusMode.AF_S.value),
+        (4, DirectoryType.UInt8, 1),
+        (13, DirectoryType.UInt16, [120, 80]),
+        (14, DirectoryType.UInt16, [i % 640 for i in range(4 * frames)]),
+    ]))
+
+
+def synthetic_entries(count, length):
+    """Returns entries of various types, most of which are stored out of line."""
+    types = [DirectoryType.UInt8, DirectoryType.UInt16, DirectoryType.Int32, DirectoryType.Float64]
+    return [(tag, types[tag % len(types)], [tag % 100] * length) for tag in range(count)]
+
+
+def can_set_info5():
+    """Returns realistic IFD data of CamCanSetInfo5, where every field has a few valid values."""
+    entries = []
+    for tag in sorted(set(tag for tag, _, _ in _CAN_SET_INFO5_FIELDS)):
+        for code in range(256):
+            values = [code] * 4  # some fields need 4 values
+            res = CamCanSetInfo5()
+            res.decode(ifd.encode_entries([(tag, DirectoryType.UInt8, values)]))
+            try:
+                str(res)
+            except ValueError:
+                continue
+            entries.append((tag, DirectoryType.UInt8, values))
+            break
+    return bytes(ifd.encode_entries(entries))
+
+
+def decoder(klass, rawdata, read=False):
+    def run():
+        res = klass()
+        res.decode(rawdata)
+        if read:
+            str(res)  # converts all fields
+        return res
+    return run
+
+
+def cases():
+    """Returns an ordered list of pairs of a case name and a function with no arguments."""
+    result = []
+
+    for obj, rawdata in GROUPS:
+        name = "schema.{}".format(type(obj).__name__)
+        result += [
+            (name + ".decode", decoder(type(obj), rawdata)),
+            (name + ".decode_all", decoder(type(obj), rawdata, read=True)),
+            (name + ".encode", obj.encode),
+        ]
+
+    big_focus = focus_with_detection(1024)
+    snap = SnapCommand(CaptureMode.GeneralCapt, 1)
+    buffer = bytearray(1 << 20)
+    chunk = partial_pict_file(1 << 20)
+    into = BigPartialPictFile()
+    result += [
+        ("schema.CamCaptStatus.decode_all", decoder(CamCaptStatus, CAPT_STATUS, read=True)),
+        ("schema.SnapCommand.encode", snap.encode),
+        ("schema.PictFileInfo2.decode_all", decoder(PictFileInfo2, PICT_FILE_INFO2, read=True)),
+        ("schema.BigPartialPictFile.decode[1MiB]", decoder(BigPartialPictFile, chunk)),
+        ("schema.BigPartialPictFile.decode_into[1MiB]", lambda: into.decode_into(chunk, buffer)),
+        ("schema.ViewFrame.decode[256KiB]", decoder(ViewFrame, bytes(10 + (256 << 10)))),
+        ("schema.ApiConfig.decode_all", decoder(ApiConfig, API_CONFIG)),
+        ("schema.CamDataGroupFocus.decode_all", decoder(CamDataGroupFocus, FOCUS.encode(), read=True)),
+        ("schema.CamDataGroupFocus.decode_all[1024 frames]", decoder(CamDataGroupFocus, big_focus, read=True)),
+        ("schema.CamDataGroupFocus.encode", FOCUS.encode),
+    ]
+
+    canset = can_set_info5()
+    result += [
+        ("schema.CamCanSetInfo5.decode", decoder(CamCanSetInfo5, canset)),
+        ("schema.CamCanSetInfo5.decode_all", decoder(CamCanSetInfo5, canset, read=True)),
+    ]
+
+    many = synthetic_entries(512, 4)
+    long_ = synthetic_entries(4, 16384)
+    many_data, long_data = bytes(ifd.encode_entries(many)), bytes(ifd.encode_entries(long_))
+    result += [
+        ("ifd.decode_entries[ApiConfig]", lambda: ifd.decode_entries(API_CONFIG)),
+        ("ifd.decode_entries[CamCanSetInfo5]", lambda: ifd.decode_entries(canset)),
+        ("ifd.decode_entries[512 entries]", lambda: ifd.decode_entries(many_data)),
+        ("ifd.decode_entries[4 x 16384 values]", lambda: ifd.decode_entries(long_data)),
+        ("ifd.encode_entries[512 entries]", lambda: ifd.encode_entries(many)),
+        ("ifd.encode_entries[4 x 16384 values]", lambda: ifd.encode_entries(long_)),
+    ]
+    if numpy is not None:
+        result.append(
+            ("ifd.decode_entries[4 x 16384 values, numpy]", lambda: ifd.decode_entries(long_data, numpy=True)))
+
+    codes = list(range(256))
+    for name in sorted(n for n in dir(apex) if n.endswith("Converter") and n != "ApexConverter"):
+        conv = getattr(apex, name)
+        values = [v for v in map(conv.decode_uint8, codes) if v is not None]
+        result += [
+            ("apex.{}.decode_uint8[256]".format(name), lambda conv=conv: [conv.decode_uint8(c) for c in codes]),
+            ("apex.{}.encode_uint8[{}]".format(name, len(values)),
+             lambda conv=conv, values=values: [conv.encode_uint8(v) for v in values]),
+        ]
+        if numpy is not None:
+            code_array = numpy.arange(256, dtype=numpy.uint8).repeat(256)
+            value_array = numpy.linspace(min(values), max(values), 65536)
+            result += [
+                ("apex.{}.decode_array[65536]".format(name), lambda conv=conv: conv.decode_array(code_array)),
+                ("apex.{}.encode_array[65536]".format(name), lambda conv=conv: conv.encode_array(value_array)),
+            ]
+
+    return result
+
+
+def measure(fn, repeat=5, min_time=0.05):
+    """Measures a function.
+
+    Returns:
+        dict: `ops_per_sec` (the best of repeats), `peak_bytes` (the peak of memory allocated in a
+        call) and `retained_bytes` (memory still allocated after a call, including the result)."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        result = fn()  # noqa: F841 (the result is counted as retained)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"ops_per_sec": 1.0 / best, "peak_bytes": peak, "retained_bytes": retained}
+
+
+def run(pattern="*", **kwargs):
+    """Runs cases matching a glob pattern.
+
+    Returns:
+        dict: the environment and the results keyed by case names, which can be saved as JSON."""
+    results = {}
+    for name, fn in cases():
+        if fnmatch.fnmatchcase(name, pattern):
+            results[name] = measure(fn, **kwargs)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "numpy": numpy.__version__ if numpy is not None else None,
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Compares results with a baseline.
+
+    Returns:
+        dict: ratios of ops/sec to the baseline keyed by case names, and the names of regressed cases
+        slower than `1 - tolerance` times the baseline."""
+    ratios = {}
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is not None:
+            ratios[name] = result["ops_per_sec"] / base["ops_per_sec"]
+    regressions = sorted(name for name, ratio in ratios.items() if ratio < 1 - tolerance)
+    return ratios, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="*", help="a glob pattern of case names")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of repeats (default: 5)")
+    parser.add_argument("--json", help="a path where results are saved as JSON")
+    parser.add_argument("--baseline", default=BASELINE, help="a baseline JSON (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="saves results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="the allowed slowdown against the baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = run(args.pattern, repeat=args.repeat)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    ratios, regressions = compare(report, baseline, args.tolerance) if baseline else ({}, [])
+
+    print("{:<56} {:>14} {:>12} {:>12} {:>9}".format("case", "ops/sec", "peak [B]", "retained [B]", "baseline"))
+    for name, result in report["results"].items():
+        ratio = "{:.2f}x".format(ratios[name]) if name in ratios else "-"
+        print("{:<56} {:>14,.0f} {:>12,} {:>12,} {:>9}".format(
+            name, result["ops_per_sec"], result["peak_bytes"], result["retained_bytes"], ratio))
+
+    for path in filter(None, [args.json, args.baseline if args.save_baseline else None]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if regressions:
+        print("Slower than the baseline by more than {:.0%}: {}".format(args.tolerance, ", ".join(regressions)))
+        return 1
+    return 0
+
+
+class Test_Suite(unittest.TestCase):
+    def test_cases(self):
+        names = set()
+        for name, fn in cases():
+            with self.subTest(name):
+                self.assertNotIn(name, names)
+                names.add(name)
+                fn()
+
+    def test_compare(self):
+        report = {"results": {"a": {"ops_per_sec": 70.0}, "b": {"ops_per_sec": 100.0}, "c": {"ops_per_sec": 1.0}}}
+        baseline = {"results": {"a": {"ops_per_sec": 100.0}, "b": {"ops_per_sec": 50.0}}}
+        ratios, regressions = compare(report, baseline, 0.2)
+        self.assertEqual(ratios, {"a": 0.7, "b": 2.0})
+        self.assertEqual(regressions, ["a"])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
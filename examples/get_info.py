@@ -1,9 +1,10 @@
-from sigma_ptpy import SigmaPTPy
+from sigma_ptpy import SigmaPTPy, setup_logging
 from sigma_ptpy.apex import ISOSpeedConverter, Aperture3Converter, ExpComp3Converter, ShutterSpeed3Converter
 
 from sigma_ptpy.enum import ISOAuto, WhiteBalance, ColorSpace
 from sigma_ptpy.schema import CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5
 
+setup_logging()
 camera = SigmaPTPy()
 
 with camera.session():
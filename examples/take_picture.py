@@ -1,25 +1,11 @@
-from sigma_ptpy import SigmaPTPy
+from sigma_ptpy import SigmaPTPy, setup_logging
 from sigma_ptpy.schema import CamDataGroup2, CamDataGroup3, CamDataGroupFocus, SnapCommand
-from sigma_ptpy.enum import CaptStatus, DestToSave, ExposureMode, FocusMode
-import time
-
-
-def wait_completion(camera, image_id):
-    for _ in range(10):
-        status = camera.get_cam_capt_status(image_id)
-        if status.CaptStatus in [CaptStatus.ImageGenCompleted, CaptStatus.ImageDataStorageCompleted]:
-            return status
-        elif status.CaptStatus in [CaptStatus.ShootInProgress, CaptStatus.ShootSuccess,
-                                   CaptStatus.ImageGenInProgress, CaptStatus.AFSuccess,
-                                   CaptStatus.CWBSuccess]:
-            print("Waiting to complete shooting: status=%s" % status.CaptStatus)
-            time.sleep(1)
-        else:
-            print("Failed shooting: status=%s" % status.CaptStatus)
-            break
+from sigma_ptpy.capture import CaptureError
+from sigma_ptpy.enum import DestToSave, ExposureMode, FocusMode
 
 
 if __name__ == '__main__':
+    setup_logging()
     camera = SigmaPTPy(ignore_events=True)
 
     with camera.session():
@@ -32,16 +18,19 @@ if __name__ == '__main__':
         camera.snap_command(SnapCommand())  # Start shooting
 
         # Wait to complete shooting
-        status = wait_completion(camera, 0)
+        try:
+            status = camera.wait_for_capture(0).Status
+        except CaptureError as e:
+            print(e)
+            status = None
         if status:
             print(status)
             # Save a picture.
             info = camera.get_pict_file_info2()
             print(info)
-            pict = camera.get_big_partial_pict_file(info.FileAddress, 0, info.FileSize)
             filename = info.FileName.decode("utf8")
             with open(filename, "wb") as fout:
-                fout.write(pict.PartialData)
+                camera.download_picture(info, fout)
                 print("A picture is saved as %s." % filename)
 
             camera.clear_image_db_single(status.ImageId)
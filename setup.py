@@ -15,7 +15,10 @@ setup(
     author='Akinori Abe',
     packages=find_packages(exclude=['tests', 'examples']),
     install_requires=read('requirements.txt'),
+    extras_require={'numpy': ['numpy']},
+    entry_points={'console_scripts': ['sigma-ptpy-bench=sigma_ptpy.bench:main']},
     license='MIT',
+    python_requires='>=3.7',
     setup_requires=['pytest-runner'],
     tests_require=["pytest", "pytest-cov"],
     url='https://github.com/akabe/sigma-ptpy',
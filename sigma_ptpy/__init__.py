@@ -1,24 +1,68 @@
+"""A camera control library for the SIGMA fp series
+
+Importing this package has no side effects. `SigmaPTPy` and `AsyncSigmaPTPy` are imported on
+first access, so offline tools using only `sigma_ptpy.schema`, `sigma_ptpy.enum` and
+`sigma_ptpy.apex` do not load PTPy or PyUSB. Logs are printed after `setup_logging` is called."""
+
+import importlib
 import logging
-import sys
 import os
-from rainbow_logging_handler import RainbowLoggingHandler
-from .sigma_ptpy import SigmaPTPy
+import sys
 
 logger = logging.getLogger(__name__)
-formatter = logging.Formatter(
-    '%(levelname).1s '
-    '%(relativeCreated)d '
-    '%(name)s'
-    '[%(threadName)s:%(funcName)s:%(lineno)s] '
-    '%(message)s'
-)
-level = "DEBUG" if "SIGMAPTPY_DEBUG" in os.environ else "INFO"
-
-handler = RainbowLoggingHandler(sys.stderr)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-logger.setLevel(level)
+logger.addHandler(logging.NullHandler())
+
+_LAZY_ATTRIBUTES = {
+    'SigmaPTPy': '.sigma_ptpy',
+    'AsyncSigmaPTPy': '.aio',
+    'DeviceExecutor': '.executor',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+def setup_logging(level=None, stream=None):
+    """Prints logs of this package with colors.
+
+    Args:
+        level (str or int): a logging level. By default, it is DEBUG if the environment variable
+            `SIGMAPTPY_DEBUG` is defined, and INFO otherwise.
+        stream (object): a stream receiving logs (default: `sys.stderr`).
+
+    Returns:
+        logging.Handler: the handler added to the logger of this package."""
+    from rainbow_logging_handler import RainbowLoggingHandler
+
+    if level is None:
+        level = "DEBUG" if "SIGMAPTPY_DEBUG" in os.environ else "INFO"
+    formatter = logging.Formatter(
+        '%(levelname).1s '
+        '%(relativeCreated)d '
+        '%(name)s'
+        '[%(threadName)s:%(funcName)s:%(lineno)s] '
+        '%(message)s'
+    )
+    handler = RainbowLoggingHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
 
 __all__ = [
-    'SigmaPTPy'
+    'SigmaPTPy',
+    'AsyncSigmaPTPy',
+    'DeviceExecutor',
+    'setup_logging',
 ]
@@ -0,0 +1,242 @@
+"""asyncio front-end of SigmaPTPy"""
+
+import asyncio
+import logging
+import time
+from . import download
+from .executor import DeviceExecutor
+from .liveview import _capture_frame
+
+
+logger = logging.getLogger(__name__)
+
+
+class _AsyncSession(object):
+    def __init__(self, owner):
+        self.__owner = owner
+        self.__session = None
+
+    async def __aenter__(self):
+        self.__session = self.__owner.camera.session()
+        await self.__owner._call(self.__session.__enter__)
+        return self.__owner
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return await self.__owner._call(self.__session.__exit__, exc_type, exc_value, traceback)
+
+
+class AsyncSigmaPTPy(object):
+    """Awaitable operations on a SIGMA camera.
+
+    All USB transactions run on the I/O thread of a `sigma_ptpy.executor.DeviceExecutor` owning
+    the device, so the event loop is never blocked and transactions are issued in the order the
+    coroutines are awaited.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera. When it is None, a new `SigmaPTPy` is created
+            with keyword arguments `kwargs`.
+        executor (sigma_ptpy.executor.DeviceExecutor): an executor of the camera shared with other
+            threads. When it is None, a new one is created and `close` shuts it down.
+
+    Attributes:
+        executor (sigma_ptpy.executor.DeviceExecutor): the executor running operations.
+
+    Examples:
+        Usage as follows::
+
+            from sigma_ptpy import AsyncSigmaPTPy
+
+            async def main():
+                camera = AsyncSigmaPTPy(ignore_events=True)
+                async with camera.session():
+                    await camera.config_api()
+                    info = await camera.get_pict_file_info2()
+                    async for chunk in camera.iter_picture_chunks(info):
+                        ...
+                    await camera.close_application()
+                camera.close()"""
+
+    def __init__(self, camera=None, executor=None, **kwargs):
+        if camera is None:
+            camera = executor.camera if executor is not None else None
+        if camera is None:
+            from .sigma_ptpy import SigmaPTPy
+            camera = SigmaPTPy(**kwargs)
+        self.camera = camera
+        self.__owns_executor = executor is None
+        self.executor = executor if executor is not None else DeviceExecutor(camera)
+
+    def close(self):
+        """Waits for pending operations and stops the I/O thread if the executor is owned."""
+        if self.__owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def _call(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.executor.submit(fn, *args, **kwargs))
+
+    async def _method(self, name, *args, **kwargs):
+        return await asyncio.wrap_future(self.executor.call(name, *args, **kwargs))
+
+    def session(self):
+        """Opens a PTP session as an asynchronous context manager."""
+        return _AsyncSession(self)
+
+    async def config_api(self):
+        """See `sigma_ptpy.SigmaPTPy.config_api`."""
+        return await self._method('config_api')
+
+    async def close_application(self):
+        """See `sigma_ptpy.SigmaPTPy.close_application`."""
+        return await self._method('close_application')
+
+    async def get_cam_data_group1(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group1`."""
+        return await self._method('get_cam_data_group1')
+
+    async def get_cam_data_group2(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group2`."""
+        return await self._method('get_cam_data_group2')
+
+    async def get_cam_data_group3(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group3`."""
+        return await self._method('get_cam_data_group3')
+
+    async def get_cam_data_group4(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group4`."""
+        return await self._method('get_cam_data_group4')
+
+    async def get_cam_data_group5(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group5`."""
+        return await self._method('get_cam_data_group5')
+
+    async def set_cam_data_group1(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group1`."""
+        return await self._method('set_cam_data_group1', data)
+
+    async def set_cam_data_group2(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group2`."""
+        return await self._method('set_cam_data_group2', data)
+
+    async def set_cam_data_group3(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group3`."""
+        return await self._method('set_cam_data_group3', data)
+
+    async def set_cam_data_group4(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group4`."""
+        return await self._method('set_cam_data_group4', data)
+
+    async def set_cam_data_group5(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group5`."""
+        return await self._method('set_cam_data_group5', data)
+
+    async def get_cam_data_group_focus(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group_focus`."""
+        return await self._method('get_cam_data_group_focus')
+
+    async def set_cam_data_group_focus(self, focus):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group_focus`."""
+        return await self._method('set_cam_data_group_focus', focus)
+
+    async def get_cam_can_set_info5(self):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_can_set_info5`."""
+        return await self._method('get_cam_can_set_info5')
+
+    async def get_cam_capt_status(self, image_id):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_capt_status`."""
+        return await self._method('get_cam_capt_status', image_id)
+
+    async def get_pict_file_info2(self):
+        """See `sigma_ptpy.SigmaPTPy.get_pict_file_info2`."""
+        return await self._method('get_pict_file_info2')
+
+    async def get_view_frame(self):
+        """See `sigma_ptpy.SigmaPTPy.get_view_frame`."""
+        return await self._method('get_view_frame')
+
+    async def snap_command(self, data):
+        """See `sigma_ptpy.SigmaPTPy.snap_command`."""
+        return await self._method('snap_command', data)
+
+    async def clear_image_db_single(self, image_id):
+        """See `sigma_ptpy.SigmaPTPy.clear_image_db_single`."""
+        return await self._method('clear_image_db_single', image_id)
+
+    async def get_big_partial_pict_file(self, store_address, start_address, max_length, timeout=None):
+        """See `sigma_ptpy.SigmaPTPy.get_big_partial_pict_file`."""
+        return await self._call(self.camera.get_big_partial_pict_file,
+                                store_address, start_address, max_length, timeout=timeout)
+
+    async def get_big_partial_pict_file_into(self, buffer, store_address, start_address, max_length=None,
+                                             timeout=None):
+        """See `sigma_ptpy.SigmaPTPy.get_big_partial_pict_file_into`."""
+        return await self._call(self.camera.get_big_partial_pict_file_into,
+                                buffer, store_address, start_address, max_length, timeout=timeout)
+
+    async def download_picture_into(self, info, buffer, chunk_size=None):
+        """See `sigma_ptpy.SigmaPTPy.download_picture_into`.
+
+        Other operations awaited during the download are issued after it finishes."""
+        return await self._call(download.download_picture_into, self.camera, info, buffer, chunk_size=chunk_size)
+
+    async def iter_picture_chunks(self, info, chunk_size=None):
+        """Downloads a picture file piece by piece as an asynchronous iterator.
+
+        Each piece is a separate transaction, so other operations can be interleaved between pieces.
+
+        Args:
+            info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+            chunk_size (int): a fixed transfer size in bytes. When it is None, the size is tuned
+                automatically from the measured throughput.
+
+        Yields:
+            bytes: a piece of the picture file in order."""
+        chunks = download.iter_picture_chunks(self.camera, info, chunk_size=chunk_size)
+        while True:
+            data = await self._call(next, chunks, None)
+            if data is None:
+                return
+            yield data
+
+    async def download_picture(self, info, sink, chunk_size=None):
+        """Downloads a picture file into a sink piece by piece.
+
+        Args:
+            info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+            sink (object): a file-like object having `write` method, or a callable receiving bytes.
+                A coroutine function is also accepted.
+            chunk_size (int): a fixed transfer size in bytes (optional).
+
+        Returns:
+            int: the number of downloaded bytes."""
+        write = sink.write if hasattr(sink, "write") else sink
+        total = 0
+        async for data in self.iter_picture_chunks(info, chunk_size=chunk_size):
+            ret = write(data)
+            if asyncio.iscoroutine(ret):
+                await ret
+            total += len(data)
+        return total
+
+    async def live_view(self, target_fps=None):
+        """Streams LiveView frames as an asynchronous iterator.
+
+        Frames carry `SequenceNumber`, `Timestamp` and `Latency` attributes as
+        `sigma_ptpy.liveview.LiveViewStream` does. Frames are fetched on demand, so a slow consumer
+        never makes frames pile up.
+
+        Args:
+            target_fps (float): the upper bound of the frame rate. None means as fast as possible.
+
+        Yields:
+            sigma_ptpy.schema.ViewFrame: a frame."""
+        interval = 1.0 / target_fps if target_fps else 0.0
+        sequence = 0
+        while True:
+            started = time.perf_counter()
+            frame = await self._call(_capture_frame, self.camera, sequence)
+            sequence += 1
+            yield frame
+
+            rest = interval - (time.perf_counter() - started)
+            if rest > 0:
+                await asyncio.sleep(rest)
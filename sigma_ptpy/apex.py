@@ -1,41 +1,26 @@
 """APEX (ISO sensitivity, exposure compensation, shutter speed, and aperture) conversion"""
 
 
-def _bsearch_nearest(compare, lst):
-    n = len(lst)
-    if n == 0:
-        return None
-    elif n == 1:
-        return 0
-    else:  # n >= 2
-        imin = 0
-        imax = n - 1
-        while imin <= imax:
-            i = int((imax - imin) / 2) + imin
-            e = compare(lst[i])
-            if e < 0:  # target < x
-                imax = i - 1
-            elif e > 0:  # target > x
-                imin = i + 1
-            else:
-                return i
-
-        def abs_cmp(x):
-            return abs(compare(x))
-
-        j = i
-        if 0 < i and abs_cmp(lst[j]) > abs_cmp(lst[i - 1]):
-            j = i - 1
-        if i < n - 1 and abs_cmp(lst[j]) > abs_cmp(lst[i + 1]):
-            j = i + 1
-
-        return j
+import bisect
 
 
 class ApexConverter(object):
+    """Converts 8-bit codes from and to APEX values with lookup tables.
+
+    A 256-entry table is used for decoding, and values sorted with `bisect` are used for encoding.
+    `decode_array` and `encode_array` convert NumPy arrays, which requires NumPy.
+
+    Args:
+        table (list): pairs of a code and an APEX value."""
+
     def __init__(self, table):
-        self.__dectable = table
-        self.__enctable = sorted(table, key=lambda x: x[1])
+        self.__dectable = [None] * 256
+        for code, val in table:
+            self.__dectable[code] = val
+        enctable = sorted(table, key=lambda x: x[1])
+        self.__values = [val for _, val in enctable]
+        self.__codes = [code for code, _ in enctable]
+        self.__arrays = None
 
     def decode_uint8(self, code):
         """Decodes a 8-bit integer code.
@@ -44,23 +29,68 @@ class ApexConverter(object):
            code (int): a 8-bit integer code returned from a camera.
 
         Returns:
-           int or float: an APEX value."""
-        i = _bsearch_nearest(lambda x: code - x[0], self.__dectable)
-        code_, val = self.__dectable[i]
-        return val if code == code_ else None
+           int or float: an APEX value, or None if the code is unknown."""
+        return self.__dectable[code] if 0 <= code < 256 else None
 
     def encode_uint8(self, val):
         """Encodes an APEX value.
 
         If an given value is not found in a conversion table, the nearest value is encoded.
+        A value just in the middle of two values is encoded as the larger one.
 
         Args:
            val (int or float): an APEX value.
 
         Returns:
            int: a 8-bit integer code passed to a camera."""
-        i = _bsearch_nearest(lambda x: val - x[1], self.__enctable)
-        return self.__enctable[i][0]
+        values = self.__values
+        i = bisect.bisect_left(values, val)
+        if i == len(values) or (i > 0 and val - values[i - 1] < values[i] - val):
+            i -= 1
+        return self.__codes[i]
+
+    def __numpy_tables(self):
+        if self.__arrays is None:
+            import numpy
+            dectable = numpy.array([numpy.nan if v is None else v for v in self.__dectable], dtype=numpy.float64)
+            self.__arrays = (
+                dectable,
+                numpy.array(self.__values, dtype=numpy.float64),
+                numpy.array(self.__codes, dtype=numpy.uint8))
+        return self.__arrays
+
+    def decode_array(self, codes):
+        """Decodes an array of 8-bit integer codes.
+
+        Args:
+            codes (numpy.ndarray): integer codes returned from a camera.
+
+        Returns:
+            numpy.ndarray: APEX values in float64, where unknown codes are NaN."""
+        import numpy
+        dectable, _, _ = self.__numpy_tables()
+        codes = numpy.asarray(codes)
+        valid = (codes >= 0) & (codes < 256)
+        vals = numpy.full(codes.shape, numpy.nan)
+        vals[valid] = dectable[codes[valid].astype(numpy.intp)]
+        return vals
+
+    def encode_array(self, vals):
+        """Encodes an array of APEX values in the same way as `encode_uint8`.
+
+        Args:
+            vals (numpy.ndarray): APEX values.
+
+        Returns:
+            numpy.ndarray: 8-bit integer codes in uint8."""
+        import numpy
+        _, values, codes = self.__numpy_tables()
+        vals = numpy.asarray(vals, dtype=numpy.float64)
+        i = numpy.searchsorted(values, vals, side="left")
+        lower = numpy.clip(i - 1, 0, len(values) - 1)
+        upper = numpy.clip(i, 0, len(values) - 1)
+        use_lower = (i == len(values)) | ((i > 0) & (vals - values[lower] < values[upper] - vals))
+        return codes[numpy.where(use_lower, lower, upper)]
 
 
 ISOSpeedConverter = ApexConverter([
@@ -129,6 +159,6 @@ Aperture3Converter = ApexConverter([
     (45, 5.0), (48, 5.6), (51, 6.3), (53, 7.1), (56, 8.0), (59, 9.0), (61, 10),
     (64, 11), (67, 13), (69, 14), (72, 16), (75, 18), (77, 20), (80, 22),
     (83, 25), (85, 29), (88, 32), (91, 36), (93, 40), (96, 45), (99, 51),
-    (191, 57), (104, 64), (107, 72), (108, 76), (112, 91),
+    (101, 57), (104, 64), (107, 72), (108, 76), (112, 91),
 ])
 """ApexConverter: 1/3 step aperture converter."""
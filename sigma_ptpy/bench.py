@@ -0,0 +1,224 @@
+"""End-to-end throughput benchmark of a camera (the `sigma-ptpy-bench` command)
+
+The benchmark measures round-trip latencies of SigmaGetCamDataGroup*, the frame rate of live view,
+the time from a snap command to ImageGenCompleted, and download throughput of
+SigmaGetBigPartialPictFile for several chunk sizes. Results are written as JSON, so they can be
+compared between hosts, cables and firmware versions::
+
+    sigma-ptpy-bench --output fp-v5.00.json
+    sigma-ptpy-bench --simulate --latency 0.002 --bandwidth 40e6
+
+Shooting takes real pictures, which are cleared from the CaptStatus database after downloads.
+Use `--shots 0` to skip shooting and downloads."""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from .capture import CaptureTracker
+from .timeout import _percentile
+
+
+GROUPS = [
+    'get_cam_data_group1',
+    'get_cam_data_group2',
+    'get_cam_data_group3',
+    'get_cam_data_group4',
+    'get_cam_data_group5',
+    'get_cam_data_group_focus',
+]
+"""list: methods of `SigmaPTPy` whose round-trip latencies are measured."""
+
+CHUNK_SIZES = [0x10000, 0x40000, 0x100000, 0x400000]
+"""list: the default chunk sizes of downloads in bytes."""
+
+
+def summarize(samples):
+    """Summarizes durations.
+
+    Args:
+        samples (list): durations in seconds.
+
+    Returns:
+        dict: the count, mean, percentiles (p50, p90, p99) and max in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    values = sorted(1000.0 * s for s in samples)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": _percentile(values, 0.5),
+        "p90": _percentile(values, 0.9),
+        "p99": _percentile(values, 0.99),
+        "max": values[-1],
+    }
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def measure_groups(camera, iterations=100):
+    """Measures round-trip latencies of getting data groups.
+
+    Returns:
+        dict: summaries of latencies keyed by method names."""
+    return dict(
+        (name, summarize([_timed(getattr(camera, name))[0] for _ in range(iterations)]))
+        for name in GROUPS)
+
+
+def measure_live_view(camera, duration=3.0):
+    """Measures the rate of SigmaGetViewFrame called back to back.
+
+    Returns:
+        dict: `fps`, the mean frame size in bytes, and a summary of latencies."""
+    latencies = []
+    nbytes = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        elapsed, frame = _timed(camera.get_view_frame)
+        latencies.append(elapsed)
+        nbytes += len(frame.Data)
+    elapsed = time.perf_counter() - started
+    return {
+        "fps": len(latencies) / elapsed,
+        "frame_bytes": nbytes / max(1, len(latencies)),
+        "latency": summarize(latencies),
+    }
+
+
+def measure_capture(camera, shots=3, timeout=30.0):
+    """Measures the time from a snap command to ImageGenCompleted.
+
+    The latest shot is kept in the camera for `measure_download`, and the others are cleared.
+
+    Returns:
+        tuple: a summary of durations, the number of polls of CaptStatus per shot, and the
+        `sigma_ptpy.schema.CamCaptStatus` of the latest shot."""
+    durations = []
+    polls = 0
+    status = None
+    for i in range(shots):
+        if status is not None:
+            camera.clear_image_db_single(status.ImageId)
+        tracker = CaptureTracker(camera, min_interval=0.005)
+        started = time.perf_counter()
+        tracker.snap()
+        result = tracker.wait(0, timeout=timeout)
+        durations.append(time.perf_counter() - started)
+        polls += result.Polls
+        status = result.Status
+    return summarize(durations), polls / max(1, shots), status
+
+
+def measure_download(camera, info, chunk_sizes=CHUNK_SIZES, repeat=3):
+    """Measures the throughput of downloading a picture file with fixed chunk sizes.
+
+    Returns:
+        dict: the best throughput in MB/s and a summary of chunk latencies keyed by chunk sizes."""
+    results = dict()
+    for chunk_size in chunk_sizes:
+        best = 0.0
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            offset = 0
+            while offset < info.FileSize:
+                elapsed, pict = _timed(
+                    camera.get_big_partial_pict_file, info.FileAddress, offset,
+                    min(chunk_size, info.FileSize - offset))
+                latencies.append(elapsed)
+                if pict.AcquiredSize == 0:
+                    break
+                offset += pict.AcquiredSize
+            best = max(best, offset / (time.perf_counter() - started) / 1e6)
+        results[str(chunk_size)] = {"mbps": best, "latency": summarize(latencies)}
+    return results
+
+
+def run(camera, iterations=100, live_view=3.0, shots=3, chunk_sizes=CHUNK_SIZES, repeat=3):
+    """Runs all measurements in a session.
+
+    Returns:
+        dict: results which can be written as JSON."""
+    report = {
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+    }
+    with camera.session():
+        config = camera.config_api()
+        report["camera"] = {
+            "model": config.CameraModel,
+            "serial": config.SerialNumber,
+            "firmware": config.FirmwareVersion,
+            "communication": config.CommunicationVersion,
+        }
+        report["groups"] = measure_groups(camera, iterations)
+        if live_view > 0:
+            report["live_view"] = measure_live_view(camera, live_view)
+        if shots > 0:
+            capture, polls, status = measure_capture(camera, shots)
+            report["capture"] = {"snap_to_completed": capture, "polls": polls}
+            info = camera.get_pict_file_info2()
+            report["download"] = {
+                "file_bytes": info.FileSize,
+                "chunks": measure_download(camera, info, chunk_sizes, repeat),
+            }
+            camera.clear_image_db_single(status.ImageId)
+        camera.close_application()
+    return report
+
+
+def _camera(args):
+    if args.simulate:
+        from .simulator import SimulatedCamera, SimulatedSigmaPTPy
+        device = SimulatedCamera(latency=args.latency, bandwidth=args.bandwidth)
+        return SimulatedSigmaPTPy(device=device, ignore_events=True)
+    from .sigma_ptpy import SigmaPTPy
+    return SigmaPTPy(device=args.device, ignore_events=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="sigma-ptpy-bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--device", help="the name of a USB device (the first camera by default)")
+    parser.add_argument("--simulate", action="store_true", help="uses a simulated camera")
+    parser.add_argument("--latency", type=float, default=0.001,
+                        help="the latency of the simulated camera in seconds (default: %(default)s)")
+    parser.add_argument("--bandwidth", type=float, default=40e6,
+                        help="the bandwidth of the simulated camera in bytes/s (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="the number of calls of each get_cam_data_group* (default: %(default)s)")
+    parser.add_argument("--live-view", type=float, default=3.0,
+                        help="the duration of live view in seconds, or 0 to skip (default: %(default)s)")
+    parser.add_argument("--shots", type=int, default=3,
+                        help="the number of pictures taken, or 0 to skip shooting and downloads "
+                             "(default: %(default)s)")
+    parser.add_argument("--chunk-sizes", type=lambda s: [int(x, 0) for x in s.split(",")], default=CHUNK_SIZES,
+                        help="comma-separated chunk sizes of downloads in bytes")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="the number of downloads for each chunk size (default: %(default)s)")
+    parser.add_argument("--output", help="a path of the JSON output (stdout by default)")
+    args = parser.parse_args(argv)
+
+    report = run(_camera(args), iterations=args.iterations, live_view=args.live_view, shots=args.shots,
+                 chunk_sizes=args.chunk_sizes, repeat=args.repeat)
+    report["simulated"] = args.simulate
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
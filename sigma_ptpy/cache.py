@@ -0,0 +1,334 @@
+"""Write-through cache of camera settings"""
+
+import collections
+import copy
+import logging
+import threading
+import time
+from .schema import (
+    CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5, CamDataGroupFocus)
+from .settings import apply_settings
+
+
+logger = logging.getLogger(__name__)
+
+GROUPS = (CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5, CamDataGroupFocus)
+"""tuple: schema classes of the data groups held by a cache."""
+
+_GROUP_METHODS = {
+    CamDataGroup1: ('get_cam_data_group1', 'set_cam_data_group1'),
+    CamDataGroup2: ('get_cam_data_group2', 'set_cam_data_group2'),
+    CamDataGroup3: ('get_cam_data_group3', 'set_cam_data_group3'),
+    CamDataGroup4: ('get_cam_data_group4', 'set_cam_data_group4'),
+    CamDataGroup5: ('get_cam_data_group5', 'set_cam_data_group5'),
+    CamDataGroupFocus: ('get_cam_data_group_focus', 'set_cam_data_group_focus'),
+}
+
+VOLATILE_FIELDS = frozenset([
+    'FrameBufferState',
+    'MediaFreeSpace',
+    'MediaStatus',
+    'CurrentLensFocalLength',
+    'BatteryState',
+    'IntervalTimerSecondRemain',
+    'IntervalTimerFrameRemain',
+    'FaceEyeAFStatus',
+    'DMFDetection',
+])
+"""frozenset: fields changed by the camera itself rather than by settings."""
+
+
+def _fields(obj):
+    return list(obj._Fields)
+
+
+_GROUP_FIELDS = dict((klass, _fields(klass)) for klass in GROUPS)
+
+FIELD_GROUPS = dict((name, klass) for klass in GROUPS for name in _GROUP_FIELDS[klass])
+"""dict: the schema class owning each field name."""
+
+
+class CacheStats(object):
+    """Statistics of a cache.
+
+    Attributes:
+        Hits (int): the number of reads served from the cache, i.e., saved transactions.
+        Misses (int): the number of reads sent to the camera.
+        Invalidations (int): the number of invalidations by captures and events.
+        Groups (dict): `[hits, misses]` for each schema class name."""
+
+    def __init__(self):
+        self.Hits = 0
+        self.Misses = 0
+        self.Invalidations = 0
+        self.Groups = dict((klass.__name__, [0, 0]) for klass in GROUPS)
+
+    def __str__(self):
+        return \
+            f"CacheStats(Hits={str(self.Hits)}, Misses={str(self.Misses)}, " \
+            f"Invalidations={str(self.Invalidations)})"
+
+    @property
+    def HitRatio(self):
+        """float: the ratio of hits to all reads."""
+        total = self.Hits + self.Misses
+        return self.Hits / total if total else 0.0
+
+
+class CameraStateCache(object):
+    """Memoizes CamDataGroup1-5 and CamDataGroupFocus of a camera.
+
+    Each group is kept for the TTL of the group. A group containing volatile fields (see
+    `VOLATILE_FIELDS`) is kept only for `volatile_ttl` when it is read as a whole, while `get`
+    of a non-volatile field uses the TTL of the group. Values sent by `set_cam_data_group*` are
+    merged into the cached groups after the camera accepts them. Every group is invalidated by
+    `snap_command` and `clear_image_db_single`, and by PTP events if `poll_events` is true.
+
+    Other attributes are delegated to the camera, so a cache can be used in place of a camera.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        ttl (float): the default TTL of groups in seconds.
+        volatile_ttl (float): the TTL of volatile fields in seconds.
+        ttls (dict): TTLs in seconds overriding `ttl` for some schema classes.
+        volatile_fields (set): names of volatile fields.
+        poll_events (bool): whether PTP events are checked before each read. Events are taken from
+            the queue of the camera, so this must not be enabled when the application also calls
+            `camera.event()`. The latest taken events are kept in `events`.
+
+    Examples:
+        Usage as follows::
+
+            cache = camera.state_cache(ttl=10)
+            cache.get("ShutterSpeed")  # a transaction
+            cache.get("ShutterSpeed")  # no transaction
+            print(cache.stats)"""
+
+    def __init__(self, camera, ttl=5.0, volatile_ttl=0.5, ttls=None, volatile_fields=VOLATILE_FIELDS,
+                 poll_events=False):
+        self.camera = camera
+        self.ttl = ttl
+        self.volatile_ttl = volatile_ttl
+        self.ttls = dict(ttls) if ttls is not None else dict()
+        self.volatile_fields = frozenset(volatile_fields)
+        self.poll_events = poll_events
+        self.events = collections.deque(maxlen=64)
+
+        self.__lock = threading.RLock()
+        self.__entries = dict()
+        self.__stats = CacheStats()
+
+    def __getattr__(self, name):
+        if name == "camera":
+            raise AttributeError(name)
+        return getattr(self.camera, name)
+
+    @property
+    def stats(self):
+        """CacheStats: a snapshot of statistics."""
+        with self.__lock:
+            stats = CacheStats()
+            stats.__dict__.update(self.__stats.__dict__)
+            stats.Groups = dict((k, list(v)) for k, v in self.__stats.Groups.items())
+            return stats
+
+    def ttl_of(self, klass, field=None):
+        """Returns the TTL of a group or a field.
+
+        Args:
+            klass (type): a schema class in `GROUPS`.
+            field (str): a field name. When it is None, the TTL of the whole group is returned.
+
+        Returns:
+            float: a TTL in seconds."""
+        ttl = self.ttls.get(klass, self.ttl)
+        if field is None:
+            volatile = any(name in self.volatile_fields for name in _GROUP_FIELDS[klass])
+        else:
+            volatile = field in self.volatile_fields
+        return min(ttl, self.volatile_ttl) if volatile else ttl
+
+    def invalidate(self, klass=None):
+        """Discards cached groups.
+
+        Args:
+            klass (type): a schema class to be discarded. None means all groups."""
+        with self.__lock:
+            if klass is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(klass, None)
+            self.__stats.Invalidations += 1
+
+    def check_events(self):
+        """Takes PTP events queued by the camera, and invalidates all groups if any.
+
+        Returns:
+            list: events taken from the camera."""
+        event = getattr(self.camera, "event", None)
+        if event is None:
+            return []
+        events = []
+        while True:
+            evt = event()
+            if evt is None:
+                break
+            events.append(evt)
+        if events:
+            logger.debug("Invalidate the cache by {} events".format(len(events)))
+            self.events.extend(events)
+            self.invalidate()
+        return events
+
+    def read(self, klass, max_age=None):
+        """Reads a group from the cache or the camera.
+
+        Args:
+            klass (type): a schema class in `GROUPS`.
+            max_age (float): the acceptable age of a cached group in seconds. When it is None,
+                the TTL of the group is used.
+
+        Returns:
+            object: a copy of the group."""
+        if self.poll_events:
+            self.check_events()
+        if max_age is None:
+            max_age = self.ttl_of(klass)
+        getter = getattr(self.camera, _GROUP_METHODS[klass][0])
+
+        with self.__lock:
+            entry = self.__entries.get(klass)
+            counters = self.__stats.Groups[klass.__name__]
+            if entry is not None and time.perf_counter() - entry[0] <= max_age:
+                self.__stats.Hits += 1
+                counters[0] += 1
+                return copy.copy(entry[1])
+
+            self.__stats.Misses += 1
+            counters[1] += 1
+            data = getter()
+            self.__entries[klass] = (time.perf_counter(), data)
+            return copy.copy(data)
+
+    def write(self, klass, data):
+        """Sends a group to the camera and merges sent values into the cache.
+
+        When the camera rejects the group, the cached group is discarded instead because the
+        camera may have applied a part of it.
+
+        Args:
+            klass (type): a schema class in `GROUPS`.
+            data (object): an object of `klass`."""
+        setter = getattr(self.camera, _GROUP_METHODS[klass][1])
+        with self.__lock:
+            ret = setter(data)
+            if ret.ResponseCode != 'OK':
+                logger.debug("Invalidate {} rejected by {}".format(klass.__name__, ret.ResponseCode))
+                self.invalidate(klass)
+                return ret
+            entry = self.__entries.get(klass)
+            if entry is not None:
+                for name in _fields(data):
+                    value = getattr(data, name)
+                    if value is not None:
+                        setattr(entry[1], name, value)
+            return ret
+
+    def apply(self, **fields):
+        """Sends settings with one set transaction per touched group.
+
+        Fields whose cached values already match are left out, and groups without changes are
+        not sent. See `sigma_ptpy.settings.apply_settings`.
+
+        Args:
+            fields: field names and values such as `ShutterSpeed=...` or `FocusMode=...`.
+
+        Returns:
+            list: schema objects sent to the camera."""
+        return apply_settings(self, fields, current=self.__peek)
+
+    def __peek(self, klass):
+        with self.__lock:
+            entry = self.__entries.get(klass)
+            if entry is not None and time.perf_counter() - entry[0] <= self.ttls.get(klass, self.ttl):
+                return entry[1]
+        return None
+
+    def get(self, field, max_age=None):
+        """Reads a field of any group.
+
+        Args:
+            field (str): a field name such as 'ShutterSpeed' or 'FocusMode'.
+            max_age (float): the acceptable age of a cached value in seconds. When it is None,
+                the TTL of the field is used.
+
+        Returns:
+            object: the value of the field."""
+        klass = FIELD_GROUPS.get(field)
+        if klass is None:
+            raise KeyError("Unknown field: {}".format(field))
+        if max_age is None:
+            max_age = self.ttl_of(klass, field)
+        return getattr(self.read(klass, max_age), field)
+
+    def get_cam_data_group1(self, max_age=None):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group1`."""
+        return self.read(CamDataGroup1, max_age)
+
+    def get_cam_data_group2(self, max_age=None):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group2`."""
+        return self.read(CamDataGroup2, max_age)
+
+    def get_cam_data_group3(self, max_age=None):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group3`."""
+        return self.read(CamDataGroup3, max_age)
+
+    def get_cam_data_group4(self, max_age=None):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group4`."""
+        return self.read(CamDataGroup4, max_age)
+
+    def get_cam_data_group5(self, max_age=None):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group5`."""
+        return self.read(CamDataGroup5, max_age)
+
+    def get_cam_data_group_focus(self, max_age=None):
+        """See `sigma_ptpy.SigmaPTPy.get_cam_data_group_focus`."""
+        return self.read(CamDataGroupFocus, max_age)
+
+    def set_cam_data_group1(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group1`."""
+        return self.write(CamDataGroup1, data)
+
+    def set_cam_data_group2(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group2`."""
+        return self.write(CamDataGroup2, data)
+
+    def set_cam_data_group3(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group3`."""
+        return self.write(CamDataGroup3, data)
+
+    def set_cam_data_group4(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group4`."""
+        return self.write(CamDataGroup4, data)
+
+    def set_cam_data_group5(self, data):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group5`."""
+        return self.write(CamDataGroup5, data)
+
+    def set_cam_data_group_focus(self, focus):
+        """See `sigma_ptpy.SigmaPTPy.set_cam_data_group_focus`."""
+        return self.write(CamDataGroupFocus, focus)
+
+    def snap_command(self, data):
+        """See `sigma_ptpy.SigmaPTPy.snap_command`. All groups are invalidated."""
+        try:
+            return self.camera.snap_command(data)
+        finally:
+            self.invalidate()
+
+    def clear_image_db_single(self, image_id):
+        """See `sigma_ptpy.SigmaPTPy.clear_image_db_single`. All groups are invalidated."""
+        try:
+            return self.camera.clear_image_db_single(image_id)
+        finally:
+            self.invalidate()
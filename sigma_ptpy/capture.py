@@ -0,0 +1,214 @@
+"""Waiting for completion of shooting"""
+
+import collections
+import logging
+import time
+from .apex import ShutterSpeed2Converter, ShutterSpeed3Converter
+from .enum import CaptStatus
+from .schema import SnapCommand
+
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATES = frozenset([
+    CaptStatus.ImageGenCompleted,
+    CaptStatus.ImageDataStorageCompleted,
+    CaptStatus.MovieGenCompleted,
+    CaptStatus.Interrupted,
+])
+"""frozenset: CaptStatus values meaning that shooting has finished successfully."""
+
+FAILED_STATES = frozenset([
+    CaptStatus.AFFailed,
+    CaptStatus.BufferFull,
+    CaptStatus.CWBFailed,
+    CaptStatus.ImageGenFailed,
+    CaptStatus.Failed,
+])
+"""frozenset: CaptStatus values meaning that shooting has failed."""
+
+
+class CaptureError(Exception):
+    """Shooting has failed.
+
+    Attributes:
+        result (CaptureResult): the progress of shooting until the failure."""
+
+    def __init__(self, result):
+        super(CaptureError, self).__init__("Failed shooting: status={}".format(result.CaptStatus))
+        self.result = result
+
+
+class CaptureResult(object):
+    """Progress of shooting.
+
+    Attributes:
+        Status (sigma_ptpy.schema.CamCaptStatus): the last status obtained from a camera.
+        CaptStatus (sigma_ptpy.enum.CaptStatus): the last state of shooting.
+        Durations (collections.OrderedDict): the time spent in each state in seconds,
+            in the order the states are observed.
+        Polls (int): the number of SigmaGetCamCaptStatus transactions.
+        Elapsed (float): the time from the start of shooting to the end of waiting in seconds."""
+
+    def __init__(self):
+        self.Status = None
+        self.CaptStatus = None
+        self.Durations = collections.OrderedDict()
+        self.Polls = 0
+        self.Elapsed = 0.0
+
+    def __str__(self):
+        durations = ", ".join("{}={:.3f}".format(k, v) for k, v in self.Durations.items())
+        return \
+            f"CaptureResult(CaptStatus={str(self.CaptStatus)}, Polls={str(self.Polls)}, " \
+            f"Elapsed={self.Elapsed:.3f}, Durations=({durations}))"
+
+    @property
+    def ok(self):
+        """bool: whether shooting has finished successfully."""
+        return self.CaptStatus in COMPLETED_STATES
+
+
+def exposure_time(shutter_speed):
+    """Decodes an 8-bit APEX shutter speed into seconds.
+
+    Args:
+        shutter_speed (int): ShutterSpeed in sigma_ptpy.schema.CamDataGroup1.
+
+    Returns:
+        float: an exposure time in seconds, or None if the code is unknown (e.g., bulb)."""
+    if shutter_speed is None:
+        return None
+    seconds = ShutterSpeed3Converter.decode_uint8(shutter_speed)
+    if seconds is None:
+        seconds = ShutterSpeed2Converter.decode_uint8(shutter_speed)
+    return seconds
+
+
+class CaptureTracker(object):
+    """Polls the shooting status of a camera with a schedule based on the exposure time.
+
+    The first poll is scheduled after the expected exposure time decoded from
+    `CamDataGroup1.ShutterSpeed`, counted from the time of the snap command. Subsequent polls
+    start at `min_interval` and back off by `backoff` times up to `max_interval`. The interval is
+    reset whenever the state changes. `SigmaPTPy` keeps a tracker as `capture_tracker`, which
+    learns the time of `snap_command` and the shutter speed of data group 1 read or written.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        min_interval (float): the shortest interval of polling in seconds.
+        max_interval (float): the longest interval of polling in seconds.
+        backoff (float): the growth rate of intervals.
+        timeout_margin (float): the default limit of waiting in seconds in addition to the exposure time.
+
+    Examples:
+        Usage as follows::
+
+            tracker = CaptureTracker(camera)
+            tracker.snap()
+            result = tracker.wait(image_id=0, timeout=10)
+            print(result.Durations)"""
+
+    def __init__(self, camera, min_interval=0.01, max_interval=0.2, backoff=1.5, timeout_margin=10.0):
+        self.camera = camera
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout_margin = timeout_margin
+        self.exposure = None
+        self.__started = None
+
+    def refresh_exposure(self):
+        """Reads the current shutter speed from a camera.
+
+        Returns:
+            float: the expected exposure time in seconds, or None if it is unknown."""
+        self.exposure = exposure_time(self.camera.get_cam_data_group1().ShutterSpeed)
+        return self.exposure
+
+    def snapped(self, started=None, exposure=None):
+        """Remembers the start of shooting by a snap command issued elsewhere.
+
+        Args:
+            started (float): the value of `time.perf_counter()` when the snap command was sent
+                (the current time by default).
+            exposure (float): the exposure time in seconds, if known."""
+        self.__started = started if started is not None else time.perf_counter()
+        if exposure is not None:
+            self.exposure = exposure
+
+    def snap(self, command=None):
+        """Issues a snap command and remembers the time as the start of shooting.
+
+        Args:
+            command (sigma_ptpy.schema.SnapCommand): a snap command object."""
+        if self.exposure is None:
+            self.refresh_exposure()
+        started = time.perf_counter()
+        ret = self.camera.snap_command(command if command is not None else SnapCommand())
+        self.__started = started
+        return ret
+
+    def wait(self, image_id, timeout=None, until=COMPLETED_STATES):
+        """Waits for completion of shooting.
+
+        Args:
+            image_id (int): the image ID to obtain a status.
+            timeout (float): the limit of waiting in seconds from the start of shooting. By default,
+                it is the exposure time plus `timeout_margin`.
+            until (set): CaptStatus values that terminate waiting successfully. For example,
+                `{CaptStatus.AFSuccess}` for AF-only shooting.
+
+        Returns:
+            CaptureResult: the progress of shooting.
+
+        Raises:
+            CaptureError: the camera has reported a failure (including BufferFull).
+            TimeoutError: shooting has not finished in time."""
+        if self.__started is None:
+            self.__started = time.perf_counter()
+        started, self.__started = self.__started, None
+        if self.exposure is None:
+            self.refresh_exposure()
+        if timeout is None:
+            timeout = (self.exposure or 0.0) + self.timeout_margin
+        deadline = started + timeout
+        result = CaptureResult()
+
+        # The camera cannot finish before the exposure ends.
+        self.__sleep_until(min(started + (self.exposure or 0.0), deadline))
+
+        interval = self.min_interval
+        observed = started
+        while True:
+            status = self.camera.get_cam_capt_status(image_id)
+            now = time.perf_counter()
+            result.Polls += 1
+            result.Status = status
+            previous, state = result.CaptStatus, status.CaptStatus
+            if state != previous:
+                interval = self.min_interval
+            # The time since the last poll is spent in the previously observed state.
+            spent = previous if previous is not None else state
+            result.Durations[spent] = result.Durations.get(spent, 0.0) + (now - observed)
+            result.Durations.setdefault(state, 0.0)
+            result.CaptStatus = state
+            observed = now
+            result.Elapsed = now - started
+
+            if state in until:
+                logger.debug(str(result))
+                return result
+            if state in FAILED_STATES:
+                raise CaptureError(result)
+            if now >= deadline:
+                raise TimeoutError("Shooting has not finished in {} seconds: status={}".format(timeout, state))
+
+            self.__sleep_until(min(now + interval, deadline))
+            interval = min(interval * self.backoff, self.max_interval)
+
+    @staticmethod
+    def __sleep_until(t):
+        rest = t - time.perf_counter()
+        if rest > 0:
+            time.sleep(rest)
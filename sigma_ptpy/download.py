@@ -0,0 +1,155 @@
+"""Chunked downloads of picture files with bounded memory usage"""
+
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+MAX_TRANSFER_SIZE = 0x8000000
+"""int: the maximum value of max_length accepted by SigmaGetBigPartialPictFile."""
+
+
+class ChunkSizeTuner(object):
+    """Adapts the size of partial transfers to the measured throughput.
+
+    The chunk size starts at `initial` and is doubled as long as a larger transfer improves
+    the throughput by more than `tolerance`. When doubling stops paying off, the previous size
+    is restored and kept for the rest of the download. Peak memory is therefore bounded by
+    a few multiples of `maximum`, whatever the size of a file is.
+
+    Args:
+        initial (int): the chunk size of the first transfer in bytes.
+        minimum (int): the lower bound of the chunk size in bytes.
+        maximum (int): the upper bound of the chunk size in bytes.
+        tolerance (float): the relative improvement of throughput required to grow the chunk size."""
+
+    def __init__(self, initial=0x100000, minimum=0x10000, maximum=0x800000, tolerance=0.05):
+        if not 0 < minimum <= initial <= maximum <= MAX_TRANSFER_SIZE:
+            raise ValueError("0 < minimum <= initial <= maximum <= {:#x} is expected".format(MAX_TRANSFER_SIZE))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.size = initial
+        self.throughput = None
+        self.__growing = True
+
+    def update(self, nbytes, elapsed):
+        """Feeds a result of a transfer of `size` bytes.
+
+        Args:
+            nbytes (int): the number of transferred bytes.
+            elapsed (float): the time spent on the transfer in seconds."""
+        if nbytes < self.size or elapsed <= 0:
+            return  # a short tail chunk says nothing about the throughput.
+        throughput = nbytes / elapsed
+        if self.throughput is None or throughput > self.throughput * (1 + self.tolerance):
+            self.throughput = throughput
+            if self.__growing:
+                self.size = min(self.size * 2, self.maximum)
+        elif self.__growing:
+            self.__growing = False
+            self.size = max(self.size // 2, self.minimum)
+        logger.debug("chunk size = {} bytes, throughput = {:.0f} B/s".format(self.size, throughput))
+
+
+def iter_picture_chunks(camera, info, chunk_size=None, tuner=None):
+    """Downloads a picture file piece by piece.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+        chunk_size (int): a fixed transfer size in bytes. When it is None, the size is tuned
+            automatically by `tuner`.
+        tuner (ChunkSizeTuner): a tuner of transfer sizes (optional).
+
+    Yields:
+        bytes: a piece of the picture file in order."""
+    if chunk_size is not None and not 0 < chunk_size <= MAX_TRANSFER_SIZE:
+        raise ValueError("chunk_size must be in (0, {:#x}]".format(MAX_TRANSFER_SIZE))
+    if chunk_size is None and tuner is None:
+        tuner = ChunkSizeTuner()
+
+    offset = 0
+    while offset < info.FileSize:
+        size = min(chunk_size or tuner.size, info.FileSize - offset)
+        started = time.perf_counter()
+        pict = camera.get_big_partial_pict_file(info.FileAddress, offset, size)
+        elapsed = time.perf_counter() - started
+
+        if pict.AcquiredSize == 0:
+            raise IOError("No data is acquired at offset {} of {}".format(offset, info.FileSize))
+        data = pict.PartialData
+        if len(data) != pict.AcquiredSize:
+            data = data[:pict.AcquiredSize]
+        del pict
+
+        if tuner is not None:
+            tuner.update(len(data), elapsed)
+        offset += len(data)
+        yield data
+
+
+def download_picture(camera, info, sink, chunk_size=None, tuner=None):
+    """Downloads a picture file into a sink piece by piece.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+        sink (object): a file-like object having `write` method, or a callable receiving bytes.
+        chunk_size (int): a fixed transfer size in bytes (optional).
+        tuner (ChunkSizeTuner): a tuner of transfer sizes (optional).
+
+    Returns:
+        int: the number of downloaded bytes."""
+    write = sink.write if hasattr(sink, "write") else sink
+    if not callable(write):
+        raise TypeError("a file-like object or a callable is expected, but {} is given".format(type(sink)))
+
+    total = 0
+    for data in iter_picture_chunks(camera, info, chunk_size=chunk_size, tuner=tuner):
+        write(data)
+        total += len(data)
+    return total
+
+
+def download_picture_into(camera, info, buffer, chunk_size=None, tuner=None):
+    """Downloads a picture file into a preallocated buffer piece by piece.
+
+    Each piece is copied from a USB response into `buffer` directly, so no intermediate
+    `bytes` object of the file is created.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+        buffer (object): a writable buffer of at least `info.FileSize` bytes such as `bytearray`,
+            `memoryview` or `mmap.mmap`.
+        chunk_size (int): a fixed transfer size in bytes (optional).
+        tuner (ChunkSizeTuner): a tuner of transfer sizes (optional).
+
+    Returns:
+        int: the number of downloaded bytes."""
+    if chunk_size is not None and not 0 < chunk_size <= MAX_TRANSFER_SIZE:
+        raise ValueError("chunk_size must be in (0, {:#x}]".format(MAX_TRANSFER_SIZE))
+    if chunk_size is None and tuner is None:
+        tuner = ChunkSizeTuner()
+
+    view = memoryview(buffer)
+    if view.readonly:
+        raise TypeError("a writable buffer is expected")
+    if view.nbytes < info.FileSize:
+        raise ValueError("{} bytes are required, but the buffer has only {} bytes".format(info.FileSize, view.nbytes))
+
+    offset = 0
+    while offset < info.FileSize:
+        size = min(chunk_size or tuner.size, info.FileSize - offset)
+        started = time.perf_counter()
+        pict = camera.get_big_partial_pict_file_into(view[offset:offset + size], info.FileAddress, offset, size)
+        elapsed = time.perf_counter() - started
+
+        if pict.AcquiredSize == 0:
+            raise IOError("No data is acquired at offset {} of {}".format(offset, info.FileSize))
+        if tuner is not None:
+            tuner.update(pict.AcquiredSize, elapsed)
+        offset += pict.AcquiredSize
+    return offset
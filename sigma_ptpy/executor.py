@@ -0,0 +1,208 @@
+"""A device-owning executor serializing camera operations from many threads"""
+
+import collections
+import concurrent.futures
+import copy
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+COALESCED_READS = frozenset([
+    'get_cam_data_group1',
+    'get_cam_data_group2',
+    'get_cam_data_group3',
+    'get_cam_data_group4',
+    'get_cam_data_group5',
+    'get_cam_data_group_focus',
+    'get_cam_can_set_info5',
+    'get_cam_capt_status',
+    'get_pict_file_info2',
+    'get_view_frame',
+])
+"""frozenset: methods of `SigmaPTPy` whose back-to-back calls with the same arguments share a transaction."""
+
+
+class ExecutorStats(object):
+    """Statistics of a `DeviceExecutor`.
+
+    Attributes:
+        Submitted (int): the number of submitted operations.
+        Completed (int): the number of finished operations including failed ones.
+        Failed (int): the number of operations which raised exceptions.
+        Coalesced (int): the number of operations answered by a transaction of an identical read
+            queued right before them.
+        QueueDepth (int): the number of operations waiting in the queue.
+        QueueDepthMax (int): the maximum number of waiting operations.
+        WaitTimeMean (float): the mean time in seconds from submission to start.
+        WaitTimeMax (float): the maximum time in seconds from submission to start.
+        RunTime (float): seconds spent on running operations."""
+
+    def __init__(self):
+        self.Submitted = 0
+        self.Completed = 0
+        self.Failed = 0
+        self.Coalesced = 0
+        self.QueueDepth = 0
+        self.QueueDepthMax = 0
+        self.WaitTimeMean = None
+        self.WaitTimeMax = None
+        self.RunTime = 0.0
+
+    def __str__(self):
+        return \
+            f"ExecutorStats(Submitted={str(self.Submitted)}, Completed={str(self.Completed)}, " \
+            f"Failed={str(self.Failed)}, Coalesced={str(self.Coalesced)}, " \
+            f"QueueDepth={str(self.QueueDepth)}, QueueDepthMax={str(self.QueueDepthMax)}, " \
+            f"WaitTimeMean={str(self.WaitTimeMean)}, WaitTimeMax={str(self.WaitTimeMax)}, " \
+            f"RunTime={str(self.RunTime)})"
+
+
+class _WorkItem(object):
+    def __init__(self, future, fn, args, kwargs, key):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.submitted = time.perf_counter()
+
+
+class DeviceExecutor(concurrent.futures.Executor):
+    """Runs operations on a camera on one I/O thread owning the device.
+
+    Operations submitted from any thread are run one by one in the order of submission, so
+    transactions of a UI thread, a live view thread and a download thread never interleave.
+    Reads in `COALESCED_READS` queued back to back with the same arguments (e.g., CamDataGroup1
+    polled by several threads) run once. The first future receives the result and the others
+    receive shallow copies of it, so that a caller modifying its result does not affect others.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        name (str): the name of the I/O thread.
+
+    Examples:
+        Share a camera between threads as follows::
+
+            executor = DeviceExecutor(camera)
+            group1 = executor.call('get_cam_data_group1').result()
+            future = executor.submit(camera.download_picture, info, fout)
+            ...
+            executor.shutdown()"""
+
+    def __init__(self, camera, name="SigmaPTPyIO"):
+        self.camera = camera
+        self.__queue = collections.deque()
+        self.__cond = threading.Condition()
+        self.__shutdown = False
+        self.__stats = ExecutorStats()
+        self.__wait_total = 0.0
+        self.__thread = threading.Thread(name=name, target=self.__run, daemon=True)
+        self.__thread.start()
+
+    @property
+    def stats(self):
+        """ExecutorStats: a snapshot of statistics."""
+        with self.__cond:
+            stats = ExecutorStats()
+            stats.__dict__.update(self.__stats.__dict__)
+            return stats
+
+    def __enqueue(self, fn, args, kwargs, key):
+        future = concurrent.futures.Future()
+        with self.__cond:
+            if self.__shutdown:
+                raise RuntimeError("cannot schedule new operations after shutdown")
+            self.__queue.append(_WorkItem(future, fn, args, kwargs, key))
+            stats = self.__stats
+            stats.Submitted += 1
+            stats.QueueDepth = len(self.__queue)
+            stats.QueueDepthMax = max(stats.QueueDepthMax, stats.QueueDepth)
+            self.__cond.notify()
+        return future
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules `fn(*args, **kwargs)` on the I/O thread.
+
+        Returns:
+            concurrent.futures.Future: the result of the call."""
+        return self.__enqueue(fn, args, kwargs, None)
+
+    def call(self, name, *args, **kwargs):
+        """Schedules a method of the camera on the I/O thread.
+
+        Args:
+            name (str): the name of a method of `SigmaPTPy` such as 'get_cam_data_group1'.
+            args: arguments of the method.
+
+        Returns:
+            concurrent.futures.Future: the result of the method."""
+        fn = getattr(self.camera, name)
+        key = (name, args) if name in COALESCED_READS and not kwargs else None
+        return self.__enqueue(fn, args, kwargs, key)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Stops accepting operations, and stops the I/O thread after queued operations.
+
+        Args:
+            wait (bool): whether to wait for the I/O thread.
+            cancel_futures (bool): whether to cancel queued operations instead of running them."""
+        with self.__cond:
+            self.__shutdown = True
+            if cancel_futures:
+                while self.__queue:
+                    self.__queue.popleft().future.cancel()
+                self.__stats.QueueDepth = 0
+            self.__cond.notify_all()
+        if wait and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def __next_batch(self):
+        with self.__cond:
+            self.__cond.wait_for(lambda: self.__queue or self.__shutdown)
+            if not self.__queue:
+                return None
+            batch = [self.__queue.popleft()]
+            key = batch[0].key
+            while key is not None and self.__queue and self.__queue[0].key == key:
+                batch.append(self.__queue.popleft())
+            self.__stats.QueueDepth = len(self.__queue)
+            return batch
+
+    def __run(self):
+        while True:
+            batch = self.__next_batch()
+            if batch is None:
+                return
+            batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            item = batch[0]
+            try:
+                result, error = item.fn(*item.args, **item.kwargs), None
+            except BaseException as e:
+                result, error = None, e
+            finished = time.perf_counter()
+
+            with self.__cond:
+                stats = self.__stats
+                for item in batch:
+                    wait = started - item.submitted
+                    self.__wait_total += wait
+                    stats.WaitTimeMax = wait if stats.WaitTimeMax is None else max(stats.WaitTimeMax, wait)
+                stats.Completed += len(batch)
+                stats.Coalesced += len(batch) - 1
+                stats.WaitTimeMean = self.__wait_total / stats.Completed
+                stats.RunTime += finished - started
+                if error is not None:
+                    stats.Failed += len(batch)
+
+            for i, item in enumerate(batch):
+                if error is None:
+                    item.future.set_result(result if i == 0 else copy.copy(result))
+                else:
+                    item.future.set_exception(error)
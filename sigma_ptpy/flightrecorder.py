@@ -0,0 +1,104 @@
+"""An in-memory ring buffer of the latest PTP transactions for post-mortem debugging"""
+
+import collections
+import datetime
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+PREFIX_SIZE = 128
+"""int: the number of leading bytes of sent or received data kept for each transaction."""
+
+
+def _bytes_to_hex(b, nbytes=None):
+    """Formats the leading `PREFIX_SIZE` bytes of data of `nbytes` bytes, marking truncation by '...'."""
+    text = " ".join(list(map(lambda s: format(s, "02x"), b[:PREFIX_SIZE])))
+    return text + " ..." if (len(b) if nbytes is None else nbytes) > PREFIX_SIZE else text
+
+
+class FlightRecorder(object):
+    """A fixed-size ring buffer of the latest transactions.
+
+    Recording only appends references to metadata and the leading `PREFIX_SIZE` bytes of data,
+    so it is cheap enough to be always on. Entries are formatted when they are dumped. `SigmaPTPy`
+    dumps them to the log when a transaction fails after retries.
+
+    Args:
+        size (int): the maximum number of kept transactions.
+
+    Examples:
+        Print the latest transactions as follows::
+
+            camera = SigmaPTPy()
+            ...
+            print(camera.flight_recorder.format())"""
+
+    def __init__(self, size=64):
+        self.__entries = collections.deque(maxlen=size)
+
+    def record(self, opcode, transaction_id, params, payload, code, data, elapsed, error=None):
+        """Appends a transaction. This is called by `SigmaPTPy`.
+
+        Args:
+            opcode (str): the name of the operation.
+            transaction_id (int): the transaction ID, or None if it was not assigned before a failure.
+            params (list): parameters of the operation.
+            payload (bytes): sent data or None.
+            code (str): the response code, or None for a failed transaction.
+            data (bytes): received data or None.
+            elapsed (float): the duration in seconds.
+            error (Exception): the exception raised by the transaction."""
+        if payload is not None:
+            nbytes, payload = len(payload), payload[:PREFIX_SIZE]
+        elif data is not None:
+            nbytes, data = len(data), data[:PREFIX_SIZE]
+        else:
+            nbytes = 0
+        self.__entries.append((
+            time.time(), threading.get_ident(), opcode, transaction_id, params, payload, code, data, nbytes,
+            elapsed, error))
+
+    def entries(self):
+        """Returns recorded transactions from the oldest.
+
+        Returns:
+            list: tuples of the completion time, the thread ID, the operation name, the transaction ID, parameters,
+            the prefix of sent data, the response code, the prefix of received data, the number of
+            transferred bytes, the duration, and the exception."""
+        while True:
+            try:
+                return list(self.__entries)
+            except RuntimeError:  # appended by another thread during the copy
+                continue
+
+    def clear(self):
+        """Discards recorded transactions."""
+        self.__entries.clear()
+
+    def format(self):
+        """Formats recorded transactions.
+
+        Returns:
+            str: a line per transaction from the oldest."""
+        threads = dict((t.ident, t.name) for t in threading.enumerate())
+        lines = []
+        for finished, ident, opcode, transaction_id, params, payload, code, data, nbytes, elapsed, error in \
+                self.entries():
+            status = "{}: {}".format(type(error).__name__, error) if error is not None else code
+            line = "{} [{}] #{} {} {} {} {:.3f}ms".format(
+                datetime.datetime.fromtimestamp(finished).strftime("%H:%M:%S.%f"), threads.get(ident, ident),
+                transaction_id, opcode, list(params), status, elapsed * 1000.0)
+            if payload is not None:
+                line += " SEND {} bytes: {}".format(nbytes, _bytes_to_hex(payload, nbytes))
+            elif data is not None:
+                line += " RECV {} bytes: {}".format(nbytes, _bytes_to_hex(data, nbytes))
+            lines.append(line)
+        return "\n".join(lines)
+
+    def dump(self, level=logging.ERROR, log=logger):
+        """Writes recorded transactions to a log if the level is enabled."""
+        if log.isEnabledFor(level):
+            log.log(level, "Latest transactions:\n%s", self.format())
@@ -0,0 +1,181 @@
+"""IFD (directory entry) structures used by SIGMA API commands
+
+An IFD consists of a 4-byte DataLength, a 4-byte DirectoryCount, 12-byte directory entries
+(Tag, Type, Count and a value or an offset), and out-of-line values. All numbers are little-endian.
+A value longer than 4 bytes is stored out of line, and the entry holds its offset from the
+beginning of the data."""
+
+import struct
+import sys
+from .enum import DirectoryType
+
+
+_HEADER = struct.Struct("<II")
+_ENTRY = struct.Struct("<HHI4s")
+
+NUMPY_THRESHOLD = 16
+"""int: the minimum number of elements of arrays returned as NumPy arrays in NumPy mode."""
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# struct format character and size of an element of each type
+_FORMATS = {
+    DirectoryType.UInt8: ("B", 1),
+    DirectoryType.Any8: ("B", 1),
+    DirectoryType.Int8: ("b", 1),
+    DirectoryType.UInt16: ("H", 2),
+    DirectoryType.Int16: ("h", 2),
+    DirectoryType.UInt32: ("I", 4),
+    DirectoryType.Int32: ("i", 4),
+    DirectoryType.Float32: ("f", 4),
+    DirectoryType.Float64: ("d", 8),
+    DirectoryType.URational: ("I", 8),
+    DirectoryType.Rational: ("i", 8),
+    DirectoryType.String: ("B", 1),
+}
+_TYPES = dict((t.value, t) for t in DirectoryType)
+_RATIONALS = (DirectoryType.URational, DirectoryType.Rational)
+
+
+def _unpack_array(view, fmt, count):
+    if _LITTLE_ENDIAN:
+        return view.cast(fmt).tolist()
+    return list(struct.unpack("<%d%s" % (count, fmt), view))
+
+
+def _numpy_array(view, fmt, count):
+    import numpy
+    return numpy.frombuffer(view, dtype="<" + fmt, count=count)
+
+
+def decode_value(type_, view, count, numpy=False):
+    """Decodes the value of a directory entry.
+
+    Args:
+        type_ (sigma_ptpy.enum.DirectoryType): the type of the entry.
+        view (memoryview): the bytes of the value without padding.
+        count (int): the number of elements.
+        numpy (bool): whether arrays of `NUMPY_THRESHOLD` or more numbers are returned as
+            read-only NumPy arrays sharing memory with `view`. NumPy is required in this mode.
+
+    Returns:
+        object: a str for String, a list of (numerator, denominator) pairs for rationals,
+        and a list (or a NumPy array) of numbers for the others."""
+    fmt, _ = _FORMATS[type_]
+    if type_ == DirectoryType.String:
+        return bytes(view[0:-1]).decode("ascii")
+    if type_ in _RATIONALS:
+        if numpy and count >= NUMPY_THRESHOLD:
+            return _numpy_array(view, fmt, 2 * count).reshape(count, 2)
+        values = _unpack_array(view, fmt, 2 * count)
+        return list(zip(values[0::2], values[1::2]))
+    if numpy and count >= NUMPY_THRESHOLD:
+        return _numpy_array(view, fmt, count)
+    return _unpack_array(view, fmt, count)
+
+
+def iter_entries(rawdata):
+    """Walks through directory entries without copying data.
+
+    Args:
+        rawdata (bytes): IFD data (any object supporting the buffer protocol).
+
+    Yields:
+        tuple: `(tag, type, count, view)` of each entry, where `view` is a memoryview of the value.
+
+    Raises:
+        ValueError: the data are shorter than DataLength, or an entry has an unknown type or
+            a value out of bounds."""
+    view = memoryview(rawdata).cast("B")
+    if len(view) < _HEADER.size:
+        raise ValueError("IFD data are too short: {} bytes".format(len(view)))
+    data_length, directory_count = _HEADER.unpack_from(view, 0)
+    if data_length > len(view):
+        raise ValueError("DataLength {} exceeds the size of data {}".format(data_length, len(view)))
+    # Like a greedy parser, entries beyond the data are ignored.
+    directory_count = min(directory_count, (len(view) - _HEADER.size) // _ENTRY.size)
+    end_of_entries = _HEADER.size + directory_count * _ENTRY.size
+
+    for tag, type_id, count, value in _ENTRY.iter_unpack(view[_HEADER.size:end_of_entries]):
+        type_ = _TYPES.get(type_id)
+        if type_ is None:
+            raise ValueError("Unknown directory type {} of tag {}".format(type_id, tag))
+        n = count * _FORMATS[type_][1]
+        if n <= 4:
+            yield tag, type_, count, memoryview(value)[0:n]
+            continue
+        offset = int.from_bytes(value, byteorder="little", signed=False)
+        if offset + n > len(view):
+            raise ValueError("The value of tag {} ({} bytes at {}) is out of bounds".format(tag, n, offset))
+        yield tag, type_, count, view[offset:offset + n]
+
+
+def decode_entries(rawdata, numpy=False):
+    """Decodes all directory entries.
+
+    Args:
+        rawdata (bytes): IFD data.
+        numpy (bool): see `decode_value`.
+
+    Returns:
+        list: pairs of a tag and a decoded value."""
+    return [(tag, decode_value(type_, view, count, numpy)) for tag, type_, count, view in iter_entries(rawdata)]
+
+
+def _layout(entries):
+    items = []
+    for tag, type_, val in entries:
+        type_ = DirectoryType(type_)
+        fmt, size = _FORMATS[type_]
+        if type_ == DirectoryType.String:
+            values = val.encode("ascii") + b"\x00"
+            count = len(values)
+            fmt = "%ds" % count
+            values = [values]
+        else:
+            if hasattr(val, "tolist"):
+                val = val.tolist()
+            if type_ in _RATIONALS:
+                pairs = val if isinstance(val, list) else [val]
+                count = len(pairs)
+                values = [v for pair in pairs for v in pair]
+            else:
+                values = list(val) if isinstance(val, (list, tuple)) else [val]
+                count = len(values)
+            fmt = "%d%s" % (len(values), fmt)
+        nbytes = count * size
+        items.append((int(tag), type_.value, count, "<" + fmt, values, (nbytes + 3) & ~3))
+    return items
+
+
+def encode_entries(entries):
+    """Encodes directory entries into IFD data.
+
+    The layout of the whole data is computed first, and entries and values are packed into one
+    preallocated buffer, so the cost is linear in the number of entries and the size of values.
+
+    Args:
+        entries (list): triples of a tag (int or IntEnum), a `sigma_ptpy.enum.DirectoryType` and
+            a value. A value is a str for String, a (numerator, denominator) pair or a list of pairs
+            for rationals, and a number or a list (or a NumPy array) of numbers for the others.
+
+    Returns:
+        bytearray: IFD data."""
+    items = _layout(entries)
+    index_size = _HEADER.size + len(items) * _ENTRY.size
+    total = index_size + sum(padded for _, _, _, _, _, padded in items if padded > 4)
+
+    buffer = bytearray(total)
+    _HEADER.pack_into(buffer, 0, total, len(items))
+    position = _HEADER.size
+    offset = index_size
+    for tag, type_id, count, fmt, values, padded in items:
+        if padded <= 4:
+            _ENTRY.pack_into(buffer, position, tag, type_id, count, b"")
+            struct.pack_into(fmt, buffer, position + 8, *values)
+        else:
+            _ENTRY.pack_into(buffer, position, tag, type_id, count, offset.to_bytes(4, byteorder="little"))
+            struct.pack_into(fmt, buffer, offset, *values)
+            offset += padded
+        position += _ENTRY.size
+    return buffer
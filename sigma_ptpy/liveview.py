@@ -0,0 +1,216 @@
+"""Background live view streaming"""
+
+import collections
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def _capture_frame(camera, sequence):
+    started = time.perf_counter()
+    frame = camera.get_view_frame()
+    finished = time.perf_counter()
+
+    frame.SequenceNumber = sequence
+    frame.Timestamp = time.time()
+    frame.Latency = finished - started
+    return frame
+
+
+class LiveViewStats(object):
+    """Statistics of a live view stream.
+
+    Attributes:
+        FramesCaptured (int): the number of frames received from a camera.
+        FramesDelivered (int): the number of frames handed to consumers.
+        FramesDropped (int): the number of frames discarded because consumers fell behind.
+        DeliveredFps (float): the recent rate of delivered frames (frames per second).
+        LatencyLast (float): the USB latency of the latest frame in seconds.
+        LatencyMean (float): the mean USB latency in seconds.
+        LatencyMax (float): the maximum USB latency in seconds."""
+
+    def __init__(self):
+        self.FramesCaptured = 0
+        self.FramesDelivered = 0
+        self.FramesDropped = 0
+        self.DeliveredFps = 0.0
+        self.LatencyLast = None
+        self.LatencyMean = None
+        self.LatencyMax = None
+
+    def __str__(self):
+        return \
+            f"LiveViewStats(FramesCaptured={str(self.FramesCaptured)}, " \
+            f"FramesDelivered={str(self.FramesDelivered)}, FramesDropped={str(self.FramesDropped)}, " \
+            f"DeliveredFps={str(self.DeliveredFps)}, LatencyLast={str(self.LatencyLast)}, " \
+            f"LatencyMean={str(self.LatencyMean)}, LatencyMax={str(self.LatencyMax)})"
+
+
+class LiveViewStream(object):
+    """Runs SigmaGetViewFrame on a dedicated I/O thread and buffers frames for consumers.
+
+    Frames are `sigma_ptpy.schema.ViewFrame` objects extended with the following attributes:
+    `SequenceNumber` (int, starting from 0), `Timestamp` (float, `time.time()` when a frame is
+    received) and `Latency` (float, the duration of the USB transaction in seconds).
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        target_fps (float): the upper bound of the frame rate. None means as fast as possible.
+        max_queue (int): the capacity of the ring buffer between the I/O thread and consumers.
+        policy (str): "drop_oldest" discards the oldest buffered frame when the buffer is full,
+            and "block" pauses the I/O thread until a consumer takes a frame.
+
+    Examples:
+        Usage as follows::
+
+            with camera.live_view(target_fps=30) as stream:
+                for frame in stream:
+                    show(frame.Data)"""
+
+    POLICIES = ("drop_oldest", "block")
+
+    def __init__(self, camera, target_fps=None, max_queue=2, policy="drop_oldest"):
+        if policy not in self.POLICIES:
+            raise ValueError("policy must be one of {}, but {} is given".format(self.POLICIES, policy))
+        if max_queue < 1:
+            raise ValueError("max_queue must be positive")
+        if target_fps is not None and target_fps <= 0:
+            raise ValueError("target_fps must be positive")
+
+        self.camera = camera
+        self.target_fps = target_fps
+        self.max_queue = max_queue
+        self.policy = policy
+
+        self.__frames = collections.deque()
+        self.__cond = threading.Condition()
+        self.__stopped = threading.Event()
+        self.__error = None
+        self.__thread = None
+        self.__stats = LiveViewStats()
+        self.__latency_sum = 0.0
+        self.__deliveries = collections.deque(maxlen=30)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    @property
+    def running(self):
+        """bool: whether the I/O thread is running."""
+        return self.__thread is not None and self.__thread.is_alive()
+
+    @property
+    def stats(self):
+        """LiveViewStats: a snapshot of statistics."""
+        with self.__cond:
+            stats = LiveViewStats()
+            stats.__dict__.update(self.__stats.__dict__)
+            return stats
+
+    def start(self):
+        """Starts the I/O thread."""
+        if self.running:
+            return
+        self.__stopped.clear()
+        self.__thread = threading.Thread(name="LiveView", target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout=2):
+        """Stops the I/O thread and wakes up waiting consumers."""
+        self.__stopped.set()
+        with self.__cond:
+            self.__cond.notify_all()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+
+    def get(self, timeout=None):
+        """Takes the oldest buffered frame.
+
+        Args:
+            timeout (float): seconds to wait for a frame. None means waiting until a frame arrives
+                or the stream stops.
+
+        Returns:
+            sigma_ptpy.schema.ViewFrame: a frame, or None if the stream has stopped or timed out.
+
+        Raises:
+            Exception: an error raised on the I/O thread."""
+        with self.__cond:
+            if not self.__cond.wait_for(lambda: self.__frames or self.__stopped.is_set(), timeout):
+                return None
+            if not self.__frames:
+                if self.__error is not None:
+                    error, self.__error = self.__error, None
+                    raise error
+                return None
+            frame = self.__frames.popleft()
+            self.__deliver()
+            self.__cond.notify_all()
+            return frame
+
+    def __deliver(self):
+        now = time.perf_counter()
+        self.__deliveries.append(now)
+        self.__stats.FramesDelivered += 1
+        if len(self.__deliveries) >= 2:
+            span = self.__deliveries[-1] - self.__deliveries[0]
+            if span > 0:
+                self.__stats.DeliveredFps = (len(self.__deliveries) - 1) / span
+
+    def __put(self, frame):
+        with self.__cond:
+            if self.policy == "block":
+                self.__cond.wait_for(lambda: len(self.__frames) < self.max_queue or self.__stopped.is_set())
+                if self.__stopped.is_set():
+                    return
+            elif len(self.__frames) >= self.max_queue:
+                self.__frames.popleft()
+                self.__stats.FramesDropped += 1
+
+            self.__frames.append(frame)
+            stats = self.__stats
+            stats.FramesCaptured += 1
+            stats.LatencyLast = frame.Latency
+            self.__latency_sum += frame.Latency
+            stats.LatencyMean = self.__latency_sum / stats.FramesCaptured
+            stats.LatencyMax = max(stats.LatencyMax or 0.0, frame.Latency)
+            self.__cond.notify_all()
+
+    def __run(self):
+        interval = 1.0 / self.target_fps if self.target_fps else 0.0
+        sequence = 0
+        logger.debug("Start live view: target_fps={}, max_queue={}, policy={}".format(
+            self.target_fps, self.max_queue, self.policy))
+        try:
+            while not self.__stopped.is_set():
+                started = time.perf_counter()
+                frame = _capture_frame(self.camera, sequence)
+                sequence += 1
+                self.__put(frame)
+
+                rest = interval - (time.perf_counter() - started)
+                if rest > 0:
+                    self.__stopped.wait(rest)
+        except Exception as e:
+            logger.error("Live view stopped: {}".format(e))
+            with self.__cond:
+                self.__error = e
+        finally:
+            self.__stopped.set()
+            with self.__cond:
+                self.__cond.notify_all()
+            logger.debug("Stop live view")
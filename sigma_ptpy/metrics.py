@@ -0,0 +1,247 @@
+"""Per-operation metrics of PTP transactions and a Prometheus exporter"""
+
+import bisect
+import http.server
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""tuple: the default upper bounds of latency buckets in seconds."""
+
+
+class OperationStats(object):
+    """Metrics of an operation.
+
+    Attributes:
+        Calls (int): the number of transactions including failed ones. Each attempt of a retried
+            transaction is counted.
+        Errors (int): the number of failed transactions.
+        BytesIn (int): the number of bytes received from a camera.
+        BytesOut (int): the number of bytes sent to a camera.
+        TransferTime (float): seconds spent on transactions, i.e., waiting on USB.
+        SuccessTime (float): seconds spent on successful transactions, which is the sum of the
+            latency histogram.
+        ErrorTime (float): seconds spent on failed transactions.
+        LockWaitTime (float): seconds spent on waiting for other transactions, which is not
+            included in the times above.
+        DecodeTime (float): seconds spent on decoding responses into schema objects.
+        EncodeTime (float): seconds spent on encoding schema objects.
+        Buckets (list): the number of successful transactions in each latency bucket. The last
+            bucket counts latencies above all bounds."""
+
+    def __init__(self, nbuckets=len(LATENCY_BUCKETS)):
+        self.Calls = 0
+        self.Errors = 0
+        self.BytesIn = 0
+        self.BytesOut = 0
+        self.TransferTime = 0.0
+        self.SuccessTime = 0.0
+        self.ErrorTime = 0.0
+        self.LockWaitTime = 0.0
+        self.DecodeTime = 0.0
+        self.EncodeTime = 0.0
+        self.Buckets = [0] * (nbuckets + 1)
+
+    def __str__(self):
+        return \
+            f"OperationStats(Calls={str(self.Calls)}, Errors={str(self.Errors)}, " \
+            f"BytesIn={str(self.BytesIn)}, BytesOut={str(self.BytesOut)}, " \
+            f"TransferTime={str(self.TransferTime)}, SuccessTime={str(self.SuccessTime)}, " \
+            f"ErrorTime={str(self.ErrorTime)}, LockWaitTime={str(self.LockWaitTime)}, " \
+            f"DecodeTime={str(self.DecodeTime)}, " \
+            f"EncodeTime={str(self.EncodeTime)})"
+
+    @property
+    def LatencyMean(self):
+        """float: the mean duration of transactions in seconds, or None if there are no calls."""
+        return self.TransferTime / self.Calls if self.Calls else None
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class MetricsRegistry(object):
+    """Counters and latency histograms of PTP transactions keyed by operation names.
+
+    `SigmaPTPy` feeds a registry while `enabled` is true. Otherwise, a transaction only reads
+    the flag, so the overhead is negligible.
+
+    Args:
+        enabled (bool): whether metrics are collected.
+        labels (dict): constant labels of exported series such as `{"serial": "91402081"}`, which
+            distinguish cameras scraped together.
+        buckets (tuple): upper bounds of latency buckets in seconds.
+
+    Examples:
+        Export metrics at http://127.0.0.1:9464/metrics as follows::
+
+            camera = SigmaPTPy(metrics=True)
+            server = camera.metrics.serve(port=9464)
+            ...
+            print(camera.metrics.stats()['SigmaGetViewFrame'])
+            server.close()"""
+
+    def __init__(self, enabled=True, labels=None, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.labels = dict(labels or {})
+        self.buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        self.__stats = dict()
+
+    def __get(self, opcode):
+        stats = self.__stats.get(opcode)
+        if stats is None:
+            stats = self.__stats[opcode] = OperationStats(len(self.buckets))
+        return stats
+
+    def observe(self, opcode, elapsed, bytes_in=0, bytes_out=0, error=False, lock_wait=0.0):
+        """Feeds the result of a transaction.
+
+        Args:
+            opcode (str): an operation name such as 'SigmaGetViewFrame'.
+            elapsed (float): the duration of the transaction in seconds.
+            bytes_in (int): the number of received bytes.
+            bytes_out (int): the number of sent bytes.
+            error (bool): whether the transaction has failed.
+            lock_wait (float): the time waiting for other transactions before it in seconds."""
+        index = bisect.bisect_left(self.buckets, elapsed)
+        with self.__lock:
+            stats = self.__get(opcode)
+            stats.Calls += 1
+            stats.TransferTime += elapsed
+            stats.LockWaitTime += lock_wait
+            stats.BytesIn += bytes_in
+            stats.BytesOut += bytes_out
+            if error:
+                stats.Errors += 1
+                stats.ErrorTime += elapsed
+            else:
+                stats.SuccessTime += elapsed
+                stats.Buckets[index] += 1
+
+    def observe_decode(self, opcode, elapsed):
+        """Feeds the time spent on decoding a response of an operation."""
+        with self.__lock:
+            self.__get(opcode).DecodeTime += elapsed
+
+    def observe_encode(self, opcode, elapsed):
+        """Feeds the time spent on encoding data sent by an operation."""
+        with self.__lock:
+            self.__get(opcode).EncodeTime += elapsed
+
+    def stats(self):
+        """Returns a snapshot of metrics.
+
+        Returns:
+            dict: copies of `OperationStats` keyed by operation names."""
+        snapshot = dict()
+        with self.__lock:
+            for opcode, stats in self.__stats.items():
+                copied = OperationStats(len(self.buckets))
+                copied.__dict__.update(stats.__dict__)
+                copied.Buckets = list(stats.Buckets)
+                snapshot[opcode] = copied
+        return snapshot
+
+    def reset(self):
+        """Clears all metrics."""
+        with self.__lock:
+            self.__stats.clear()
+
+    def to_prometheus(self):
+        """Formats metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: metrics of all observed operations."""
+        stats = self.stats()
+
+        def series(name, opcode, value, **extra):
+            labels = dict(self.labels, operation=opcode, **extra)
+            text = ",".join('{}="{}"'.format(k, _escape(v)) for k, v in labels.items())
+            return "{}{{{}}} {}".format(name, text, repr(value))
+
+        lines = []
+        for name, kind, doc, attribute in [
+                ("sigma_ptpy_transactions_total", "counter", "PTP transactions.", "Calls"),
+                ("sigma_ptpy_transaction_errors_total", "counter", "Failed PTP transactions.", "Errors"),
+                ("sigma_ptpy_transaction_error_seconds_total", "counter", "Time spent on failed PTP transactions.",
+                 "ErrorTime"),
+                ("sigma_ptpy_lock_wait_seconds_total", "counter", "Time spent on waiting for other transactions.",
+                 "LockWaitTime"),
+                ("sigma_ptpy_received_bytes_total", "counter", "Bytes received from a camera.", "BytesIn"),
+                ("sigma_ptpy_sent_bytes_total", "counter", "Bytes sent to a camera.", "BytesOut"),
+                ("sigma_ptpy_decode_seconds_total", "counter", "Time spent on decoding responses.", "DecodeTime"),
+                ("sigma_ptpy_encode_seconds_total", "counter", "Time spent on encoding requests.", "EncodeTime")]:
+            lines.append("# HELP {} {}".format(name, doc))
+            lines.append("# TYPE {} {}".format(name, kind))
+            lines.extend(series(name, opcode, getattr(s, attribute)) for opcode, s in sorted(stats.items()))
+
+        name = "sigma_ptpy_transaction_duration_seconds"
+        lines.append("# HELP {} Durations of successful PTP transactions.".format(name))
+        lines.append("# TYPE {} histogram".format(name))
+        for opcode, s in sorted(stats.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), s.Buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(series(name + "_bucket", opcode, cumulative, le=le))
+            lines.append(series(name + "_sum", opcode, s.SuccessTime))
+            lines.append(series(name + "_count", opcode, cumulative))
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Starts an HTTP server exporting metrics at `/metrics` on a daemon thread.
+
+        Args:
+            port (int): a port number (0 chooses a free port).
+            host (str): an address to listen on. Only the local host can scrape by default.
+
+        Returns:
+            MetricsServer: a started server."""
+        return MetricsServer(self, host, port)
+
+
+class MetricsServer(object):
+    """An HTTP server exporting a `MetricsRegistry` in the Prometheus text format.
+
+    Attributes:
+        url (str): the URL of metrics."""
+
+    def __init__(self, registry, host, port):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self.__server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.__server.daemon_threads = True
+        host, port = self.__server.server_address[:2]
+        self.url = "http://{}:{}/metrics".format(host, port)
+        self.__thread = threading.Thread(name="Metrics", target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stops the server."""
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
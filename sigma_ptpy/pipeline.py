@@ -0,0 +1,300 @@
+"""Overlapped capture and download for continuous shooting"""
+
+import collections
+import logging
+import threading
+import time
+from .capture import CaptureTracker
+from .download import download_picture_into
+
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("Buffer", "Capture", "Info", "Download", "Handle", "Clear")
+"""tuple: the stages of a shot.
+
+Buffer is the wait for room in the frame buffer, Capture is from the snap command to the completion of
+image generation, Info is SigmaGetPictFileInfo2 right after the capture, Download is the transfer of the
+file, Handle is the user handler, and Clear is SigmaClearImageDBSingle."""
+
+
+class PipelineShot(object):
+    """A shot processed by a pipeline.
+
+    Attributes:
+        Index (int): the sequence number of the shot starting from 0.
+        ImageId (int): the image ID reported by the camera.
+        ImageDBHead (int): the head of the image database ring when the capture completed.
+        ImageDBTail (int): the tail of the image database ring when the capture completed.
+        Info (sigma_ptpy.schema.PictFileInfo2): information of the downloaded file.
+        Size (int): the number of downloaded bytes.
+        Timings (collections.OrderedDict): the duration of each stage in seconds.
+        Finished (float): `time.perf_counter()` when the image is cleared from the camera."""
+
+    def __init__(self, index, status):
+        self.Index = index
+        self.ImageId = status.ImageId
+        self.ImageDBHead = status.ImageDBHead
+        self.ImageDBTail = status.ImageDBTail
+        self.Info = None
+        self.Size = 0
+        self.Timings = collections.OrderedDict()
+        self.Finished = None
+
+    def __str__(self):
+        timings = ", ".join("{}={:.3f}".format(k, v) for k, v in self.Timings.items())
+        return \
+            f"PipelineShot(Index={str(self.Index)}, ImageId={str(self.ImageId)}, " \
+            f"Size={str(self.Size)}, Timings=({timings}))"
+
+
+class PipelineStats(object):
+    """Statistics of a pipeline run.
+
+    Attributes:
+        Shots (int): the number of shots downloaded and cleared.
+        Bytes (int): the number of downloaded bytes.
+        Elapsed (float): the duration of the run in seconds.
+        ShotsPerMinute (float): shots per minute over the whole run.
+        SustainedShotsPerMinute (float): shots per minute between the first and the last finished
+            shot, which excludes the latency of the first shot.
+        StageTimes (collections.OrderedDict): the total duration of each stage in seconds."""
+
+    def __init__(self):
+        self.Shots = 0
+        self.Bytes = 0
+        self.Elapsed = 0.0
+        self.ShotsPerMinute = 0.0
+        self.SustainedShotsPerMinute = 0.0
+        self.StageTimes = collections.OrderedDict((stage, 0.0) for stage in STAGES)
+
+    def __str__(self):
+        means = ", ".join("{}={:.3f}".format(stage, self.mean(stage)) for stage in STAGES)
+        return \
+            f"PipelineStats(Shots={str(self.Shots)}, Bytes={str(self.Bytes)}, Elapsed={self.Elapsed:.3f}, " \
+            f"ShotsPerMinute={self.ShotsPerMinute:.1f}, " \
+            f"SustainedShotsPerMinute={self.SustainedShotsPerMinute:.1f}, Means=({means}))"
+
+    def mean(self, stage):
+        """Returns the mean duration of a stage.
+
+        Args:
+            stage (str): one of `STAGES`.
+
+        Returns:
+            float: the mean duration in seconds."""
+        return self.StageTimes[stage] / self.Shots if self.Shots else 0.0
+
+
+class CapturePipeline(object):
+    """Shoots continuously while previous images are downloaded on another thread.
+
+    The calling thread triggers shots, and a download thread takes completed images in the order of
+    the image database ring (`ImageDBHead` to `ImageDBTail` of `CamCaptStatus`), downloads them,
+    passes them to `handler`, and clears them by the image IDs reported for the shots. Since
+    SigmaGetPictFileInfo2 describes the latest image only, the file information of a shot is read on
+    the calling thread as soon as the capture completes, before the next snap command. The next shot is triggered when
+    fewer than `max_pending` images are in flight and `CamDataGroup1.FrameBufferState` reports room
+    in the frame buffer. Transactions of both threads are serialized by the camera, so status polls
+    and snap commands are interleaved between download chunks.
+
+    `DestToSave` must be `InComputer` or `Both` so that images can be downloaded.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera.
+        handler (callable): a function receiving `sigma_ptpy.schema.PictFileInfo2` and a bytearray
+            of the file, called on the download thread.
+        max_pending (int): the maximum number of images captured but not cleared yet.
+        chunk_size (int): a fixed transfer size in bytes (optional).
+        timeout (float): the limit of waiting for each capture and for room in the frame buffer
+            in seconds.
+        poll_interval (float): the interval of polling the frame buffer in seconds.
+        tracker (sigma_ptpy.capture.CaptureTracker): a tracker used for shooting (optional).
+
+    Examples:
+        Usage as follows::
+
+            def save(info, data):
+                with open(info.FileName.decode("utf8"), "wb") as fout:
+                    fout.write(data)
+
+            stats = CapturePipeline(camera, save).run(20)
+            print(stats.SustainedShotsPerMinute)"""
+
+    def __init__(self, camera, handler, max_pending=2, chunk_size=None, timeout=10.0, poll_interval=0.05,
+                 tracker=None):
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+        self.camera = camera
+        self.handler = handler
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.tracker = tracker if tracker is not None else CaptureTracker(camera)
+        self.shots = []
+
+        self.__cond = threading.Condition()
+        self.__pending = []
+        self.__inflight = 0
+        self.__head = 0
+        self.__last_address = None
+        self.__done = False
+        self.__error = None
+        self.__stats = PipelineStats()
+
+    @property
+    def stats(self):
+        """PipelineStats: a snapshot of statistics."""
+        with self.__cond:
+            stats = PipelineStats()
+            stats.__dict__.update(self.__stats.__dict__)
+            stats.StageTimes = collections.OrderedDict(self.__stats.StageTimes)
+            return stats
+
+    def run(self, count, command=None):
+        """Shoots `count` pictures and waits until all of them are downloaded.
+
+        Args:
+            count (int): the number of shots.
+            command (sigma_ptpy.schema.SnapCommand): a snap command object.
+
+        Returns:
+            PipelineStats: statistics of the run.
+
+        Raises:
+            Exception: an error raised while shooting or downloading."""
+        with self.__cond:
+            self.__pending = []
+            self.__inflight = 0
+            self.__last_address = None
+            self.__done = False
+            self.__error = None
+            self.__stats = PipelineStats()
+        self.shots = []
+        started = time.perf_counter()
+
+        thread = threading.Thread(name="CaptureDownload", target=self.__drain, daemon=True)
+        thread.start()
+        try:
+            for index in range(count):
+                self.__shoot(index, command)
+        except Exception as e:
+            with self.__cond:
+                if self.__error is None:
+                    self.__error = e
+        finally:
+            with self.__cond:
+                self.__done = True
+                self.__cond.notify_all()
+            thread.join()
+
+        with self.__cond:
+            stats = self.__stats
+            stats.Elapsed = time.perf_counter() - started
+            if stats.Elapsed > 0:
+                stats.ShotsPerMinute = 60.0 * stats.Shots / stats.Elapsed
+            finished = [shot.Finished for shot in self.shots]
+            if len(finished) >= 2 and finished[-1] > finished[0]:
+                stats.SustainedShotsPerMinute = 60.0 * (len(finished) - 1) / (finished[-1] - finished[0])
+            else:
+                stats.SustainedShotsPerMinute = stats.ShotsPerMinute
+            error = self.__error
+        logger.debug(str(stats))
+        if error is not None:
+            raise error
+        return self.stats
+
+    def __ring_position(self, shot):
+        return (shot.ImageId - self.__head) & 0xff
+
+    def __wait_for_room(self):
+        deadline = time.perf_counter() + self.timeout
+        with self.__cond:
+            self.__cond.wait_for(
+                lambda: self.__inflight < self.max_pending or self.__error is not None,
+                max(0.0, deadline - time.perf_counter()))
+            if self.__error is not None:
+                raise self.__error
+            if self.__inflight >= self.max_pending:
+                raise TimeoutError("No image has been downloaded in {} seconds".format(self.timeout))
+
+        while True:
+            frames = self.camera.get_cam_data_group1().FrameBufferState
+            if frames is None or frames > 0:
+                return
+            if time.perf_counter() >= deadline:
+                raise TimeoutError("The frame buffer has been full for {} seconds".format(self.timeout))
+            with self.__cond:
+                if self.__cond.wait_for(lambda: self.__error is not None, self.poll_interval):
+                    raise self.__error
+
+    def __shoot(self, index, command):
+        t0 = time.perf_counter()
+        self.__wait_for_room()
+        t1 = time.perf_counter()
+        self.tracker.snap(command)
+        result = self.tracker.wait(0, timeout=self.timeout)
+        t2 = time.perf_counter()
+        info = self.camera.get_pict_file_info2()
+        t3 = time.perf_counter()
+
+        shot = PipelineShot(index, result.Status)
+        if not info.FileSize or info.FileAddress == self.__last_address:
+            raise IOError("No new file is reported for image {}".format(shot.ImageId))
+        self.__last_address = info.FileAddress
+        shot.Info = info
+        shot.Timings["Buffer"] = t1 - t0
+        shot.Timings["Capture"] = t2 - t1
+        shot.Timings["Info"] = t3 - t2
+        with self.__cond:
+            if shot.ImageDBHead is not None:
+                self.__head = shot.ImageDBHead
+            self.__pending.append(shot)
+            self.__pending.sort(key=self.__ring_position)
+            self.__inflight += 1
+            self.__cond.notify_all()
+
+    def __drain(self):
+        try:
+            while True:
+                with self.__cond:
+                    self.__cond.wait_for(lambda: self.__pending or self.__done or self.__error is not None)
+                    if self.__error is not None or not self.__pending:
+                        return
+                    shot = self.__pending.pop(0)
+                self.__download(shot)
+        except Exception as e:
+            logger.error("Download stopped: {}".format(e))
+            with self.__cond:
+                if self.__error is None:
+                    self.__error = e
+                self.__cond.notify_all()
+
+    def __download(self, shot):
+        info = shot.Info
+        t1 = time.perf_counter()
+        buffer = bytearray(info.FileSize)
+        size = download_picture_into(self.camera, info, buffer, chunk_size=self.chunk_size)
+        t2 = time.perf_counter()
+        self.handler(info, buffer)
+        t3 = time.perf_counter()
+        self.camera.clear_image_db_single(shot.ImageId)
+        t4 = time.perf_counter()
+
+        shot.Size = size
+        shot.Timings["Download"] = t2 - t1
+        shot.Timings["Handle"] = t3 - t2
+        shot.Timings["Clear"] = t4 - t3
+        shot.Finished = t4
+        logger.debug(str(shot))
+
+        with self.__cond:
+            self.shots.append(shot)
+            stats = self.__stats
+            stats.Shots += 1
+            stats.Bytes += size
+            for stage, elapsed in shot.Timings.items():
+                stats.StageTimes[stage] += elapsed
+            self.__inflight -= 1
+            self.__cond.notify_all()
@@ -0,0 +1,217 @@
+"""Multiple cameras with synchronized triggering"""
+
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .schema import SnapCommand
+
+
+logger = logging.getLogger(__name__)
+
+SIGMA_VENDOR_ID = 0x1003
+"""int: the USB vendor ID of SIGMA Corp."""
+
+
+class TriggerResult(object):
+    """Timing of a synchronized trigger.
+
+    Timestamps are values of `time.perf_counter()`, which is shared among threads.
+
+    Attributes:
+        Started (list): the time just before `snap_command` is issued, for each camera.
+        Finished (list): the time when `snap_command` returns, for each camera.
+        Errors (list): an exception raised by each camera, or None.
+        Skew (float): the difference between the earliest and the latest issue time in seconds.
+        SkewStdDev (float): the standard deviation of issue times in seconds.
+        ResponseSkew (float): the difference between the earliest and the latest return time in seconds."""
+
+    def __init__(self, started, finished, errors):
+        self.Started = started
+        self.Finished = finished
+        self.Errors = errors
+        self.Skew = max(started) - min(started)
+        self.SkewStdDev = statistics.pstdev(started)
+        self.ResponseSkew = max(finished) - min(finished)
+
+    def __str__(self):
+        return \
+            f"TriggerResult(Skew={str(self.Skew)}, SkewStdDev={str(self.SkewStdDev)}, " \
+            f"ResponseSkew={str(self.ResponseSkew)}, Errors={str(self.Errors)})"
+
+    @property
+    def Offsets(self):
+        """list: the issue time of each camera relative to the earliest one in seconds."""
+        origin = min(self.Started)
+        return [t - origin for t in self.Started]
+
+    @property
+    def ok(self):
+        """bool: whether all cameras accepted the command."""
+        return all(e is None for e in self.Errors)
+
+
+class _TriggerWorker(threading.Thread):
+    def __init__(self, index, camera, pool):
+        super(_TriggerWorker, self).__init__(name=f"Trigger-{index}", daemon=True)
+        self.index = index
+        self.camera = camera
+        self.pool = pool
+
+    def run(self):
+        pool = self.pool
+        while True:
+            pool._armed.wait()
+            if pool._stopping:
+                return
+            command = pool._command
+            started = time.perf_counter()
+            try:
+                self.camera.snap_command(command)
+                error = None
+            except Exception as e:
+                error = e
+            finished = time.perf_counter()
+            pool._results[self.index] = (started, finished, error)
+            pool._fired.wait()
+
+
+class SigmaCameraPool(object):
+    """A set of SIGMA cameras operated together.
+
+    Args:
+        cameras (list): cameras to be operated. When it is None, every SIGMA camera connected via
+            USB is opened by `factory`.
+        factory (callable): a function creating a camera from a USB device. `SigmaPTPy` is used
+            by default.
+        kwargs: keyword arguments passed to `factory`.
+
+    Examples:
+        Usage as follows::
+
+            from sigma_ptpy.pool import SigmaCameraPool
+
+            with SigmaCameraPool(ignore_events=True) as pool:
+                result = pool.snap()
+                print(result.Skew)"""
+
+    def __init__(self, cameras=None, factory=None, **kwargs):
+        if cameras is None:
+            if factory is None:
+                from .sigma_ptpy import SigmaPTPy
+                factory = SigmaPTPy
+            cameras = [factory(device=device, **kwargs) for device in self.find_devices()]
+        if len(cameras) == 0:
+            raise ValueError("No camera is given")
+
+        self.cameras = list(cameras)
+        self._command = None
+        self._results = [None] * len(self.cameras)
+        self._stopping = False
+        self._armed = threading.Barrier(len(self.cameras) + 1)
+        self._fired = threading.Barrier(len(self.cameras) + 1)
+        self.__workers = None
+        self.__trigger_lock = threading.Lock()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.cameras)
+
+    @staticmethod
+    def find_devices(vendor_id=SIGMA_VENDOR_ID):
+        """Finds all USB PTP devices made by SIGMA.
+
+        Args:
+            vendor_id (int): the USB vendor ID of devices to be found.
+
+        Returns:
+            list: USB device objects."""
+        from ptpy.transports.usb import find_usb_cameras
+        return [dev for dev in find_usb_cameras() if dev.idVendor == vendor_id]
+
+    def map(self, fn):
+        """Calls a function with every camera in parallel.
+
+        Args:
+            fn (callable): a function receiving a camera.
+
+        Returns:
+            list: results of `fn` in the order of cameras."""
+        with ThreadPoolExecutor(max_workers=len(self.cameras)) as executor:
+            return list(executor.map(fn, self.cameras))
+
+    def open(self):
+        """Opens sessions, runs `config_api` on all cameras in parallel, and arms trigger workers.
+
+        Returns:
+            list: sigma_ptpy.schema.ApiConfig objects of cameras."""
+        def setup(camera):
+            camera.open_session()
+            return camera.config_api()
+
+        configs = self.map(setup)
+        self.arm()
+        return configs
+
+    def close(self):
+        """Disarms trigger workers, and closes the application and sessions on all cameras in parallel."""
+        self.disarm()
+
+        def teardown(camera):
+            try:
+                camera.close_application()
+            finally:
+                camera.close_session()
+
+        self.map(teardown)
+
+    def arm(self):
+        """Starts a worker thread per camera that waits for triggers."""
+        if self.__workers is not None:
+            return
+        self._stopping = False
+        self._armed.reset()
+        self._fired.reset()
+        self.__workers = [_TriggerWorker(i, c, self) for i, c in enumerate(self.cameras)]
+        for worker in self.__workers:
+            worker.start()
+
+    def disarm(self):
+        """Stops worker threads."""
+        if self.__workers is None:
+            return
+        with self.__trigger_lock:
+            self._stopping = True
+            self._armed.wait()
+            for worker in self.__workers:
+                worker.join()
+            self.__workers = None
+
+    def snap(self, command=None):
+        """Issues `snap_command` on all cameras at once.
+
+        The command is issued by pre-armed workers released by a barrier, so the skew between
+        cameras is not accumulated by a loop.
+
+        Args:
+            command (sigma_ptpy.schema.SnapCommand): a snap command object.
+
+        Returns:
+            TriggerResult: timing of the trigger."""
+        if self.__workers is None:
+            self.arm()
+        with self.__trigger_lock:
+            self._command = command if command is not None else SnapCommand()
+            self._armed.wait()  # release workers
+            self._fired.wait()  # wait for completion
+            started, finished, errors = zip(*self._results)
+            result = TriggerResult(list(started), list(finished), list(errors))
+        logger.debug(str(result))
+        return result
@@ -1,11 +1,8 @@
 """Schema definitions for the SIGMA fp series"""
 
+import collections
 import struct
-from construct import (
-    Adapter, Bytes, Container, FlagsEnum,
-    Int16ub, Int16ul, Int32ul, Int8un,
-    Pass, Struct, If, String, CString, GreedyBytes, GreedyRange, Mapping
-)
+from . import ifd
 from .enum import (
     DirectoryType,
     ProgramShift, ISOAuto, ABSetting, DriveMode, SpecialMode,
@@ -21,42 +18,347 @@ from .enum import (
 )
 
 
-class _FixedPointValue(Adapter):
-    def __init__(self, subcon, fraction_bit):
-        super(_FixedPointValue, self).__init__(subcon)
+class _FixedPoint(object):
+    """Unsigned fixed-point numbers with `fraction_bit` fractional bits."""
+
+    def __init__(self, fraction_bit):
         self.fraction_bit = fraction_bit
         self.__mask = (1 << fraction_bit) - 1
 
-    def _encode(self, obj, context):
-        a = int(obj) << self.fraction_bit
-        b = int(obj * (self.__mask + 1)) & self.__mask
-        return a | b
+    def decode(self, raw):
+        return (raw >> self.fraction_bit) + float(raw & self.__mask) / (self.__mask + 1)
+
+    def encode(self, value):
+        return (int(value) << self.fraction_bit) | (int(value * (self.__mask + 1)) & self.__mask)
 
-    def _decode(self, obj, context):
-        a = obj >> self.fraction_bit
-        b = float(obj & self.__mask) / (self.__mask + 1)
-        return a + b
 
+def _construct_schema(flags, fields):
+    # construct is imported here since it takes long to import.
+    from construct import Adapter, FlagsEnum, If, Int16ub, Int16ul, Int8un, Mapping, Pass, Struct
 
-def _Enum(subcon, enum_class):
-    return Mapping(
-        subcon,
-        dict((e.value, e) for e in enum_class),
-        dict((e, e.value) for e in enum_class),
-        decdefault=Pass, encdefault=Pass)
+    class FixedPointValue(Adapter):
+        def __init__(self, subcon, fixed_point):
+            super(FixedPointValue, self).__init__(subcon)
+            self.fixed_point = fixed_point
 
+        def _encode(self, obj, context):
+            return self.fixed_point.encode(obj)
 
-def _IfDefined(key, subcon):
-    return If(lambda x: key in x.FieldPresent and x.FieldPresent[key], subcon)
+        def _decode(self, obj, context):
+            return self.fixed_point.decode(obj)
 
+    def if_defined(key, subcon):
+        return If(lambda x: key in x.FieldPresent and x.FieldPresent[key], subcon)
+
+    subcons = []
+    for field in fields:
+        subcon = {'B': Int8un, 'H': Int16ul}[field.fmt]
+        if isinstance(field.kind, _FixedPoint):
+            subcon = FixedPointValue(subcon, field.kind)
+        elif field.kind is not None:
+            subcon = Mapping(
+                subcon,
+                dict((e.value, e) for e in field.kind),
+                dict((e, e.value) for e in field.kind),
+                decdefault=Pass, encdefault=Pass)
+        subcons.append(field.name / if_defined(field.key, subcon))
+    return Struct(
+        '_Header' / Int8un,  # arbitrary value for parity
+        'FieldPresent' / FlagsEnum(Int16ub, **flags),
+        *subcons,
+        '_Parity' / Int8un)
 
-class _StandardSchema(object):
-    def _decode(self, Schema, rawdata):
-        container = Schema.parse(rawdata)
-        for name, existence in container.FieldPresent.items():
-            if name in self.__dict__:
-                self.__dict__[name] = container[name] if existence else None
-        return container
+
+class _CodecField(object):
+    __slots__ = ('name', 'fmt', 'kind', 'key', 'decode', 'encode')
+
+    def __init__(self, name, fmt, kind=None, key=None):
+        self.name = name
+        self.fmt = fmt
+        self.kind = kind
+        self.key = key if key is not None else name
+        if kind is None:
+            self.decode = None
+            self.encode = None
+        elif isinstance(kind, _FixedPoint):
+            self.decode = kind.decode
+            self.encode = kind.encode
+        else:
+            table = dict((e.value, e) for e in kind)  # unknown values are passed through as int.
+            self.decode = lambda raw: table.get(raw, raw)
+            self.encode = int
+
+
+_FieldPresentHeader = struct.Struct(">BH")
+_Scalars = dict((fmt, struct.Struct("<" + fmt)) for fmt in "BHI")
+
+
+class _FieldPresentCodec(object):
+    """Codec of a data group whose fields are selected by a FieldPresent bitmask.
+
+    Data consist of a 1-byte header, a big-endian 16-bit FieldPresent bitmask, fields whose bits
+    are set in the order of `fields`, and a 1-byte parity. For each bitmask, a `struct.Struct`
+    covering all present fields is compiled on first use, so decoding is one `unpack_from` call.
+
+    Args:
+        flags (tuple): pairs of a flag name and its bit in FieldPresent.
+        fields (tuple): `(name, format[, kind[, key]])` of each field in order, where `format` is
+            a `struct` format character, `kind` is an IntEnum class or a `_FixedPoint`, and `key`
+            is the flag name enabling the field (the field name by default)."""
+
+    def __init__(self, flags, fields):
+        self.flags = collections.OrderedDict(flags)
+        self.fields = tuple(_CodecField(*field) for field in fields)
+        self.names = tuple(field.name for field in self.fields)
+        self.attributes = tuple(name for name in self.names if not name.startswith('_'))
+        self.__layouts = dict()
+        self.__positions = dict()
+        self.__schema = None
+
+    def layout(self, mask):
+        """Returns a `struct.Struct` and fields present in a FieldPresent bitmask."""
+        layout = self.__layouts.get(mask)
+        if layout is None:
+            present = tuple(field for field in self.fields if mask & self.flags.get(field.key, 0))
+            layout = (struct.Struct("<" + "".join(field.fmt for field in present)), present)
+            self.__layouts[mask] = layout
+        return layout
+
+    def positions(self, mask):
+        """Returns `(offset, struct.Struct, decoder)` of each field present in a FieldPresent bitmask."""
+        positions = self.__positions.get(mask)
+        if positions is None:
+            positions = dict()
+            offset = _FieldPresentHeader.size
+            for field in self.layout(mask)[1]:
+                scalar = _Scalars[field.fmt]
+                positions[field.name] = (offset, scalar, field.decode)
+                offset += scalar.size
+            self.__positions[mask] = positions
+        return positions
+
+    def check(self, rawdata):
+        """Returns the FieldPresent bitmask of data after checking their length."""
+        if len(rawdata) < _FieldPresentHeader.size:
+            raise ValueError("Data are too short: {} bytes".format(len(rawdata)))
+        _, mask = _FieldPresentHeader.unpack_from(rawdata, 0)
+        if len(rawdata) < _FieldPresentHeader.size + self.layout(mask)[0].size + 1:
+            raise ValueError("Data are too short: {} bytes".format(len(rawdata)))
+        return mask
+
+    def decode_field(self, rawdata, name):
+        """Decodes one field of data checked by `check` (None if absent)."""
+        _, mask = _FieldPresentHeader.unpack_from(rawdata, 0)
+        position = self.positions(mask).get(name)
+        if position is None:
+            return None
+        offset, scalar, decode = position
+        raw = scalar.unpack_from(rawdata, offset)[0]
+        return raw if decode is None else decode(raw)
+
+    def decode(self, rawdata):
+        """Decodes data into a dict of all field names and values (None if absent)."""
+        layout, present = self.layout(self.check(rawdata))
+        values = dict.fromkeys(self.names)
+        for field, raw in zip(present, layout.unpack_from(rawdata, _FieldPresentHeader.size)):
+            values[field.name] = raw if field.decode is None else field.decode(raw)
+        return values
+
+    def encode(self, obj, names):
+        """Encodes attributes `names` of an object.
+
+        A flag is set when any field enabled by it has a value. The other fields enabled by the
+        same flag are encoded as 0."""
+        values = dict((name, getattr(obj, name)) for name in names)
+        mask = 0
+        for field in self.fields:
+            if values.get(field.name) is not None:
+                mask |= self.flags.get(field.key, 0)
+
+        layout, present = self.layout(mask)
+        raws = []
+        for field in present:
+            value = values.get(field.name)
+            if value is None:
+                raws.append(0)
+            else:
+                raws.append(value if field.encode is None else field.encode(value))
+        return _FieldPresentHeader.pack(0, mask) + layout.pack(*raws) + b"\x00"
+
+    @property
+    def schema(self):
+        """construct.Struct: the equivalent construct schema, which is slow but kept as a reference."""
+        if self.__schema is None:
+            self.__schema = _construct_schema(self.flags, self.fields)
+        return self.__schema
+
+    def decode_construct(self, rawdata):
+        """Decodes data with `schema` in the same form as `decode`."""
+        container = self.schema.parse(rawdata)
+        values = dict.fromkeys(self.names)
+        for field in self.fields:
+            if container.FieldPresent.get(field.key):
+                values[field.name] = container[field.name]
+        return values
+
+    def encode_construct(self, obj, names):
+        """Encodes attributes of an object with `schema` in the same way as `encode`."""
+        from construct import Container
+        values = dict((field.name, None) for field in self.fields)
+        present = dict((key, False) for key in self.flags)
+        for name in names:
+            values[name] = getattr(obj, name)
+        for field in self.fields:
+            if values[field.name] is not None and field.key in present:
+                present[field.key] = True
+        for field in self.fields:
+            if present.get(field.key) and values[field.name] is None:
+                values[field.name] = 0
+        return self.schema.build(Container(FieldPresent=Container(**present), _Header=0, _Parity=0, **values))
+
+
+def _comparable(value):
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if isinstance(value, list):
+        return tuple(_comparable(v) for v in value)
+    return value
+
+
+class _LazySchema(object):
+    """Base of schema objects which keep a response and decode each field on first access.
+
+    Fields are slots listed in `_Fields`. `decode` checks and keeps a response, and `_field` decodes
+    a field when it is read first. Objects are equal when all fields are equal. Two objects whose
+    fields have not been assigned since `decode` are compared by their responses without decoding,
+    so they are equal when the responses are identical."""
+    __slots__ = ('_raw', '_modified')
+    _Fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super(_LazySchema, cls).__init_subclass__(**kwargs)
+        cls._Slots = tuple((name, getattr(cls, name)) for name in cls._Fields)
+        cls._SlotMap = dict(cls._Slots)
+
+    def __getattr__(self, name):
+        slot = self._SlotMap.get(name)
+        if slot is None:
+            raise AttributeError(name)
+        value = self._field(name)
+        slot.__set__(self, value)
+        return value
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._SlotMap:
+            object.__setattr__(self, '_modified', True)
+
+    def __getstate__(self):
+        # Unlike getattr, slot descriptors do not decode fields.
+        state = dict()
+        for klass in type(self).__mro__:
+            for name in klass.__dict__.get('__slots__', ()):
+                try:
+                    state[name] = klass.__dict__[name].__get__(self)
+                except AttributeError:
+                    pass
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        if self is other:
+            return True
+        raw, other_raw = self.__unmodified_raw(), other.__unmodified_raw()
+        if raw is not None and other_raw is not None:
+            return raw == other_raw
+        return self.__key() == other.__key()
+
+    def __hash__(self):
+        # Hashing decodes all fields. Objects must not be modified once they are hashed.
+        return hash(self.__key())
+
+    def __key(self):
+        return tuple(_comparable(value) for value in self.as_dict().values())
+
+    def __unmodified_raw(self):
+        try:
+            return None if self._modified else self._raw
+        except AttributeError:
+            return None
+
+    def _keep(self, rawdata):
+        for name in self._Fields:
+            try:
+                delattr(self, name)
+            except AttributeError:
+                pass
+        object.__setattr__(self, '_raw', rawdata if isinstance(rawdata, bytes) else bytes(rawdata))
+        object.__setattr__(self, '_modified', False)
+
+    def _field(self, name):
+        raise NotImplementedError()
+
+    def _fields(self):
+        return dict((name, self._field(name)) for name in self._Fields)
+
+    def as_dict(self):
+        """Returns all fields.
+
+        Returns:
+            collections.OrderedDict: field names and values."""
+        # Fields not read yet are decoded at once, and the others are kept as they may be modified.
+        values = None
+        fields = collections.OrderedDict()
+        for name, slot in self._Slots:
+            try:
+                value = slot.__get__(self)
+            except AttributeError:
+                if values is None:
+                    values = self._fields()
+                value = values[name]
+                slot.__set__(self, value)
+            fields[name] = value
+        return fields
+
+    def diff(self, other):
+        """Compares fields with another object of the same class.
+
+        Args:
+            other (object): an object of the same class.
+
+        Returns:
+            collections.OrderedDict: `(value of self, value of other)` of each field with different values."""
+        if type(other) is not type(self):
+            raise TypeError("Cannot compare {} with {}".format(type(self).__name__, type(other).__name__))
+        diff = collections.OrderedDict()
+        for (name, mine), theirs in zip(self.as_dict().items(), other.as_dict().values()):
+            if _comparable(mine) != _comparable(theirs):
+                diff[name] = (mine, theirs)
+        return diff
+
+
+class _StandardSchema(_LazySchema):
+    __slots__ = ()
+    _Codec = None
+    _Settable = ()
+
+    def decode(self, rawdata):
+        self._Codec.check(rawdata)
+        self._keep(rawdata)
+
+    def _field(self, name):
+        return self._Codec.decode_field(self._raw, name)
+
+    def _fields(self):
+        return self._Codec.decode(self._raw)
+
+    def encode(self):
+        return self._Codec.encode(self, self._Settable)
 
 
 class CamDataGroup1(_StandardSchema):
@@ -83,44 +385,45 @@ class CamDataGroup1(_StandardSchema):
         ABShotRemainNumber (int): The remaining number of auto bracket shooting
         ExpCompExcludeAB (int)"""
 
-    __FieldPresent = FlagsEnum(
-        Int16ub,
-        ABSetting=0x8000,
-        ABValue=0x4000,
-        ExpComp=0x2000,
-        ISOSpeed=0x1000,
-        ISOAuto=0x800,
-        ProgramShift=0x400,
-        Aperture=0x200,
-        ShutterSpeed=0x100,
-        _Reserved0=0x80,
-        ExpCompExcludeAB=0x40,
-        ABShotRemainNumber=0x20,
-        BatteryState=0x10,
-        CurrentLensFocalLength=0x8,
-        MediaStatus=0x4,
-        MediaFreeSpace=0x2,
-        FrameBufferState=0x1)
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'FieldPresent' / __FieldPresent,
-        'ShutterSpeed' / _IfDefined('ShutterSpeed', Int8un),
-        'Aperture' / _IfDefined('Aperture', Int8un),
-        'ProgramShift' / _IfDefined('ProgramShift', _Enum(Int8un, ProgramShift)),
-        'ISOAuto' / _IfDefined('ISOAuto', _Enum(Int8un, ISOAuto)),
-        'ISOSpeed' / _IfDefined('ISOSpeed', Int8un),
-        'ExpComp' / _IfDefined('ExpComp', Int8un),
-        'ABValue' / _IfDefined('ABValue', Int8un),
-        'ABSetting' / _IfDefined('ABSetting', _Enum(Int8un, ABSetting)),
-        'FrameBufferState' / _IfDefined('FrameBufferState', Int8un),
-        'MediaFreeSpace' / _IfDefined('MediaFreeSpace', Int16ul),
-        'MediaStatus' / _IfDefined('MediaStatus', Int8un),
-        'CurrentLensFocalLength' / _IfDefined('CurrentLensFocalLength', _FixedPointValue(Int16ul, 4)),
-        'BatteryState' / _IfDefined('BatteryState', Int8un),
-        'ABShotRemainNumber' / _IfDefined('ABShotRemainNumber', Int8un),
-        'ExpCompExcludeAB' / _IfDefined('ExpCompExcludeAB', Int8un),
-        '_Reserved0' / _IfDefined('_Reserved0', Int8un),
-        '_Parity' / Int8un)
+    _Codec = _FieldPresentCodec(
+        flags=(
+            ('ABSetting', 0x8000),
+            ('ABValue', 0x4000),
+            ('ExpComp', 0x2000),
+            ('ISOSpeed', 0x1000),
+            ('ISOAuto', 0x800),
+            ('ProgramShift', 0x400),
+            ('Aperture', 0x200),
+            ('ShutterSpeed', 0x100),
+            ('_Reserved0', 0x80),
+            ('ExpCompExcludeAB', 0x40),
+            ('ABShotRemainNumber', 0x20),
+            ('BatteryState', 0x10),
+            ('CurrentLensFocalLength', 0x8),
+            ('MediaStatus', 0x4),
+            ('MediaFreeSpace', 0x2),
+            ('FrameBufferState', 0x1),
+        ),
+        fields=(
+            ('ShutterSpeed', 'B'),
+            ('Aperture', 'B'),
+            ('ProgramShift', 'B', ProgramShift),
+            ('ISOAuto', 'B', ISOAuto),
+            ('ISOSpeed', 'B'),
+            ('ExpComp', 'B'),
+            ('ABValue', 'B'),
+            ('ABSetting', 'B', ABSetting),
+            ('FrameBufferState', 'B'),
+            ('MediaFreeSpace', 'H'),
+            ('MediaStatus', 'B'),
+            ('CurrentLensFocalLength', 'H', _FixedPoint(4)),
+            ('BatteryState', 'B'),
+            ('ABShotRemainNumber', 'B'),
+            ('ExpCompExcludeAB', 'B'),
+            ('_Reserved0', 'B'),
+        ))
+    __slots__ = _Fields = _Codec.attributes
+    _Settable = ('ShutterSpeed', 'Aperture', 'ProgramShift', 'ISOAuto', 'ISOSpeed', 'ExpComp', 'ABValue', 'ABSetting')
 
     def __init__(self, ShutterSpeed=None, Aperture=None, ProgramShift=None, ISOAuto=None,
                  ISOSpeed=None, ExpComp=None, ABValue=None, ABSetting=None):
@@ -150,29 +453,6 @@ class CamDataGroup1(_StandardSchema):
             f"MediaStatus={str(self.MediaStatus)}, BatteryState={str(self.BatteryState)}," \
             f"ABShotRemainNumber={str(self.ABShotRemainNumber)}, ExpCompExcludeAB={str(self.ExpCompExcludeAB)})"
 
-    def encode(self):
-        return self.__Schema.build(Container(
-            FieldPresent=Container(
-                ShutterSpeed=self.ShutterSpeed is not None,
-                Aperture=self.Aperture is not None,
-                ProgramShift=self.ProgramShift is not None,
-                ISOAuto=self.ISOAuto is not None,
-                ISOSpeed=self.ISOSpeed is not None,
-                ExpComp=self.ExpComp is not None,
-                ABValue=self.ABValue is not None,
-                ABSetting=self.ABSetting is not None,
-                CurrentLensFocalLength=False, FrameBufferState=False, MediaFreeSpace=False, MediaStatus=False,
-                BatteryState=False, ABShotRemainNumber=False, ExpCompExcludeAB=False, _Reserved0=False),
-            _Header=0, _Parity=0,
-            ShutterSpeed=self.ShutterSpeed, Aperture=self.Aperture, ProgramShift=self.ProgramShift,
-            ISOAuto=self.ISOAuto, ISOSpeed=self.ISOSpeed, ExpComp=self.ExpComp,
-            ABValue=self.ABValue, ABSetting=self.ABSetting, CurrentLensFocalLength=None,
-            FrameBufferState=None, MediaFreeSpace=None, MediaStatus=None,
-            BatteryState=None, ABShotRemainNumber=None, ExpCompExcludeAB=None, _Reserved0=None))
-
-    def decode(self, rawdata):
-        self._decode(self.__Schema, rawdata)
-
 
 class CamDataGroup2(_StandardSchema):
     """DataGroup2 status information.
@@ -188,44 +468,46 @@ class CamDataGroup2(_StandardSchema):
         WhiteBalance (sigma_ptpy.enum.WhiteBalance): White balance
         Resolution (sigma_ptpy.enum.Resolution): Resolition
         ImageQuality (sigma_ptpy.enum.ImageQuality): JPEG or DNG"""
-    __FieldPresent = FlagsEnum(
-        Int16ub,
-        _Reserved3=0x8000,
-        _Reserved2=0x4000,
-        _Reserved1=0x2000,
-        _Reserved0=0x1000,
-        AEMeteringMode=0x800,
-        ExposureMode=0x400,
-        SpecialMode=0x200,
-        DriveMode=0x100,
-        ImageQuality=0x80,
-        Resolution=0x40,
-        WhiteBalance=0x20,
-        _Reserved5=0x10,
-        FlashSetting=0x8,
-        FlashMode=0x4,
-        _Reserved4=0x2,
-        FlashType=0x1)
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'FieldPresent' / __FieldPresent,
-        'DriveMode' / _IfDefined('DriveMode', _Enum(Int8un, DriveMode)),
-        'SpecialMode' / _IfDefined('SpecialMode', _Enum(Int8un, SpecialMode)),
-        'ExposureMode' / _IfDefined('ExposureMode', _Enum(Int8un, ExposureMode)),
-        'AEMeteringMode' / _IfDefined('AEMeteringMode', _Enum(Int8un, AEMeteringMode)),
-        '_Reserved0' / _IfDefined('_Reserved0', Int8un),
-        '_Reserved1' / _IfDefined('_Reserved1', Int8un),
-        '_Reserved2' / _IfDefined('_Reserved2', Int8un),
-        '_Reserved3' / _IfDefined('_Reserved3', Int8un),
-        'FlashType' / _IfDefined('FlashType', _Enum(Int8un, FlashType)),
-        '_Reserved4' / _IfDefined('_Reserved4', Int8un),
-        'FlashMode' / _IfDefined('FlashMode', _Enum(Int8un, FlashMode)),
-        'FlashSetting' / _IfDefined('FlashSetting', _Enum(Int8un, FlashSetting)),
-        '_Reserved5' / _IfDefined('_Reserved5', Int8un),
-        'WhiteBalance' / _IfDefined('WhiteBalance', _Enum(Int8un, WhiteBalance)),
-        'Resolution' / _IfDefined('Resolution', _Enum(Int8un, Resolution)),
-        'ImageQuality' / _IfDefined('ImageQuality', _Enum(Int8un, ImageQuality)),
-        '_Parity' / Int8un)
+    _Codec = _FieldPresentCodec(
+        flags=(
+            ('_Reserved3', 0x8000),
+            ('_Reserved2', 0x4000),
+            ('_Reserved1', 0x2000),
+            ('_Reserved0', 0x1000),
+            ('AEMeteringMode', 0x800),
+            ('ExposureMode', 0x400),
+            ('SpecialMode', 0x200),
+            ('DriveMode', 0x100),
+            ('ImageQuality', 0x80),
+            ('Resolution', 0x40),
+            ('WhiteBalance', 0x20),
+            ('_Reserved5', 0x10),
+            ('FlashSetting', 0x8),
+            ('FlashMode', 0x4),
+            ('_Reserved4', 0x2),
+            ('FlashType', 0x1),
+        ),
+        fields=(
+            ('DriveMode', 'B', DriveMode),
+            ('SpecialMode', 'B', SpecialMode),
+            ('ExposureMode', 'B', ExposureMode),
+            ('AEMeteringMode', 'B', AEMeteringMode),
+            ('_Reserved0', 'B'),
+            ('_Reserved1', 'B'),
+            ('_Reserved2', 'B'),
+            ('_Reserved3', 'B'),
+            ('FlashType', 'B', FlashType),
+            ('_Reserved4', 'B'),
+            ('FlashMode', 'B', FlashMode),
+            ('FlashSetting', 'B', FlashSetting),
+            ('_Reserved5', 'B'),
+            ('WhiteBalance', 'B', WhiteBalance),
+            ('Resolution', 'B', Resolution),
+            ('ImageQuality', 'B', ImageQuality),
+        ))
+    __slots__ = _Fields = _Codec.attributes
+    _Settable = ('DriveMode', 'SpecialMode', 'ExposureMode', 'AEMeteringMode', 'FlashMode', 'FlashSetting',
+                 'WhiteBalance', 'Resolution', 'ImageQuality')
 
     def __init__(self, DriveMode=None, SpecialMode=None, ExposureMode=None, AEMeteringMode=None,
                  FlashMode=None, FlashSetting=None, WhiteBalance=None,
@@ -249,30 +531,6 @@ class CamDataGroup2(_StandardSchema):
             f"FlashSetting={str(self.FlashSetting)} WhiteBalance={str(self.WhiteBalance)}, " \
             f"Resolution={str(self.Resolution)}, ImageQuality={str(self.ImageQuality)})"
 
-    def encode(self):
-        return self.__Schema.build(Container(
-            FieldPresent=Container(
-                DriveMode=self.DriveMode is not None,
-                SpecialMode=self.SpecialMode is not None,
-                ExposureMode=self.ExposureMode is not None,
-                AEMeteringMode=self.AEMeteringMode is not None,
-                FlashMode=self.FlashMode is not None,
-                FlashSetting=self.FlashSetting is not None,
-                WhiteBalance=self.WhiteBalance is not None,
-                Resolution=self.Resolution is not None,
-                ImageQuality=self.ImageQuality is not None,
-                FlashType=False, _Reserved0=False, _Reserved1=False, _Reserved2=False,
-                _Reserved3=False, _Reserved4=False, _Reserved5=False),
-            _Header=0, _Parity=0,
-            DriveMode=self.DriveMode, SpecialMode=self.SpecialMode, ExposureMode=self.ExposureMode,
-            AEMeteringMode=self.AEMeteringMode, FlashType=None, FlashMode=self.FlashMode,
-            FlashSetting=self.FlashSetting, WhiteBalance=self.WhiteBalance, Resolution=self.Resolution,
-            ImageQuality=self.ImageQuality, _Reserved0=None, _Reserved1=None, _Reserved2=None,
-            _Reserved3=None, _Reserved4=None, _Reserved5=None))
-
-    def decode(self, rawdata):
-        self._decode(self.__Schema, rawdata)
-
 
 class CamDataGroup3(_StandardSchema):
     """DataGroup3 status information.
@@ -287,44 +545,45 @@ class CamDataGroup3(_StandardSchema):
         AFBeep (int): AF beep sound
         TimerSound (int): Timer sound
         DestToSave (sigma_ptpy.enum.DestToSave): Destination to save pictures"""
-    __FieldPresent = FlagsEnum(
-        Int16ub,
-        LensTeleFocalLength=0x8000,
-        LensWideFocalLength=0x4000,
-        BatteryKind=0x2000,
-        ColorMode=0x1000,
-        ColorSpace=0x800,
-        _Reserved2=0x400,
-        _Reserved1=0x200,
-        _Reserved0=0x100,
-        DestToSave=0x80,
-        _Reserved6=0x40,
-        TimerSound=0x20,
-        _Reserved5=0x10,
-        _Reserved4=0x8,
-        _Reserved3=0x4,
-        AFBeep=0x2,
-        AFAuxLight=0x1)
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'FieldPresent' / __FieldPresent,
-        '_Reserved0' / _IfDefined('_Reserved0', Int8un),
-        '_Reserved1' / _IfDefined('_Reserved1', Int8un),
-        '_Reserved2' / _IfDefined('_Reserved2', Int8un),
-        'ColorSpace' / _IfDefined('ColorSpace', _Enum(Int8un, ColorSpace)),
-        'ColorMode' / _IfDefined('ColorMode', _Enum(Int8un, ColorMode)),
-        'BatteryKind' / _IfDefined('BatteryKind', _Enum(Int8un, BatteryKind)),
-        'LensWideFocalLength' / _IfDefined('LensWideFocalLength', _FixedPointValue(Int16ul, 4)),
-        'LensTeleFocalLength' / _IfDefined('LensTeleFocalLength', _FixedPointValue(Int16ul, 4)),
-        'AFAuxLight' / _IfDefined('AFAuxLight', _Enum(Int8un, AFAuxLight)),
-        'AFBeep' / _IfDefined('AFBeep', Int8un),
-        '_Reserved3' / _IfDefined('_Reserved3', Int8un),
-        '_Reserved4' / _IfDefined('_Reserved4', Int8un),
-        '_Reserved5' / _IfDefined('_Reserved5', Int8un),
-        'TimerSound' / _IfDefined('TimerSound', Int8un),
-        '_Reserved6' / _IfDefined('_Reserved6', Int8un),
-        'DestToSave' / _IfDefined('DestToSave', _Enum(Int8un, DestToSave)),
-        '_Parity' / Int8un)
+    _Codec = _FieldPresentCodec(
+        flags=(
+            ('LensTeleFocalLength', 0x8000),
+            ('LensWideFocalLength', 0x4000),
+            ('BatteryKind', 0x2000),
+            ('ColorMode', 0x1000),
+            ('ColorSpace', 0x800),
+            ('_Reserved2', 0x400),
+            ('_Reserved1', 0x200),
+            ('_Reserved0', 0x100),
+            ('DestToSave', 0x80),
+            ('_Reserved6', 0x40),
+            ('TimerSound', 0x20),
+            ('_Reserved5', 0x10),
+            ('_Reserved4', 0x8),
+            ('_Reserved3', 0x4),
+            ('AFBeep', 0x2),
+            ('AFAuxLight', 0x1),
+        ),
+        fields=(
+            ('_Reserved0', 'B'),
+            ('_Reserved1', 'B'),
+            ('_Reserved2', 'B'),
+            ('ColorSpace', 'B', ColorSpace),
+            ('ColorMode', 'B', ColorMode),
+            ('BatteryKind', 'B', BatteryKind),
+            ('LensWideFocalLength', 'H', _FixedPoint(4)),
+            ('LensTeleFocalLength', 'H', _FixedPoint(4)),
+            ('AFAuxLight', 'B', AFAuxLight),
+            ('AFBeep', 'B'),
+            ('_Reserved3', 'B'),
+            ('_Reserved4', 'B'),
+            ('_Reserved5', 'B'),
+            ('TimerSound', 'B'),
+            ('_Reserved6', 'B'),
+            ('DestToSave', 'B', DestToSave),
+        ))
+    __slots__ = _Fields = _Codec.attributes
+    _Settable = ('ColorSpace', 'ColorMode', 'AFAuxLight', 'AFBeep', 'TimerSound', 'DestToSave')
 
     def __init__(self, ColorSpace=None, ColorMode=None, AFAuxLight=None,
                  AFBeep=None, TimerSound=None, DestToSave=None):
@@ -346,27 +605,6 @@ class CamDataGroup3(_StandardSchema):
             f"LensWideFocalLength={str(self.LensWideFocalLength)}, " \
             f"LensTeleFocalLength={str(self.LensTeleFocalLength)})"
 
-    def encode(self):
-        return self.__Schema.build(Container(
-            FieldPresent=Container(
-                ColorSpace=self.ColorSpace is not None,
-                ColorMode=self.ColorMode is not None,
-                AFAuxLight=self.AFAuxLight is not None,
-                AFBeep=self.AFBeep is not None,
-                TimerSound=self.TimerSound is not None,
-                DestToSave=self.DestToSave is not None,
-                BatteryKind=False, LensWideFocalLength=False, LensTeleFocalLength=False, _Reserved0=False,
-                _Reserved1=False, _Reserved2=False, _Reserved3=False, _Reserved4=False, _Reserved5=False,
-                _Reserved6=False),
-            _Header=0, _Parity=0,
-            ColorSpace=self.ColorSpace, ColorMode=self.ColorMode, AFAuxLight=self.AFAuxLight,
-            AFBeep=self.AFBeep, TimerSound=self.TimerSound, DestToSave=self.DestToSave,
-            BatteryKind=None, LensWideFocalLength=None, LensTeleFocalLength=None, _Reserved0=None,
-            _Reserved1=None, _Reserved2=None, _Reserved3=None, _Reserved4=None, _Reserved5=None, _Reserved6=None))
-
-    def decode(self, rawdata):
-        self._decode(self.__Schema, rawdata)
-
 
 class CamDataGroup4(_StandardSchema):
     """DataGroup4 status information.
@@ -397,49 +635,52 @@ class CamDataGroup4(_StandardSchema):
             camera or application operation until the time you exit the menu.
         EImageStab (sigma_ptpy.enum.EImageStab): Setting value of Electronic Image Stabilization
         ShutterSound (sigma_ptpy.enum.ShutterSound): Shutter sound / Recording start/stop sound"""
-    __FieldPresent = FlagsEnum(
-        Int16ub,
-        ContShootSpeed=0x8000,
-        HighISOExt=0x4000,
-        LVMagnifyRatio=0x2000,
-        DCCropMode=0x1000,
-        _Reserved3=0x800,
-        _Reserved2=0x400,
-        _Reserved1=0x200,
-        _Reserved0=0x100,
-        _Reserved5=0x80,
-        _Reserved6=0x40,
-        ShutterSound=0x20,
-        EImageStab=0x10,
-        LOC=0x8,
-        FillLight=0x4,
-        DNGQuality=0x2,
-        HDR=0x1)
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'FieldPresent' / __FieldPresent,
-        '_Reserved0' / _IfDefined('_Reserved0', Int8un),
-        '_Reserved1' / _IfDefined('_Reserved1', Int8un),
-        '_Reserved2' / _IfDefined('_Reserved2', Int8un),
-        '_Reserved3' / _IfDefined('_Reserved3', Int8un),
-        'DCCropMode' / _IfDefined('DCCropMode', _Enum(Int8un, DCCropMode)),
-        'LVMagnifyRatio' / _IfDefined('LVMagnifyRatio', _Enum(Int8un, LVMagnifyRatio)),
-        'HighISOExt' / _IfDefined('HighISOExt', _Enum(Int8un, HighISOExt)),
-        'ContShootSpeed' / _IfDefined('ContShootSpeed', _Enum(Int8un, ContShootSpeed)),
-        'HDR' / _IfDefined('HDR', _Enum(Int8un, HDR)),
-        'DNGQuality' / _IfDefined('DNGQuality', _Enum(Int8un, DNGQuality)),
-        'FillLight' / _IfDefined('FillLight', Int8un),
-        'LOCDistortion' / _IfDefined('LOC', _Enum(Int8un, LOCDistortion)),
-        'LOCChromaticAberration' / _IfDefined('LOC', _Enum(Int8un, LOCChromaticAberration)),
-        'LOCDiffraction' / _IfDefined('LOC', _Enum(Int8un, LOCDiffraction)),
-        'LOCVignetting' / _IfDefined('LOC', _Enum(Int8un, LOCVignetting)),
-        'LOCColorShade' / _IfDefined('LOC', _Enum(Int8un, LOCColorShade)),
-        'LOCColorShadeAcq' / _IfDefined('LOC', _Enum(Int8un, LOCColorShadeAcq)),
-        'EImageStab' / _IfDefined('EImageStab', _Enum(Int8un, EImageStab)),
-        'ShutterSound' / _IfDefined('ShutterSound', Int8un),
-        '_Reserved4' / _IfDefined('_Reserved4', Int8un),
-        '_Reserved5' / _IfDefined('_Reserved5', Int8un),
-        '_Parity' / Int8un)
+    _Codec = _FieldPresentCodec(
+        flags=(
+            ('ContShootSpeed', 0x8000),
+            ('HighISOExt', 0x4000),
+            ('LVMagnifyRatio', 0x2000),
+            ('DCCropMode', 0x1000),
+            ('_Reserved3', 0x800),
+            ('_Reserved2', 0x400),
+            ('_Reserved1', 0x200),
+            ('_Reserved0', 0x100),
+            ('_Reserved5', 0x80),
+            ('_Reserved6', 0x40),
+            ('ShutterSound', 0x20),
+            ('EImageStab', 0x10),
+            ('LOC', 0x8),
+            ('FillLight', 0x4),
+            ('DNGQuality', 0x2),
+            ('HDR', 0x1),
+        ),
+        fields=(
+            ('_Reserved0', 'B'),
+            ('_Reserved1', 'B'),
+            ('_Reserved2', 'B'),
+            ('_Reserved3', 'B'),
+            ('DCCropMode', 'B', DCCropMode),
+            ('LVMagnifyRatio', 'B', LVMagnifyRatio),
+            ('HighISOExt', 'B', HighISOExt),
+            ('ContShootSpeed', 'B', ContShootSpeed),
+            ('HDR', 'B', HDR),
+            ('DNGQuality', 'B', DNGQuality),
+            ('FillLight', 'B'),
+            ('LOCDistortion', 'B', LOCDistortion, 'LOC'),
+            ('LOCChromaticAberration', 'B', LOCChromaticAberration, 'LOC'),
+            ('LOCDiffraction', 'B', LOCDiffraction, 'LOC'),
+            ('LOCVignetting', 'B', LOCVignetting, 'LOC'),
+            ('LOCColorShade', 'B', LOCColorShade, 'LOC'),
+            ('LOCColorShadeAcq', 'B', LOCColorShadeAcq, 'LOC'),
+            ('EImageStab', 'B', EImageStab),
+            ('ShutterSound', 'B'),
+            ('_Reserved4', 'B'),
+            ('_Reserved5', 'B'),
+        ))
+    __slots__ = _Fields = _Codec.attributes
+    _Settable = ('DCCropMode', 'LVMagnifyRatio', 'HighISOExt', 'ContShootSpeed', 'HDR', 'DNGQuality', 'FillLight',
+                 'LOCDistortion', 'LOCChromaticAberration', 'LOCDiffraction', 'LOCVignetting', 'LOCColorShade',
+                 'LOCColorShadeAcq', 'EImageStab', 'ShutterSound')
 
     def __init__(self, DCCropMode=None, LVMagnifyRatio=None, HighISOExt=None,
                  ContShootSpeed=None, HDR=None, DNGQuality=None, FillLight=None,
@@ -472,41 +713,6 @@ class CamDataGroup4(_StandardSchema):
             f"LOCColorShade={str(self.LOCColorShade)}, LOCColorShadeAcq={str(self.LOCColorShadeAcq)}, " \
             f"EImageStab={str(self.EImageStab)}, ShutterSound={str(self.ShutterSound)})"
 
-    def encode(self):
-        LOC = LOCDistortion is not None or LOCChromaticAberration is not None or LOCDiffraction is not None \
-            or LOCVignetting is not None or LOCColorShade is not None or LOCColorShadeAcq is not None
-        return self.__Schema.build(Container(
-            FieldPresent=Container(
-                DCCropMode=(self.DCCropMode is not None),
-                LVMagnifyRatio=(self.LVMagnifyRatio is not None),
-                HighISOExt=(self.HighISOExt is not None),
-                ContShootSpeed=(self.ContShootSpeed is not None),
-                HDR=(self.HDR is not None),
-                DNGQuality=(self.DNGQuality is not None),
-                FillLight=(self.FillLight is not None),
-                EImageStab=(self.EImageStab is not None),
-                ShutterSound=(self.ShutterSound is not None),
-                LOC=LOC, _Reserved0=False, _Reserved1=False, _Reserved2=False,
-                _Reserved3=False, _Reserved4=False, _Reserved5=False),
-            _Header=0, _Parity=0,
-            DCCropMode=self.DCCropMode, LVMagnifyRatio=self.LVMagnifyRatio, HighISOExt=self.HighISOExt,
-            ContShootSpeed=self.ContShootSpeed, HDR=self.HDR, DNGQuality=self.DNGQuality,
-            FillLight=self.FillLight, EImageStab=self.EImageStab, ShutterSound=self.ShutterSound,
-            LOCDistortion=self.LOCDistortion or 0, LOCChromaticAberration=self.LOCChromaticAberration or 0,
-            LOCDiffraction=self.LOCDiffraction or 0, LOCVignetting=self.LOCVignetting or 0,
-            LOCColorShade=self.LOCColorShade or 0, LOCColorShadeAcq=self.LOCColorShadeAcq or 0,
-            _Reserved0=None, _Reserved1=None, _Reserved2=None, _Reserved3=None, _Reserved4=None, _Reserved5=None))
-
-    def decode(self, rawdata):
-        container = self._decode(self.__Schema, rawdata)
-        if container.FieldPresent.LOC:
-            self.LOCDistortion = container.LOCDistortion
-            self.LOCChromaticAberration = container.LOCChromaticAberration
-            self.LOCDiffraction = container.LOCDiffraction
-            self.LOCVignetting = container.LOCVignetting
-            self.LOCColorShade = container.LOCColorShade
-            self.LOCColorShadeAcq = container.LOCColorShadeAcq
-
 
 class CamDataGroup5(_StandardSchema):
     """DataGroup5 status information.
@@ -522,47 +728,48 @@ class CamDataGroup5(_StandardSchema):
         AspectRatio (sigma_ptpy.enum.AspectRatio): Aspect Ratio setting value.
         ToneEffect (sigma_ptpy.enum.ToneEffect): Tone setting value in Monochrome mode.
         AFAuxLightEF (sigma_ptpy.enum.AFAuxLightEF): Auxiliary light activation setting for external flash."""
-    __FieldPresent = FlagsEnum(
-        Int16ub,
-        _Reserved3=0x8000,
-        _Reserved2=0x4000,
-        ToneEffect=0x2000,
-        _Reservec1=0x1000,
-        AspectRatio=0x800,
-        _Reserved0=0x400,
-        ColorTemp=0x200,
-        IntervalTimer=0x100,
-        AFAuxLightEF=0x80,
-        _Reserved10=0x40,
-        _Reserved9=0x20,
-        _Reserved8=0x10,
-        _Reserved7=0x8,
-        _Reserved6=0x4,
-        _Reserved5=0x2,
-        _Reserved4=0x1)
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'FieldPresent' / __FieldPresent,
-        'IntervalTimerSecond' / _IfDefined('IntervalTimer', Int16ul),
-        'IntervalTimerFrame' / _IfDefined('IntervalTimer', Int8un),
-        'IntervalTimerSecondRemain' / _IfDefined('IntervalTimer', Int16ul),
-        'IntervalTimerFrameRemain' / _IfDefined('IntervalTimer', Int8un),
-        'ColorTemp' / _IfDefined('ColorTemp', Int16ul),
-        '_Reserved0' / _IfDefined('_Reserved0', Int8un),
-        '_Reserved1' / _IfDefined('_Reserved1', Int8un),
-        'AspectRatio' / _IfDefined('AspectRatio', _Enum(Int8un, AspectRatio)),
-        '_Reserved2' / _IfDefined('_Reserved2', Int8un),
-        'ToneEffect' / _IfDefined('ToneEffect', _Enum(Int8un, ToneEffect)),
-        '_Reserved3' / _IfDefined('_Reserved3', Int8un),
-        '_Reserved4' / _IfDefined('_Reserved4', Int8un),
-        '_Reserved5' / _IfDefined('_Reserved5', Int8un),
-        '_Reserved6' / _IfDefined('_Reserved6', Int8un),
-        '_Reserved7' / _IfDefined('_Reserved7', Int8un),
-        '_Reserved8' / _IfDefined('_Reserved8', Int8un),
-        '_Reserved9' / _IfDefined('_Reserved9', Int8un),
-        '_Reserved10' / _IfDefined('_Reserved10', Int8un),
-        'AFAuxLightEF' / _IfDefined('AFAuxLightEF', _Enum(Int8un, AFAuxLightEF)),
-        '_Parity' / Int8un)
+    _Codec = _FieldPresentCodec(
+        flags=(
+            ('_Reserved3', 0x8000),
+            ('_Reserved2', 0x4000),
+            ('ToneEffect', 0x2000),
+            ('_Reserved1', 0x1000),
+            ('AspectRatio', 0x800),
+            ('_Reserved0', 0x400),
+            ('ColorTemp', 0x200),
+            ('IntervalTimer', 0x100),
+            ('AFAuxLightEF', 0x80),
+            ('_Reserved10', 0x40),
+            ('_Reserved9', 0x20),
+            ('_Reserved8', 0x10),
+            ('_Reserved7', 0x8),
+            ('_Reserved6', 0x4),
+            ('_Reserved5', 0x2),
+            ('_Reserved4', 0x1),
+        ),
+        fields=(
+            ('IntervalTimerSecond', 'H', None, 'IntervalTimer'),
+            ('IntervalTimerFrame', 'B', None, 'IntervalTimer'),
+            ('IntervalTimerSecondRemain', 'H', None, 'IntervalTimer'),
+            ('IntervalTimerFrameRemain', 'B', None, 'IntervalTimer'),
+            ('ColorTemp', 'H'),
+            ('_Reserved0', 'B'),
+            ('_Reserved1', 'B'),
+            ('AspectRatio', 'B', AspectRatio),
+            ('_Reserved2', 'B'),
+            ('ToneEffect', 'B', ToneEffect),
+            ('_Reserved3', 'B'),
+            ('_Reserved4', 'B'),
+            ('_Reserved5', 'B'),
+            ('_Reserved6', 'B'),
+            ('_Reserved7', 'B'),
+            ('_Reserved8', 'B'),
+            ('_Reserved9', 'B'),
+            ('_Reserved10', 'B'),
+            ('AFAuxLightEF', 'B', AFAuxLightEF),
+        ))
+    __slots__ = _Fields = _Codec.attributes
+    _Settable = ('IntervalTimerSecond', 'IntervalTimerFrame', 'ColorTemp', 'AspectRatio', 'ToneEffect', 'AFAuxLightEF')
 
     def __init__(self, IntervalTimerSecond=None, IntervalTimerFrame=None,
                  ColorTemp=None, AspectRatio=None, ToneEffect=None, AFAuxLightEF=None):
@@ -587,43 +794,15 @@ class CamDataGroup5(_StandardSchema):
     def encode(self):
         if (self.IntervalTimerSecond is not None) != (self.IntervalTimerFrame is not None):
             raise ValueError("Both of IntervalTimerSecond and IntervalTimerFrame must be specified.")
-        return self.__Schema.build(Container(
-            FieldPresent=Container(
-                IntervalTimer=self.IntervalTimerSecond is not None,
-                ColorTemp=self.ColorTemp is not None,
-                AspectRatio=self.AspectRatio is not None,
-                ToneEffect=self.ToneEffect is not None,
-                AFAuxLightEF=self.AFAuxLightEF is not None,
-                IntervalTimerSecondRemain=False, IntervalTimerFrameRemain=False,
-                _Reserved0=False, _Reserved1=False, _Reserved2=False, _Reserved3=False,
-                _Reserved4=False, _Reserved5=False, _Reserved6=False, _Reserved7=False,
-                _Reserved8=False, _Reserved9=False, _Reserved10=False),
-            _Header=0, _Parity=0,
-            IntervalTimerSecond=self.IntervalTimerSecond, IntervalTimerFrame=self.IntervalTimerFrame,
-            ColorTemp=self.ColorTemp, AspectRatio=self.AspectRatio, ToneEffect=self.ToneEffect,
-            AFAuxLightEF=self.AFAuxLightEF, IntervalTimerSecondRemain=0,
-            IntervalTimerFrameRemain=0, _Reserved0=None, _Reserved1=None, _Reserved2=None, _Reserved3=None,
-            _Reserved4=None, _Reserved5=None, _Reserved6=None, _Reserved7=None, _Reserved8=None,
-            _Reserved9=None, _Reserved10=None))
-
-    def decode(self, rawdata):
-        container = self._decode(self.__Schema, rawdata)
-        if container.FieldPresent.IntervalTimer:
-            self.IntervalTimerSecond = container.IntervalTimerSecond
-            self.IntervalTimerFrame = container.IntervalTimerFrame
-            self.IntervalTimerSecondRemain = container.IntervalTimerSecondRemain
-            self.IntervalTimerFrameRemain = container.IntervalTimerFrameRemain
+        return super(CamDataGroup5, self).encode()
 
 
-class CamCaptStatus(object):
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'ImageId' / Int8un,
-        'ImageDBHead' / Int8un,
-        'ImageDBTail' / Int8un,
-        'CaptStatus' / _Enum(Int16ul, CaptStatus),
-        'DestToSave' / _Enum(Int8un, DestToSave),
-        '_Parity' / Int8un)
+class CamCaptStatus(_LazySchema):
+    __slots__ = _Fields = ('ImageId', 'ImageDBHead', 'ImageDBTail', 'CaptStatus', 'DestToSave')
+    # _Header (arbitrary value for parity), fields, and _Parity
+    __Layout = struct.Struct("<xBBBHBx")
+    __Decoders = (None, None, None, _CodecField('CaptStatus', 'H', CaptStatus).decode,
+                  _CodecField('DestToSave', 'B', DestToSave).decode)
 
     def __init__(self):
         self.ImageId = None
@@ -639,44 +818,41 @@ class CamCaptStatus(object):
             f"DestToSave={str(self.DestToSave)})"
 
     def decode(self, rawdata):
-        container = self.__Schema.parse(rawdata)
-        self.ImageId = container.ImageId
-        self.ImageDBHead = container.ImageDBHead
-        self.ImageDBTail = container.ImageDBTail
-        self.CaptStatus = container.CaptStatus
-        self.DestToSave = container.DestToSave
+        if len(rawdata) < self.__Layout.size:
+            raise ValueError("Data are too short: {} bytes".format(len(rawdata)))
+        self._keep(rawdata)
+
+    def _field(self, name):
+        index = self._Fields.index(name)
+        raw = self.__Layout.unpack_from(self._raw)[index]
+        decode = self.__Decoders[index]
+        return raw if decode is None else decode(raw)
+
+    def _fields(self):
+        raws = self.__Layout.unpack_from(self._raw)
+        return dict(
+            (name, raw if decode is None else decode(raw))
+            for name, raw, decode in zip(self._Fields, raws, self.__Decoders))
 
 
 class SnapCommand(object):
-    __Schema = Struct(
-        '_Header' / Int8un,  # arbitrary value for parity
-        'CaptureMode' / _Enum(Int8un, CaptureMode),
-        'CaptureAmount' / Int8un,
-        '_Parity' / Int8un)
+    # _Header (arbitrary value for parity), CaptureMode, CaptureAmount and _Parity
+    __Layout = struct.Struct("<BBBB")
 
     def __init__(self, CaptureMode=CaptureMode.GeneralCapt, CaptureAmount=1):
         self.CaptureMode = CaptureMode
         self.CaptureAmount = CaptureAmount
 
     def encode(self):
-        return self.__Schema.build(Container(
-            _Header=0, _Parity=0,
-            CaptureMode=self.CaptureMode, CaptureAmount=self.CaptureAmount))
-
-
-class PictFileInfo2(object):
-    __Schema = Struct(
-        '_Unknown0' / Bytes(12),  # ?
-        'FileAddress' / Int32ul,
-        'FileSize' / Int32ul,
-        'PathNameOffset' / Int32ul,
-        'FileNameOffset' / Int32ul,
-        'PictureFormat' / String(4),
-        'SizeX' / Int16ul,
-        'SizeY' / Int16ul,
-        'PathName' / CString(),
-        'FileName' / CString(),
-        '_Unknown1' / Bytes(2))  # ?
+        return self.__Layout.pack(0, int(self.CaptureMode), self.CaptureAmount, 0)
+
+
+class PictFileInfo2(_LazySchema):
+    __slots__ = _Fields = ('FileAddress', 'FileSize', 'PictureFormat', 'SizeX', 'SizeY', 'PathName', 'FileName')
+    # _Unknown0 (12 bytes), FileAddress, FileSize, PathNameOffset, FileNameOffset, PictureFormat, SizeX and SizeY,
+    # followed by null-terminated PathName and FileName, and _Unknown1 (2 bytes).
+    __Header = struct.Struct("<12xIIII4sHH")
+    __Indices = {'FileAddress': 0, 'FileSize': 1, 'PictureFormat': 4, 'SizeX': 5, 'SizeY': 6}
 
     def __str__(self):
         return \
@@ -685,14 +861,25 @@ class PictFileInfo2(object):
             f"PathName={str(self.PathName)}, FileName={str(self.FileName)})"
 
     def decode(self, rawdata):
-        container = self.__Schema.parse(rawdata)
-        self.FileAddress = container.FileAddress
-        self.FileSize = container.FileSize
-        self.PictureFormat = container.PictureFormat
-        self.SizeX = container.SizeX
-        self.SizeY = container.SizeY
-        self.PathName = container.PathName
-        self.FileName = container.FileName
+        rawdata = bytes(rawdata)
+        size = self.__Header.size
+        path_end = rawdata.find(b"\x00", size)
+        file_end = rawdata.find(b"\x00", path_end + 1) if path_end >= 0 else -1
+        if file_end < 0 or len(rawdata) < file_end + 3:
+            raise ValueError("Data are too short: {} bytes".format(len(rawdata)))
+        self._keep(rawdata)
+
+    def _field(self, name):
+        raw = self._raw
+        if name in self.__Indices:
+            value = self.__Header.unpack_from(raw)[self.__Indices[name]]
+            return value.rstrip(b"\x00") if name == 'PictureFormat' else value
+        start = self.__Header.size
+        end = raw.find(b"\x00", start)
+        if name == 'FileName':
+            start = end + 1
+            end = raw.find(b"\x00", start)
+        return raw[start:end]
 
 
 class BigPartialPictFile(object):
@@ -701,14 +888,34 @@ class BigPartialPictFile(object):
     Attributes:
         AcquiredSize (int): the number of bytes in PartialData.
         PartialData (bytes): partial data of a picture file (JPEG encoded)."""
-    __Schema = Struct(
-        'AcquiredSize' / Int32ul,
-        'PartialData' / GreedyBytes)
 
     def decode(self, rawdata):
-        container = self.__Schema.parse(rawdata)
-        self.AcquiredSize = container.AcquiredSize
-        self.PartialData = container.PartialData
+        if len(rawdata) < 4:
+            raise ValueError("Data are too short: {} bytes".format(len(rawdata)))
+        self.AcquiredSize = struct.unpack_from("<I", rawdata)[0]
+        self.PartialData = bytes(rawdata[4:])
+
+    def decode_into(self, rawdata, buffer):
+        """Decodes a response and copies PartialData into a writable buffer.
+
+        The AcquiredSize header is skipped by offset, so PartialData is copied only once.
+
+        Args:
+            rawdata (bytes): a response from a camera.
+            buffer (memoryview): a writable buffer.
+
+        Returns:
+            int: the number of bytes written into `buffer`."""
+        view = memoryview(rawdata)
+        size = struct.unpack_from("<I", view)[0]
+        size = min(size, view.nbytes - 4)
+        buffer = memoryview(buffer)
+        if size > buffer.nbytes:
+            raise ValueError("{} bytes are acquired, but the buffer has only {} bytes".format(size, buffer.nbytes))
+        buffer[:size] = view[4:4 + size]
+        self.AcquiredSize = size
+        self.PartialData = buffer[:size]
+        return size
 
 
 class ViewFrame(object):
@@ -716,153 +923,21 @@ class ViewFrame(object):
 
     Attributes:
         Data (bytes): data of a picture (JPEG encoded)."""
-    __Schema = Struct(
-        '_Unknown0' / Bytes(10),  # ?
-        'Data' / GreedyBytes)
 
     def decode(self, rawdata):
-        container = self.__Schema.parse(rawdata)
-        self.Data = container.Data
-
-
-def _decode_int_array(b, size, signed):
-    return [int.from_bytes(b[i:i + size], byteorder="little", signed=signed) for i in range(0, len(b), size)]
-
-
-def _decode_float_array(b, size, fmt):
-    count = int(len(b) / size)
-    return list(struct.unpack("<" + fmt * count, b))
-
-
-def _decode_rational_array(b, signed):
-    return [(int.from_bytes(b[i:i + 4], byteorder="little", signed=signed),
-             int.from_bytes(b[i + 4:i + 8], byteorder="little", signed=signed)) for i in range(0, len(b), 8)]
-
-
-def _encode_rational(v, signed=None):
-    return \
-        v[0].to_bytes(4, byteorder="little", signed=signed) \
-        + v[1].to_bytes(4, byteorder="little", signed=signed)
-
-
-_sizes = {
-    DirectoryType.UInt8: 1,
-    DirectoryType.Any8: 1,
-    DirectoryType.Int8: 1,
-    DirectoryType.UInt16: 2,
-    DirectoryType.Int16: 2,
-    DirectoryType.UInt32: 4,
-    DirectoryType.Int32: 4,
-    DirectoryType.Float32: 4,
-    DirectoryType.Float64: 8,
-    DirectoryType.URational: 8,
-    DirectoryType.Rational: 8,
-    DirectoryType.String: 1,
-}
-
-_decoders = {
-    DirectoryType.UInt8: lambda b: _decode_int_array(b, 1, False),
-    DirectoryType.Any8: lambda b: _decode_int_array(b, 1, False),
-    DirectoryType.Int8: lambda b: _decode_int_array(b, 1, True),
-    DirectoryType.UInt16: lambda b: _decode_int_array(b, 2, False),
-    DirectoryType.Int16: lambda b: _decode_int_array(b, 2, True),
-    DirectoryType.UInt32: lambda b: _decode_int_array(b, 4, False),
-    DirectoryType.Int32: lambda b: _decode_int_array(b, 4, True),
-    DirectoryType.Float32: lambda b: _decode_float_array(b, 4, "f"),
-    DirectoryType.Float64: lambda b: _decode_float_array(b, 8, "d"),
-    DirectoryType.URational: lambda b: _decode_rational_array(b, False),
-    DirectoryType.Rational: lambda b: _decode_rational_array(b, True),
-    DirectoryType.String: lambda b: b[0:-1].decode("ascii"),
-}
-
-_encoders = {
-    DirectoryType.UInt8: lambda v: v.to_bytes(1, byteorder="little", signed=False),
-    DirectoryType.Any8: lambda v: v.to_bytes(1, byteorder="little", signed=False),
-    DirectoryType.Int8: lambda v: v.to_bytes(1, byteorder="little", signed=True),
-    DirectoryType.UInt16: lambda v: v.to_bytes(2, byteorder="little", signed=False),
-    DirectoryType.Int16: lambda v: v.to_bytes(2, byteorder="little", signed=True),
-    DirectoryType.UInt32: lambda v: v.to_bytes(4, byteorder="little", signed=False),
-    DirectoryType.Int32: lambda v: v.to_bytes(4, byteorder="little", signed=True),
-    DirectoryType.Float32: lambda v: struct.pack("<f", v),
-    DirectoryType.Float64: lambda v: struct.pack("<d", v),
-    DirectoryType.URational: lambda v: _encode_rational(v, signed=False),
-    DirectoryType.Rational: lambda v: _encode_rational(v, signed=True),
-    DirectoryType.String: lambda v: v.encode("ascii") + b"\x00"
-}
-
-_DirectoryEntry = Struct(
-    'Tag' / Int16ul,  # Tag. Defines the individual ID for each instruction.
-    'Type' / _Enum(Int16ul, DirectoryType),  # Directory type
-    'Count' / Int32ul,  # the number of elements included in the directory entry
-    'Value' / Bytes(4)
-    # Offset to value. If data fits in 4 bytes, enter the value; otherwise, enter the offset from
-    # the reference position. (The data length position is used as the reference position.)
-)
-
-_DirectoryEntryArray = Struct(
-    'DataLength' / Int32ul,
-    'DirectoryCount' / Int32ul,
-    'Entries' / GreedyRange(_DirectoryEntry)
-)
+        if len(rawdata) < 10:  # _Unknown0 (10 bytes)
+            raise ValueError("Data are too short: {} bytes".format(len(rawdata)))
+        self.Data = bytes(rawdata[10:])
 
 
 class _DirectoryEntrySchema(object):
-    def _decode(self, rawdata):
-        dirarray = _DirectoryEntryArray.parse(rawdata)
-        real_directory_count = min(len(dirarray.Entries), dirarray.DirectoryCount)
-
-        pairs = list()
-        for entry in dirarray.Entries[0:real_directory_count]:
-            size = _sizes[entry.Type]
-            n = entry.Count * size
-            if n <= 4:
-                payload = entry.Value[0:n]
-            else:
-                i = int.from_bytes(entry.Value, byteorder="little", signed=False)
-                payload = rawdata[i:i + n]
+    __slots__ = ()
 
-            val = _decoders[entry.Type](payload)
-            pairs.append((entry.Tag, val))
-
-        return pairs
+    def _decode(self, rawdata, numpy=False):
+        return ifd.decode_entries(rawdata, numpy=numpy)
 
     def _encode(self, triples):
-        header_size = 8
-        index_section_size = header_size + len(triples) * _DirectoryEntry.sizeof()
-        index_section = []
-        data_section = b""
-
-        for tag, type_, val in triples:
-            # Converts a tag from EnumClass to int
-            if type(tag) is not int:
-                tag = tag.value
-            # Converts a value into bytes
-            if type(val) is list:
-                count = len(val)
-                payload = b"".join(map(_encoders[type_], val))
-            elif type(val) is str:
-                payload = _encoders[type_](val)
-                count = len(payload)
-            else:
-                count = 1
-                payload = _encoders[type_](val)
-            # Adds a padding for 4-byte alignment
-            if len(payload) % 4 != 0:
-                payload += b"\x00" * (4 - len(payload) % 4)
-            # Appends a new index into index_section
-            if len(payload) <= 4:
-                index_section.append(Container(Tag=tag, Type=type_.value, Count=count, Value=payload))
-            else:
-                offset = (index_section_size + len(data_section)).to_bytes(4, byteorder="little", signed=False)
-                data_section += payload
-                index_section.append(Container(Tag=tag, Type=type_.value, Count=count, Value=offset))
-
-        array = Container(
-            DataLength=index_section_size + len(data_section),
-            DirectoryCount=len(index_section),
-            Entries=index_section,
-        )
-        return _DirectoryEntryArray.build(array) + data_section
+        return bytes(ifd.encode_entries(triples))
 
 
 class ApiConfig(_DirectoryEntrySchema):
@@ -897,7 +972,11 @@ class ApiConfig(_DirectoryEntrySchema):
                 self.CommunicationVersion = val[0]
 
 
-class CamDataGroupFocus(_DirectoryEntrySchema):
+def _first(f):
+    return lambda val: f(val[0])
+
+
+class CamDataGroupFocus(_LazySchema, _DirectoryEntrySchema):
     """Focus-related information.
 
     Attributes:
@@ -921,6 +1000,23 @@ class CamDataGroupFocus(_DirectoryEntrySchema):
         PreConstAF (sigma_ptpy.enum.PreConstAF): For a still image, specify the Pre-AF setting value.
             For a movie, specify the Constant AF setting value.
         FocusLimit (sigma_ptpy.enum.FocusLimit): Focus limit setting value."""
+    _Fields = (
+        'FocusMode', 'AFLock', 'FaceEyeAF', 'FaceEyeAFStatus', 'FocusArea', 'OnePointSelection',
+        'DMFSize', 'DMFPos', 'DMFDetection', 'PreConstAF', 'FocusLimit')
+    __slots__ = _Fields + ('_numpy',)
+    __Tags = {
+        'FocusMode': (1, _first(FocusMode)),
+        'AFLock': (2, _first(AFLock)),
+        'FaceEyeAF': (3, _first(FaceEyeAF)),
+        'FaceEyeAFStatus': (4, _first(FaceEyeAFStatus)),
+        'FocusArea': (10, _first(FocusArea)),
+        'OnePointSelection': (11, _first(OnePointSelection)),
+        'DMFSize': (12, _first(int)),
+        'DMFPos': (13, None),
+        'DMFDetection': (14, None),
+        'PreConstAF': (51, _first(PreConstAF)),
+        'FocusLimit': (52, _first(FocusLimit)),
+    }
 
     def __init__(self, FocusMode=None, AFLock=None, FaceEyeAF=None, FocusArea=None,
                  OnePointSelection=None, DMFSize=None, DMFPos=None,
@@ -955,16 +1051,14 @@ class CamDataGroupFocus(_DirectoryEntrySchema):
             data.append((2, DirectoryType.UInt8, self.AFLock.value))
         if self.FaceEyeAF is not None:
             data.append((3, DirectoryType.UInt8, self.FaceEyeAF.value))
-        if self.FocusArea is not None:
-            data.append((10, DirectoryType.UInt8, self.FaceEyFocusAreaeAF.value))
         if self.FocusArea is not None:
             data.append((10, DirectoryType.UInt8, self.FocusArea.value))
         if self.OnePointSelection is not None:
             data.append((11, DirectoryType.UInt8, self.OnePointSelection.value))
         if self.DMFSize is not None:
-            data.append((12, DirectoryType.UInt8, self.DMFSize.value))
+            data.append((12, DirectoryType.UInt8, int(self.DMFSize)))
         if self.DMFPos is not None:
-            data.append((13, DirectoryType.UInt8, self.DMFPos.value))
+            data.append((13, DirectoryType.UInt16, [int(v) for v in self.DMFPos]))
         if self.PreConstAF is not None:
             data.append((51, DirectoryType.UInt8, self.PreConstAF.value))
         if self.FocusLimit is not None:
@@ -972,30 +1066,24 @@ class CamDataGroupFocus(_DirectoryEntrySchema):
 
         return self._encode(data)
 
-    def decode(self, rawdata):
-        for tag, val in self._decode(rawdata):
-            if tag == 1:
-                self.FocusMode = FocusMode(val[0])
-            elif tag == 2:
-                self.AFLock = AFLock(val[0])
-            elif tag == 3:
-                self.FaceEyeAF = FaceEyeAF(val[0])
-            elif tag == 4:
-                self.FaceEyeAFStatus = FaceEyeAFStatus(val[0])
-            elif tag == 10:
-                self.FocusArea = FocusArea(val[0])
-            elif tag == 11:
-                self.OnePointSelection = OnePointSelection(val[0])
-            elif tag == 12:
-                self.DMFSize = val[0]
-            elif tag == 13:
-                self.DMFPos = val
-            elif tag == 14:
-                self.DMFDetection = val
-            elif tag == 51:
-                self.PreConstAF = PreConstAF(val[0])
-            elif tag == 52:
-                self.FocusLimit = FocusLimit(val[0])
+    def decode(self, rawdata, numpy=False):
+        """Decodes data from a camera.
+
+        Args:
+            rawdata (bytes): IFD data.
+            numpy (bool): whether long arrays such as DMFDetection are decoded into NumPy arrays."""
+        for _ in ifd.iter_entries(rawdata):
+            pass  # checks all entries
+        self._keep(rawdata)
+        self._numpy = numpy
+
+    def _field(self, name):
+        tag, conv = self.__Tags[name]
+        for t, type_, count, view in ifd.iter_entries(self._raw):
+            if t == tag:
+                val = ifd.decode_value(type_, view, count, self._numpy)
+                return val if conv is None else conv(val)
+        return None
 
 
 def _map_list(f):
@@ -1008,179 +1096,222 @@ def _bool(x):
     return x == [1]
 
 
+def _lookup(table):
+    def g(lst):
+        return [table.get(x, x) for x in lst]
+    return g
+
+
+_CAN_SET_INFO5_FIELDS = (
+    (1, "DriveMode", _map_list(lambda x: DriveMode.IntervalTimer if x == 5 else DriveMode(x))),
+    (2, "ContShootSpeed", _map_list(ContShootSpeed)),
+    (3, "IntervalTimerFrame", lambda x: {"InfiniteSetting": x[0] == 1, "FiniteSetting": x[1] == 1}),
+    (4, "IntervalTimerSecond", None),
+    (10, "SFD", None),
+    (11, "ImageQuality", _lookup({
+        2: ImageQuality.DNG,
+        16: ImageQuality.JPEGFine,
+        32: ImageQuality.JPEGNormal,
+        48: ImageQuality.JPEGBasic,
+        18: ImageQuality.DNGAndJPEG,
+    })),
+    (12, "DNGQuality", _map_list(DNGQuality)),
+    (20, "StillImageResolution", _lookup({
+        1: Resolution.High,
+        2: Resolution.Medium,
+        3: Resolution.Low,
+    })),
+    (21, "AspectRatio", _map_list(AspectRatio)),
+    (100, "StillMovieSwitch", None),
+    (110, "AudioRecord", None),
+    (111, "NumOfVoiceChannels", None),
+    (112, "GainAdjustMethod", None),
+    (113, "ManualGainAdjustEV", None),
+    (114, "WindNoiseCanceller", None),
+    (150, "RecordFormat", None),
+    (151, "CinemaDNGImageQuality", None),
+    (152, "MovImageQuality", None),
+    (160, "MovieResolution", None),
+    (161, "FrameRate", None),
+    (162, "Binning", None),
+    (200, "ExposureMode", _lookup({
+        1: ExposureMode.ProgramAuto,
+        2: ExposureMode.AperturePriority,
+        3: ExposureMode.ShutterPriority,
+        4: ExposureMode.Manual,
+        5: ExposureMode.C1,
+        6: ExposureMode.C2,
+        7: ExposureMode.C3,
+    })),
+    (201, "ProgramShiftAvailable", _bool),
+    (210, "FValue", None),
+    (211, "TValue", None),
+    (212, "ShutterSpeed", None),
+    (213, "NonApexShutterSpeed", None),
+    (214, "ShutterAngle", None),
+    (215, "ISOManual", None),
+    (216, "ISOAuto", None),
+    (217, "ExpComp", None),
+    (218, "ExpBracketNum", None),
+    (219, "ExpBracketOrder", None),
+    (220, "ExpBracketAmount", None),
+    (250, "AEMeteringMode", _lookup({
+        1: AEMeteringMode.Evaluative,
+        2: AEMeteringMode.CenterWeightedAverage,
+        3: AEMeteringMode.Spot,
+    })),
+    (251, "AELockAvailable", _bool),
+    (252, "Flash", None),
+    (253, "FlashExpComp", None),
+    (300, "CustomBracket", None),
+    (301, "WhiteBalance", _lookup({
+        1: WhiteBalance.Auto,
+        2: WhiteBalance.LightSource,
+        3: WhiteBalance.Sunlight,
+        4: WhiteBalance.Shade,
+        5: WhiteBalance.Incandescent,
+        6: WhiteBalance.Fluorescent,
+        7: WhiteBalance.Flash,
+        8: WhiteBalance.ColorTemp,
+        9: WhiteBalance.Custom1,
+        10: WhiteBalance.Custom2,
+        11: WhiteBalance.Custom3,
+    })),
+    (302, "WBColorTemp", None),
+    (303, "WBCustomCap", None),
+    (304, "WBAdjustment", None),
+    (305, "WBBracketNum", None),
+    (306, "WBBracketDirection", None),
+    (307, "WBBracketEV", None),
+    (320, "ColorMode", _lookup({
+        1: ColorMode.Normal,
+        2: ColorMode.Vivid,
+        3: ColorMode.Neutral,
+        4: ColorMode.Portrait,
+        5: ColorMode.Landscape,
+        6: ColorMode.Cinema,
+        7: ColorMode.Sunset,
+        8: ColorMode.Forest,
+        9: ColorMode.FovClassicBlue,
+        10: ColorMode.FovClassicYellow,
+        11: ColorMode.Monochrome,
+    })),
+    (321, "ColorModeContrast", None),
+    (322, "ColorModeSharpness", None),
+    (323, "ColorModeSaturation", None),
+    (323, "MonochromeFilterEffect", None),
+    (324, "MonochromeToneEffect", None),
+    (327, "ColorModeBracketNum", None),
+    (340, "FillLight", None),
+    (341, "FillLightBracketNum", None),
+    (342, "FillLightBracketEV", None),
+    (350, "HDR", _lookup({
+        -1: HDR.Auto,
+        0: HDR.Off,
+        1: HDR.PlusMinus1,
+        2: HDR.PlusMinus2,
+        3: HDR.PlusMinus3,
+    })),
+    (500, "DCCropMode", _lookup({
+        -1: DCCropMode.Auto,
+        0: DCCropMode.Off,
+        1: DCCropMode.On,
+    })),
+    (501, "LOCDistortion", _lookup({-1: LOCDistortion.Auto, 0: LOCDistortion.Off})),
+    (502, "LOCChromaticAberration", _lookup({-1: LOCChromaticAberration.Auto, 0: LOCChromaticAberration.Off})),
+    (503, "LOCDiffraction", _lookup({0: LOCDiffraction.Off, 1: LOCDiffraction.On})),
+    (504, "LOCVignetting", _lookup({-1: LOCVignetting.Auto, 0: LOCVignetting.Off})),
+    (505, "LOCColorShade", _lookup({
+        -1: LOCColorShade.Auto,
+        0: LOCColorShade.Off,
+        1: LOCColorShade.No1,
+        2: LOCColorShade.No2,
+        3: LOCColorShade.No3,
+        4: LOCColorShade.No4,
+        5: LOCColorShade.No5,
+        6: LOCColorShade.No6,
+        7: LOCColorShade.No7,
+        8: LOCColorShade.No8,
+        9: LOCColorShade.No9,
+        10: LOCColorShade.No10,
+    })),
+    (506, "LOCColorShadeCustomCapAvailable", _bool),
+    (600, "FocusMode", _map_list(FocusMode)),
+    (601, "AFLockAvailable", _bool),
+    (602, "FaceEyeAF", _map_list(FaceEyeAF)),
+    (610, "FocusArea", _map_list(FocusArea)),
+    (611, "OnePointSelection", _map_list(OnePointSelection)),
+    (612, "FocusAreaOverallArea", lambda x: {'Height': x[0], 'Width': x[1]}),
+    (613, "FocusAreaValidArea", lambda x: {'Top': x[0], 'Bottom': x[1], 'Left': x[2], 'Right': x[3]}),
+    (614, "NumOfDMFSizes", lambda x: x[0]),
+    (615, "DMFSize", lambda x: [(x[i], x[i + 1]) for i in range(0, len(x), 2)]),
+    (616, "DMFMovement", None),
+    (650, "PreConstAF", _map_list(PreConstAF)),
+    (651, "FocusLimit", _map_list(FocusLimit)),
+    (656, "AFSOperation", None),
+    (657, "AFCOperation", None),
+    (700, "LVImageTransferAvailable", _bool),
+    (701, "LVMagnificationRate", None),
+    (702, "FocusPeaking", None),
+    (800, "DateTime", None),
+    (801, "ShutterSound", None),
+    (802, "AFVolume", None),
+    (803, "TimerVolume", None),
+    (810, "EImageStab", _lookup({0: EImageStab.Off, 1: EImageStab.On})),
+)
+
+_CAN_SET_INFO5_TAGS = frozenset(tag for tag, _, _ in _CAN_SET_INFO5_FIELDS)
+# Some fields share a tag.
+_CAN_SET_INFO5_NAMES = collections.OrderedDict((name, (tag, conv)) for tag, name, conv in _CAN_SET_INFO5_FIELDS)
+
+
 class CamCanSetInfo5(_DirectoryEntrySchema):
+    """Settable values of a camera.
+
+    Fields are converted from raw entries when they are read first, since most callers use only
+    a few of about 100 fields. A field not reported by the camera is None."""
+
     def __str__(self):
-        s = ", ".join([f"{k}={str(v)}" for k, v in self.__dict__.items()])
+        s = ", ".join([f"{k}={str(getattr(self, k))}" for k in _CAN_SET_INFO5_NAMES])
         return f"CamCanSetInfo5({s})"
 
     def decode(self, rawdata):
-        field_defs = [
-            (1, "DriveMode", _map_list(lambda x: DriveMode.IntervalTimer if x == 5 else DriveMode(x))),
-            (2, "ContShootSpeed", _map_list(ContShootSpeed)),
-            (3, "IntervalTimerFrame", lambda x: {"InfiniteSetting": x[0] == 1, "FiniteSetting": x[1] == 1}),
-            (4, "IntervalTimerSecond", None),
-            (10, "SFD", None),
-            (11, "ImageQuality", {
-                "2": ImageQuality.DNG,
-                "16": ImageQuality.JPEGFine,
-                "32": ImageQuality.JPEGNormal,
-                "48": ImageQuality.JPEGBasic,
-                "18": ImageQuality.DNGAndJPEG,
-            }),
-            (12, "DNGQuality", _map_list(DNGQuality)),
-            (20, "StillImageResolution", {
-                "1": Resolution.High,
-                "2": Resolution.Medium,
-                "3": Resolution.Low,
-            }),
-            (21, "AspectRatio", _map_list(AspectRatio)),
-            (100, "StillMovieSwitch", None),
-            (110, "AudioRecord", None),
-            (111, "NumOfVoiceChannels", None),
-            (112, "GainAdjustMethod", None),
-            (113, "ManualGainAdjustEV", None),
-            (114, "WindNoiseCanceller", None),
-            (150, "RecordFormat", None),
-            (151, "CinemaDNGImageQuality", None),
-            (152, "MovImageQuality", None),
-            (160, "MovieResolution", None),
-            (161, "FrameRate", None),
-            (162, "Binning", None),
-            (200, "ExposureMode", {
-                "1": ExposureMode.ProgramAuto,
-                "2": ExposureMode.AperturePriority,
-                "3": ExposureMode.ShutterPriority,
-                "4": ExposureMode.Manual,
-                "5": ExposureMode.C1,
-                "6": ExposureMode.C2,
-                "7": ExposureMode.C3,
-            }),
-            (201, "ProgramShiftAvailable", _bool),
-            (210, "FValue", None),
-            (211, "TValue", None),
-            (212, "ShutterSpeed", None),
-            (213, "NonApexShutterSpeed", None),
-            (214, "ShutterAngle", None),
-            (215, "ISOManual", None),
-            (216, "ISOAuto", None),
-            (217, "ExpComp", None),
-            (218, "ExpBracketNum", None),
-            (219, "ExpBracketOrder", None),
-            (220, "ExpBracketAmount", None),
-            (250, "AEMeteringMode", {
-                "1": AEMeteringMode.Evaluative,
-                "2": AEMeteringMode.CenterWeightedAverage,
-                "3": AEMeteringMode.Spot,
-            }),
-            (251, "AELockAvailable", _bool),
-            (252, "Flash", None),
-            (253, "FlashExpComp", None),
-            (300, "CustomBracket", None),
-            (301, "WhiteBalance", {
-                "1": WhiteBalance.Auto,
-                "2": WhiteBalance.LightSource,
-                "3": WhiteBalance.Sunlight,
-                "4": WhiteBalance.Shade,
-                "5": WhiteBalance.Incandescent,
-                "6": WhiteBalance.Fluorescent,
-                "7": WhiteBalance.Flash,
-                "8": WhiteBalance.ColorTemp,
-                "9": WhiteBalance.Custom1,
-                "10": WhiteBalance.Custom2,
-                "11": WhiteBalance.Custom3,
-            }),
-            (302, "WBColorTemp", None),
-            (303, "WBCustomCap", None),
-            (304, "WBAdjustment", None),
-            (305, "WBBracketNum", None),
-            (306, "WBBracketDirection", None),
-            (307, "WBBracketEV", None),
-            (320, "ColorMode", {
-                "1": ColorMode.Normal,
-                "2": ColorMode.Vivid,
-                "3": ColorMode.Neutral,
-                "4": ColorMode.Portrait,
-                "5": ColorMode.Landscape,
-                "6": ColorMode.Cinema,
-                "7": ColorMode.Sunset,
-                "8": ColorMode.Forest,
-                "9": ColorMode.FovClassicBlue,
-                "10": ColorMode.FovClassicYellow,
-                "11": ColorMode.Monochrome,
-            }),
-            (321, "ColorModeContrast", None),
-            (322, "ColorModeSharpness", None),
-            (323, "ColorModeSaturation", None),
-            (323, "MonochromeFilterEffect", None),
-            (324, "MonochromeToneEffect", None),
-            (327, "ColorModeBracketNum", None),
-            (340, "FillLight", None),
-            (341, "FillLightBracketNum", None),
-            (342, "FillLightBracketEV", None),
-            (350, "HDR", {
-                "-1": HDR.Auto,
-                "0": HDR.Off,
-                "1": HDR.PlusMinus1,
-                "2": HDR.PlusMinus2,
-                "3": HDR.PlusMinus3,
-            }),
-            (500, "DCCropMode", {
-                "-1": DCCropMode.Auto,
-                "0": DCCropMode.Off,
-                "1": DCCropMode.On,
-            }),
-            (501, "LOCDistortion", {"-1": LOCDistortion.Auto, "0": LOCDistortion.Off}),
-            (502, "LOCChromaticAberration", {"-1": LOCChromaticAberration.Auto, "0": LOCChromaticAberration.Off}),
-            (503, "LOCDiffraction", {"0": LOCDiffraction.Off, "1": LOCDiffraction.On}),
-            (504, "LOCVignetting", {"-1": LOCVignetting.Auto, "0": LOCVignetting.Off}),
-            (505, "LOCColorShade", {
-                "-1": LOCColorShade.Auto,
-                "0": LOCColorShade.Off,
-                "1": LOCColorShade.No1,
-                "2": LOCColorShade.No2,
-                "3": LOCColorShade.No3,
-                "4": LOCColorShade.No4,
-                "5": LOCColorShade.No5,
-                "6": LOCColorShade.No6,
-                "7": LOCColorShade.No7,
-                "8": LOCColorShade.No8,
-                "9": LOCColorShade.No9,
-                "10": LOCColorShade.No10,
-            }),
-            (506, "LOCColorShadeCustomCapAvailable", _bool),
-            (600, "FocusMode", _map_list(FocusMode)),
-            (601, "AFLockAvailable", _bool),
-            (602, "FaceEyeAF", _map_list(FaceEyeAF)),
-            (610, "FocusArea", _map_list(FocusArea)),
-            (611, "OnePointSelection", _map_list(OnePointSelection)),
-            (612, "FocusAreaOverallArea", lambda x: {'Height': x[0], 'Width': x[1]}),
-            (613, "FocusAreaValidArea", lambda x: {'Top': x[0], 'Bottom': x[1], 'Left': x[2], 'Right': x[3]}),
-            (614, "NumOfDMFSizes", lambda x: x[0]),
-            (615, "DMFSize", lambda x: [(x[i], x[i + 1]) for i in range(0, len(x), 2)]),
-            (616, "DMFMovement", None),
-            (650, "PreConstAF", _map_list(PreConstAF)),
-            (651, "FocusLimit", _map_list(FocusLimit)),
-            (656, "AFSOperation", None),
-            (657, "AFCOperation", None),
-            (700, "LVImageTransferAvailable", _bool),
-            (701, "LVMagnificationRate", None),
-            (702, "FocusPeaking", None),
-            (800, "DateTime", None),
-            (801, "ShutterSound", None),
-            (802, "AFVolume", None),
-            (803, "TimerVolume", None),
-            (810, "EImageStab", {"0": EImageStab.Off, "1": EImageStab.On}),
-        ]
-        response = dict((str(tag), val) for tag, val in self._decode(rawdata))
-        for tag, name, conv in field_defs:
-            tag = str(tag)
-            if tag in response:
-                val = response[tag]
-                if type(conv) is dict:
-                    self.__dict__[name] = [conv[str(v)] if str(v) in conv else v for v in val]
-                elif conv is not None:
-                    self.__dict__[name] = conv(val)
-                else:
-                    self.__dict__[name] = val
-            else:
-                self.__dict__[name] = None
+        """Keeps the entries of IFD data, which are converted on the first access to each field.
+
+        Args:
+            rawdata (bytes): IFD data."""
+        for name in _CAN_SET_INFO5_NAMES:
+            self.__dict__.pop(name, None)
+        self._entries = dict(
+            (tag, (type_, view, count)) for tag, type_, count, view in ifd.iter_entries(rawdata)
+            if tag in _CAN_SET_INFO5_TAGS)
+
+    def __getstate__(self):
+        # Memoryviews of the response cannot be pickled, so that values are copied into bytes.
+        state = dict(self.__dict__)
+        if '_entries' in state:
+            state['_entries'] = dict(
+                (tag, (type_, bytes(view), count)) for tag, (type_, view, count) in state['_entries'].items())
+        return state
+
+    def __setstate__(self, state):
+        if '_entries' in state:
+            state['_entries'] = dict(
+                (tag, (type_, memoryview(value), count)) for tag, (type_, value, count) in state['_entries'].items())
+        self.__dict__.update(state)
+
+    def __getattr__(self, name):
+        field = _CAN_SET_INFO5_NAMES.get(name)
+        if field is None:
+            raise AttributeError(name)
+
+        tag, conv = field
+        entry = self.__dict__.get('_entries', {}).get(tag)
+        if entry is None:
+            value = None
+        else:
+            value = ifd.decode_value(*entry)
+            if conv is not None:
+                value = conv(value)
+        self.__dict__[name] = value
+        return value
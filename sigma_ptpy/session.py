@@ -0,0 +1,305 @@
+"""Recording of PTP transactions to session files and their replay
+
+`SessionRecorder` streams every transaction of `SigmaPTPy` (operation, parameters, sent and received
+data, response codes, errors and timings) to a compact binary file. The file is written by a
+background thread, so a transaction only enqueues references to its data::
+
+    with SessionRecorder("fp.session") as recorder:
+        camera = SigmaPTPy(recorder=recorder)
+        ...
+
+`SessionReplayer` serves the recorded responses in place of `SimulatedCamera`, so a session is
+reproduced offline at the original pacing or as fast as possible::
+
+    from sigma_ptpy.simulator import SimulatedSigmaPTPy
+
+    camera = SimulatedSigmaPTPy(device=SessionReplayer("fp.session", speed=1.0))
+
+File format (little endian): the magic `SPTPSES1` followed by records, each of which starts with
+a tag byte. A name record (tag 1) defines a string used as operation names and response codes::
+
+    index (uint16), length (uint8), UTF-8 bytes
+
+A transaction record (tag 2) is::
+
+    started (float64, seconds from the beginning), duration (float64, seconds),
+    operation name index (uint16), response code name index or errno (uint16),
+    error kind (uint8; 0: none, 1: usb.core.USBError, 2: ptpy.PTPError), the number of parameters (uint8),
+    sent data length (uint32), received data length or error message length (uint32),
+    parameters (uint32 each), sent data, received data or error message"""
+
+import collections
+import logging
+import queue
+import struct
+import threading
+import time
+import usb.core
+from ptpy import PTPError
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SPTPSES1"
+
+_NAME = struct.Struct("<BHB")
+_TRANSACTION = struct.Struct("<BddHHBBII")
+_TAG_NAME = 1
+_TAG_TRANSACTION = 2
+_ERROR_NONE = 0
+_ERROR_USB = 1
+_ERROR_PTP = 2
+
+
+class ReplayError(Exception):
+    """A transaction is not found in a recorded session."""
+
+
+class RecordedTransaction(object):
+    """A transaction in a session file.
+
+    Attributes:
+        Started (float): the start time in seconds from the beginning of the session.
+        Duration (float): the duration in seconds.
+        OperationCode (str): the name of the operation.
+        Parameter (list): parameters of the operation.
+        Payload (bytes): data sent to the camera (None for operations without sent data).
+        ResponseCode (str): the response code (None if the transaction has failed).
+        Data (bytes): data received from the camera (None for operations without received data).
+        Error (Exception): the exception raised by the transaction, or None."""
+
+    def __init__(self, Started, Duration, OperationCode, Parameter, Payload, ResponseCode, Data, Error):
+        self.Started = Started
+        self.Duration = Duration
+        self.OperationCode = OperationCode
+        self.Parameter = Parameter
+        self.Payload = Payload
+        self.ResponseCode = ResponseCode
+        self.Data = Data
+        self.Error = Error
+
+    def __str__(self):
+        return \
+            f"RecordedTransaction(Started={str(self.Started)}, Duration={str(self.Duration)}, " \
+            f"OperationCode={str(self.OperationCode)}, Parameter={str(self.Parameter)}, " \
+            f"ResponseCode={str(self.ResponseCode)}, Error={str(self.Error)})"
+
+
+class SessionRecorder(object):
+    """A writer of transactions to a session file on a background thread.
+
+    Args:
+        file (str or file): a path or a binary file object.
+        max_pending (int): the maximum number of transactions waiting to be written. A transaction
+            blocks when the writer falls behind by this number.
+
+    Attributes:
+        count (int): the number of written transactions."""
+
+    def __init__(self, file, max_pending=256):
+        if isinstance(file, str):
+            self.__file = open(file, "wb")
+            self.__owned = True
+        else:
+            self.__file = file
+            self.__owned = False
+        self.__file.write(MAGIC)
+        self.__names = dict()
+        self.__origin = time.perf_counter()
+        self.__queue = queue.Queue(max_pending)
+        self.count = 0
+        self.__thread = threading.Thread(name="SessionRecorder", target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record(self, opcode, params, payload, code, data, started, elapsed, error=None):
+        """Enqueues a transaction. This is called by `SigmaPTPy`.
+
+        Args:
+            opcode (str): the name of the operation.
+            params (list): parameters of the operation.
+            payload (bytes): sent data or None.
+            code (str): the response code, or None for a failed transaction.
+            data (bytes): received data or None.
+            started (float): the value of `time.perf_counter()` at the start.
+            elapsed (float): the duration in seconds.
+            error (Exception): the exception raised by the transaction."""
+        self.__queue.put((opcode, params, payload, code, data, started, elapsed, error))
+
+    def close(self):
+        """Writes pending transactions and closes the file."""
+        if not self.__thread.is_alive():
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        if self.__owned:
+            self.__file.close()
+        else:
+            self.__file.flush()
+
+    def __name(self, name):
+        index = self.__names.get(name)
+        if index is None:
+            index = self.__names[name] = len(self.__names)
+            encoded = name.encode("utf-8")
+            self.__file.write(_NAME.pack(_TAG_NAME, index, len(encoded)))
+            self.__file.write(encoded)
+        return index
+
+    def __write(self, opcode, params, payload, code, data, started, elapsed, error):
+        if isinstance(error, usb.core.USBError):
+            kind, code, data = _ERROR_USB, error.errno or 0, str(error.strerror).encode("utf-8")
+        elif error is not None:
+            kind, code, data = _ERROR_PTP, 0, str(error).encode("utf-8")
+        else:
+            kind, code = _ERROR_NONE, self.__name(str(code))
+        opcode = self.__name(opcode)
+        params = list(params or [])
+        self.__file.write(_TRANSACTION.pack(
+            _TAG_TRANSACTION, started - self.__origin, elapsed, opcode, code, kind, len(params),
+            0xffffffff if payload is None else len(payload), 0xffffffff if data is None else len(data)))
+        if params:
+            self.__file.write(struct.pack("<{}I".format(len(params)), *params))
+        if payload:
+            self.__file.write(payload)
+        if data:
+            self.__file.write(data)
+        self.count += 1
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            try:
+                self.__write(*item)
+            except Exception as e:  # Recording must not break the session.
+                logger.error("Failed recording {}: {}".format(item[0], e))
+
+
+def _read_exactly(f, size):
+    buf = f.read(size)
+    if len(buf) != size:
+        raise ValueError("Truncated session file")
+    return buf
+
+
+def read_session(file):
+    """Reads transactions from a session file.
+
+    Args:
+        file (str or file): a path or a binary file object.
+
+    Yields:
+        RecordedTransaction: recorded transactions in order.
+
+    Raises:
+        ValueError: the file is not a session file or is broken."""
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            yield from read_session(f)
+        return
+
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a session file")
+    names = dict()
+    while True:
+        tag = file.read(1)
+        if not tag:
+            return
+        if tag[0] == _TAG_NAME:
+            _, index, length = _NAME.unpack(tag + _read_exactly(file, _NAME.size - 1))
+            names[index] = _read_exactly(file, length).decode("utf-8")
+        elif tag[0] == _TAG_TRANSACTION:
+            _, started, duration, opcode, code, kind, nparams, npayload, ndata = \
+                _TRANSACTION.unpack(tag + _read_exactly(file, _TRANSACTION.size - 1))
+            params = list(struct.unpack("<{}I".format(nparams), _read_exactly(file, 4 * nparams)))
+            payload = None if npayload == 0xffffffff else _read_exactly(file, npayload)
+            data = None if ndata == 0xffffffff else _read_exactly(file, ndata)
+            error = None
+            if kind == _ERROR_USB:
+                error, code, data = usb.core.USBError(data.decode("utf-8"), errno=code or None), None, None
+            elif kind == _ERROR_PTP:
+                error, code, data = PTPError(data.decode("utf-8")), None, None
+            else:
+                code = names[code]
+            yield RecordedTransaction(started, duration, names[opcode], params, payload, code, data, error)
+        else:
+            raise ValueError("Unknown record: {}".format(tag[0]))
+
+
+class SessionReplayer(object):
+    """A fake camera answering transactions with responses in a session file.
+
+    It has the same interface as `sigma_ptpy.simulator.SimulatedCamera`, so it is used with
+    `sigma_ptpy.simulator.SimulatedSigmaPTPy`. A transaction is answered by the next recorded
+    transaction of the same operation within `lookahead` records, so replay tolerates a different
+    number of polls (e.g., of CaptStatus). When none is found, the latest response of the operation
+    is repeated. Sent data and parameters are not compared.
+
+    Args:
+        file (str or file): a path or a binary file object of a session file.
+        speed (float): a factor of the recorded durations of transactions (1.0 for the original
+            pacing), or None to answer as fast as possible.
+        lookahead (int): the number of recorded transactions searched for a match.
+
+    Attributes:
+        default_timeout (int): the USB timeout in milliseconds, which `SigmaPTPy` changes.
+        operations (collections.Counter): the number of transactions of each operation.
+        transactions (list): recorded transactions."""
+
+    def __init__(self, file, speed=None, lookahead=16):
+        self.transactions = list(read_session(file))
+        self.speed = speed
+        self.lookahead = lookahead
+        self.default_timeout = 1000
+        self.operations = collections.Counter()
+        self.__cursor = 0
+        self.__latest = dict()
+        self.__lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """int: the number of recorded transactions not replayed yet."""
+        return len(self.transactions) - self.__cursor
+
+    def __find(self, opcode):
+        end = min(len(self.transactions), self.__cursor + self.lookahead)
+        for i in range(self.__cursor, end):
+            if self.transactions[i].OperationCode == opcode:
+                self.__cursor = i + 1
+                self.__latest[opcode] = self.transactions[i]
+                return self.transactions[i]
+        return self.__latest.get(opcode)
+
+    def transact(self, opcode, params=(), data=None):
+        """Answers a transaction.
+
+        Args:
+            opcode (str): the name of an operation.
+            params (list): parameters of the operation.
+            data (bytes): data sent from a computer.
+
+        Returns:
+            tuple: a response code and returned data (None if no data are returned).
+
+        Raises:
+            usb.core.USBError, ptpy.PTPError: the recorded transaction has failed.
+            ReplayError: the operation is not recorded."""
+        with self.__lock:
+            self.operations[opcode] += 1
+            recorded = self.__find(opcode)
+        if recorded is None:
+            if opcode in ('OpenSession', 'CloseSession'):
+                return 'OK', None
+            raise ReplayError("{} is not recorded".format(opcode))
+        if self.speed:
+            time.sleep(recorded.Duration / self.speed)
+        if recorded.Error is not None:
+            raise recorded.Error.with_traceback(None)
+        return recorded.ResponseCode, recorded.Data
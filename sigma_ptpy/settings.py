@@ -0,0 +1,101 @@
+"""Applying settings with the minimum number of transactions"""
+
+import collections
+import inspect
+import logging
+from .schema import (
+    CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5, CamDataGroupFocus)
+
+
+logger = logging.getLogger(__name__)
+
+_GROUP_METHODS = collections.OrderedDict([
+    (CamDataGroup1, ('get_cam_data_group1', 'set_cam_data_group1')),
+    (CamDataGroup2, ('get_cam_data_group2', 'set_cam_data_group2')),
+    (CamDataGroup3, ('get_cam_data_group3', 'set_cam_data_group3')),
+    (CamDataGroup4, ('get_cam_data_group4', 'set_cam_data_group4')),
+    (CamDataGroup5, ('get_cam_data_group5', 'set_cam_data_group5')),
+    (CamDataGroupFocus, ('get_cam_data_group_focus', 'set_cam_data_group_focus')),
+])
+
+SETTABLE_FIELDS = dict(
+    (name, klass)
+    for klass in _GROUP_METHODS
+    for name in inspect.signature(klass.__init__).parameters if name != 'self')
+"""dict: the schema class owning each field that can be set."""
+
+LINKED_FIELDS = (
+    ('IntervalTimerSecond', 'IntervalTimerFrame'),
+    ('LOCDistortion', 'LOCChromaticAberration', 'LOCDiffraction', 'LOCVignetting',
+     'LOCColorShade', 'LOCColorShadeAcq'),
+)
+"""tuple: fields which are always sent together. Missing ones are filled with current values."""
+
+
+def route_fields(fields):
+    """Splits fields into the schema classes owning them.
+
+    Args:
+        fields (dict): field names and values.
+
+    Returns:
+        collections.OrderedDict: a dict of field names and values for each schema class,
+        in the order of CamDataGroup1-5 and CamDataGroupFocus.
+
+    Raises:
+        ValueError: a field is unknown or read-only."""
+    groups = collections.OrderedDict((klass, dict()) for klass in _GROUP_METHODS)
+    for name, value in fields.items():
+        klass = SETTABLE_FIELDS.get(name)
+        if klass is None:
+            raise ValueError("{} is not a settable field".format(name))
+        groups[klass][name] = value
+    return collections.OrderedDict((k, v) for k, v in groups.items() if v)
+
+
+def apply_settings(camera, fields, current=None):
+    """Sends fields with one set transaction per touched group.
+
+    Args:
+        camera (sigma_ptpy.SigmaPTPy): a camera, or an object having the same methods.
+        fields (dict): field names and values.
+        current (callable): a function receiving a schema class and returning its known values
+            (or None if unknown). Fields equal to known values are left out.
+
+    Returns:
+        list: schema objects accepted by the camera. Groups rejected by the camera (i.e., with a
+        ResponseCode other than OK) are logged and left out.
+
+    Raises:
+        ValueError: a field is unknown or read-only, or a linked field is missing and the camera
+            does not report its current value."""
+    sent = []
+    for klass, values in route_fields(fields).items():
+        getter, setter = _GROUP_METHODS[klass]
+        known = current(klass) if current is not None else None
+        if known is not None:
+            values = dict((k, v) for k, v in values.items() if getattr(known, k) != v)
+        if not values:
+            continue
+
+        for linked in LINKED_FIELDS:
+            if any(k in values for k in linked) and not all(k in values for k in linked):
+                if known is None:
+                    known = getattr(camera, getter)()
+                for k in linked:
+                    if k not in values:
+                        value = getattr(known, k)
+                        if value is None:
+                            raise ValueError("{} must be specified with {} because the camera does not report it".format(
+                                k, ", ".join(sorted(set(linked) & set(values)))))
+                        values[k] = value
+
+        data = klass(**values)
+        ret = getattr(camera, setter)(data)
+        if ret.ResponseCode != 'OK':
+            logger.warning("{} was rejected by the camera: {}".format(klass.__name__, ret.ResponseCode))
+            continue
+        sent.append(data)
+
+    logger.debug("Applied {} fields with {} transactions".format(len(fields), len(sent)))
+    return sent
@@ -1,19 +1,29 @@
 import logging
+import threading
+import time
 import usb.core
+from contextlib import contextmanager
 from construct import Container
-from ptpy import USB
+from ptpy import USB, PTPError
 from .schema import (
     ApiConfig, CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5,
     CamDataGroupFocus, CamCanSetInfo5, CamCaptStatus,
     SnapCommand, PictFileInfo2, BigPartialPictFile, ViewFrame)
 from .sigma_ptp import SigmaPTP
+from . import download
+from .cache import CameraStateCache
+from .capture import CaptureTracker, exposure_time
+from .flightrecorder import FlightRecorder, _bytes_to_hex
+from .liveview import LiveViewStream
+from .metrics import MetricsRegistry
+from .settings import apply_settings
+from .timeout import TimeoutPolicy
+from .trace import Tracer
 
 
 logger = logging.getLogger(__name__)
 
-
-def _bytes_to_hex(b):
-    return " ".join(list(map(lambda s: format(s, "02x"), b[:128])))
+_DRAIN_SIZE = 0x100000
 
 
 class SigmaPTPy(SigmaPTP, USB):
@@ -23,6 +33,15 @@ class SigmaPTPy(SigmaPTP, USB):
         device (object): the USB device object.
         name (str): the name of USB devices for search.
         ignore_events (bool):
+        timeout_policy (sigma_ptpy.timeout.TimeoutPolicy): timeouts and retries of transactions.
+        metrics (bool or sigma_ptpy.metrics.MetricsRegistry): whether per-operation metrics are
+            collected, or a registry which collects them. They are available as `metrics`.
+        tracer (bool or sigma_ptpy.trace.Tracer): whether spans of transactions are recorded, or
+            a tracer which records them. They are available as `tracer`.
+        recorder (sigma_ptpy.session.SessionRecorder): a recorder of transactions to a session
+            file, or None. It is available as `recorder`.
+        flight_recorder (sigma_ptpy.flightrecorder.FlightRecorder): a ring buffer of the latest
+            transactions, which is dumped to the log on failures. It is available as `flight_recorder`.
 
     Examples:
         Usage as follows::
@@ -36,8 +55,16 @@ class SigmaPTPy(SigmaPTP, USB):
                  # Do something.
                  camera.close_application()"""
 
-    def __init__(self, *args, ignore_events=False, **kwargs):
+    def __init__(self, *args, ignore_events=False, timeout_policy=None, metrics=False, tracer=False,
+                 recorder=None, flight_recorder=None, **kwargs):
         logger.debug("Init SigmaPTPy")
+        self.timeout_policy = timeout_policy if timeout_policy is not None else TimeoutPolicy()
+        self.metrics = metrics if isinstance(metrics, MetricsRegistry) else MetricsRegistry(enabled=bool(metrics))
+        self.tracer = tracer if isinstance(tracer, Tracer) else Tracer(enabled=bool(tracer))
+        self.recorder = recorder
+        self.flight_recorder = flight_recorder if flight_recorder is not None else FlightRecorder()
+        self.capture_tracker = CaptureTracker(self)
+        self.__lock = threading.RLock()
         super(SigmaPTPy, self).__init__(*args, **kwargs)
 
         if ignore_events:
@@ -46,40 +73,170 @@ class SigmaPTPy(SigmaPTP, USB):
             if self._USBTransport__event_proc.is_alive():
                 self._USBTransport__event_proc.join(2)
 
+    @contextmanager
+    def _transfer_lock(self):
+        """Holds the lock of USB transfers in the context, tracing the wait for another thread."""
+        if not self.__lock.acquire(blocking=False):
+            with self.tracer.span('lock_wait', category='usb'):
+                self.__lock.acquire()
+        try:
+            yield
+        finally:
+            self.__lock.release()
+
+    @contextmanager
+    def _transfer_timeout(self, timeout):
+        """Applies a timeout (in milliseconds) to USB transfers in the context."""
+        if timeout is None:
+            yield
+            return
+        device = self._USBTransport__inep.device  # ptpy does not expose endpoints.
+        saved = device.default_timeout
+        if timeout != saved:
+            self.tracer.instant('timeout', category='usb', timeout=timeout, previous=saved)
+        device.default_timeout = timeout
+        try:
+            yield
+        finally:
+            device.default_timeout = saved
+
+    def _recover_transfer(self, timeout=100):
+        """Clears halts of the bulk endpoints and discards data left by a failed transaction.
+
+        Without this, the data phase or response of a timed-out transaction would be read as the
+        reply of the next one. It is called while the failed transfer still holds the lock.
+
+        Args:
+            timeout (int): a timeout in milliseconds of each read of leftover data."""
+        inep = self._USBTransport__inep  # ptpy does not expose endpoints.
+        outep = self._USBTransport__outep
+        for ep in (inep, outep):
+            try:
+                ep.clear_halt()
+            except usb.core.USBError as e:
+                logger.debug("Failed clearing halt: {}".format(e))
+        discarded = 0
+        while True:
+            try:
+                data = inep.read(_DRAIN_SIZE, timeout)
+            except usb.core.USBError:
+                break
+            if len(data) == 0:
+                break
+            discarded += len(data)
+        if discarded > 0:
+            logger.warning("Discarded {} bytes left by a failed transaction".format(discarded))
+
+    def __transact(self, opcode, params=[], payload=None, timeout=None, length=0):
+        policy = self.timeout_policy
+        metrics = self.metrics
+        tracer = self.tracer
+        recorder = self.recorder
+        flight_recorder = self.flight_recorder
+        retries = policy.retries_for(opcode)
+        attempt = 0
+        while True:
+            _timeout = timeout if timeout is not None else policy.timeout_for(opcode, length, attempt)
+            queued = started = time.perf_counter()
+            transaction_id = None
+            try:
+                with self._transfer_lock(), \
+                        tracer.span('transfer', category='usb', attempt=attempt, timeout=_timeout) as span, \
+                        self._transfer_timeout(_timeout):
+                    started = time.perf_counter()  # excluding the wait for the lock
+                    # PTP._transaction increments the ID without a lock.
+                    transaction_id = self._transaction
+                    ptp = Container(
+                        OperationCode=opcode,
+                        SessionID=self._session,
+                        TransactionID=transaction_id,
+                        Parameter=params)
+                    span.set(TransactionID=transaction_id, Parameter=params)
+                    try:
+                        if payload is None:
+                            response = self.recv(ptp)
+                            span.set(bytes_in=len(response.Data))
+                        else:
+                            span.set(bytes_out=len(payload))
+                            response = self.send(ptp, payload)
+                    except (usb.core.USBError, PTPError):
+                        # Drain before releasing the lock so that no other thread reads the leftovers.
+                        self._recover_transfer()
+                        raise
+            except (usb.core.USBError, PTPError) as e:
+                policy.observe_failure(opcode)
+                flight_recorder.record(opcode, transaction_id, params, payload, None, None,
+                                       time.perf_counter() - started, error=e)
+                if metrics.enabled:
+                    metrics.observe(opcode, time.perf_counter() - started, error=True, lock_wait=started - queued)
+                if recorder is not None:
+                    recorder.record(opcode, params, payload, None, None, started,
+                                    time.perf_counter() - started, error=e)
+                if attempt >= retries:
+                    flight_recorder.dump(log=logger)
+                    raise
+                attempt += 1
+                logger.warning("Retry {} ({}/{}): {}".format(opcode, attempt, retries, e))
+                tracer.instant('retry', opcode=opcode, attempt=attempt, error=str(e))
+                time.sleep(policy.backoff(attempt))
+                continue
+
+            elapsed = time.perf_counter() - started
+            nbytes = len(response.Data) if payload is None else len(payload)
+            policy.observe(opcode, elapsed, nbytes)
+            flight_recorder.record(opcode, transaction_id, params, payload, response.ResponseCode,
+                                   response.Data if payload is None else None, elapsed)
+            if metrics.enabled:
+                if payload is None:
+                    metrics.observe(opcode, elapsed, bytes_in=nbytes, lock_wait=started - queued)
+                else:
+                    metrics.observe(opcode, elapsed, bytes_out=nbytes, lock_wait=started - queued)
+            if recorder is not None:
+                recorder.record(opcode, params, payload, response.ResponseCode,
+                                response.Data if payload is None else None, started, elapsed)
+            return response
+
+    def __decode(self, opcode, decode, *args):
+        """Calls `decode` in a span and feeds its duration to `metrics` if enabled."""
+        metrics = self.metrics
+        with self.tracer.span('decode', category='schema'):
+            if not metrics.enabled:
+                return decode(*args)
+            started = time.perf_counter()
+            try:
+                return decode(*args)
+            finally:
+                metrics.observe_decode(opcode, time.perf_counter() - started)
+
     def __recv(self, opcode, klass, params=[], timeout=None):
-        _timeout = None
-        # bad operation for setting timeout
-        if timeout is not None:
-            _timeout = self._USBTransport__inep.device._Device__default_timeout
-            self._USBTransport__inep.device._Device__default_timeout = timeout
-
-        ptp = Container(
-            OperationCode=opcode,
-            SessionID=self._session,
-            TransactionID=self._transaction,
-            Parameter=params)
-        response = self.recv(ptp)
-        logger.debug("RECV {} {}".format(opcode, _bytes_to_hex(response.Data)))
-
-        if _timeout is not None:
-            self._USBTransport__inep.device._Device__default_timeout = _timeout
-
-        instance = klass()
-        instance.decode(response.Data)
-        return instance
+        with self.tracer.span(opcode, schema=klass.__name__):
+            instance = klass()
+            self.__decode(opcode, instance.decode, self.__request(opcode, params, timeout))
+            return instance
+
+    def __request(self, opcode, params=[], timeout=None, length=0):
+        response = self.__transact(opcode, params, timeout=timeout, length=length)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("RECV {} {} bytes: {}".format(opcode, len(response.Data), _bytes_to_hex(response.Data)))
+        return response.Data
 
     def __send(self, opcode, klass, data):
         if not isinstance(data, klass):
             raise TypeError("{} is expected, but {} is given".format(klass, type(data)))
 
-        payload = data.encode()
-        logger.debug("SEND {} {}".format(opcode, _bytes_to_hex(payload)))
-        ptp = Container(
-            OperationCode=opcode,
-            SessionID=self._session,
-            TransactionID=self._transaction,
-            Parameter=[])
-        return self.send(ptp, payload)
+        metrics = self.metrics
+        tracer = self.tracer
+        with tracer.span(opcode, schema=klass.__name__):
+            with tracer.span('encode', category='schema'):
+                if metrics.enabled:
+                    started = time.perf_counter()
+                    payload = data.encode()
+                    metrics.observe_encode(opcode, time.perf_counter() - started)
+                else:
+                    payload = data.encode()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("SEND {} {} bytes: {}".format(opcode, len(payload), _bytes_to_hex(payload)))
+            return self.__transact(opcode, payload=payload)
 
     def config_api(self):
         """This is the first instruction issued to the camera by the application that uses API.
@@ -101,19 +258,17 @@ class SigmaPTPy(SigmaPTP, USB):
         """This instruction informs the camera that the session is closed when the application exits."""
         logger.debug("SEND SigmaCloseApplication")
         payload = b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # This payload is undocumented. What's this?
-        ptp = Container(
-            OperationCode='SigmaCloseApplication',
-            SessionID=self._session,
-            TransactionID=self._transaction,
-            Parameter=[])
-        return self.send(ptp, payload)
+        with self.tracer.span('SigmaCloseApplication'):
+            return self.__transact('SigmaCloseApplication', payload=payload)
 
     def get_cam_data_group1(self):
         """This instruction acquires DataGroup1 status information from the camera.
 
         Returns:
             sigma_ptpy.schema.CamDataGroup1: CamDataGroup1 object."""
-        return self.__recv('SigmaGetCamDataGroup1', CamDataGroup1)
+        data = self.__recv('SigmaGetCamDataGroup1', CamDataGroup1)
+        self.capture_tracker.exposure = exposure_time(data.ShutterSpeed)
+        return data
 
     def get_cam_data_group2(self):
         """This instruction acquires DataGroup2 status information from the camera.
@@ -148,7 +303,10 @@ class SigmaPTPy(SigmaPTP, USB):
 
         Args:
             data (sigma_ptpy.schema.CamDataGroup1): DataGroup1 status information"""
-        return self.__send('SigmaSetCamDataGroup1', CamDataGroup1, data)
+        ret = self.__send('SigmaSetCamDataGroup1', CamDataGroup1, data)
+        if ret.ResponseCode == 'OK' and data.ShutterSpeed is not None:
+            self.capture_tracker.exposure = exposure_time(data.ShutterSpeed)
+        return ret
 
     def set_cam_data_group2(self, data):
         """This instruction changes DataGroup2 status information of the camera.
@@ -197,6 +355,41 @@ class SigmaPTPy(SigmaPTP, USB):
             focus (sigma_ptpy.schema.CamDataGroupFocus): the set of values to be sent."""
         return self.__send('SigmaSetCamDataGroupFocus', CamDataGroupFocus, focus)
 
+    def apply(self, **fields):
+        """Changes settings of any data group at once.
+
+        Fields are routed to the schema classes owning them (CamDataGroup1-5 and
+        CamDataGroupFocus), and one set transaction is sent per touched group. Use
+        `state_cache().apply` to leave out fields which already have the given values.
+
+        Args:
+            fields: field names and values such as `ShutterSpeed=...` or `FocusMode=...`.
+
+        Returns:
+            list: schema objects sent to the camera.
+
+        Raises:
+            ValueError: a field is unknown or read-only.
+
+        Examples:
+            Usage as follows::
+
+                camera.apply(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Auto,
+                             ColorMode=ColorMode.Standard, FocusMode=FocusMode.AF_S)"""
+        return apply_settings(self, fields)
+
+    def state_cache(self, ttl=5.0, volatile_ttl=0.5, **kwargs):
+        """Creates a cache of camera settings wrapping this camera.
+
+        Args:
+            ttl (float): the default TTL of groups in seconds.
+            volatile_ttl (float): the TTL of volatile fields such as BatteryState in seconds.
+            kwargs: other arguments of `sigma_ptpy.cache.CameraStateCache`.
+
+        Returns:
+            sigma_ptpy.cache.CameraStateCache: a cache usable in place of this camera."""
+        return CameraStateCache(self, ttl=ttl, volatile_ttl=volatile_ttl, **kwargs)
+
     def get_cam_can_set_info5(self):
         """This instruction acquires the setting items, which can be changed through the PC, from the camera.
 
@@ -214,6 +407,26 @@ class SigmaPTPy(SigmaPTP, USB):
             sigma_ptpy.schema.CamCaptStatus: CamCaptStatus object."""
         return self.__recv('SigmaGetCamCaptStatus', CamCaptStatus, params=[image_id])
 
+    def wait_for_capture(self, image_id, timeout=None):
+        """Waits for completion of shooting.
+
+        The first poll is scheduled after the exposure time of the current shutter speed from the
+        last `snap_command`, and the following polls back off adaptively. See
+        `sigma_ptpy.capture.CaptureTracker`.
+
+        Args:
+            image_id (int): the image ID to obtain a status.
+            timeout (float): the limit of waiting in seconds from the snap command (the exposure
+                time plus 10 seconds by default).
+
+        Returns:
+            sigma_ptpy.capture.CaptureResult: the progress of shooting.
+
+        Raises:
+            sigma_ptpy.capture.CaptureError: the camera has reported a failure.
+            TimeoutError: shooting has not finished in time."""
+        return self.capture_tracker.wait(image_id, timeout=timeout)
+
     def get_pict_file_info2(self):
         """This function requests information of the data (image file) that is shot in Camera Control mode.
 
@@ -238,34 +451,143 @@ class SigmaPTPy(SigmaPTP, USB):
                 img = cv2.imdecode(np.frombuffer(pict.Data, np.uint8), cv2.IMREAD_COLOR)"""
         return self.__recv('SigmaGetViewFrame', ViewFrame)
 
+    def live_view(self, target_fps=None, max_queue=2, policy="drop_oldest"):
+        """Starts streaming LiveView frames on a dedicated I/O thread.
+
+        Args:
+            target_fps (float): the upper bound of the frame rate. None means as fast as possible.
+            max_queue (int): the number of frames buffered for consumers.
+            policy (str): "drop_oldest" or "block". See `sigma_ptpy.liveview.LiveViewStream`.
+
+        Returns:
+            sigma_ptpy.liveview.LiveViewStream: a started stream.
+
+        Examples:
+            Frames are obtained as follows::
+
+                with camera.live_view(target_fps=30) as stream:
+                    for frame in stream:
+                        img = cv2.imdecode(np.frombuffer(frame.Data, np.uint8), cv2.IMREAD_COLOR)
+                print(stream.stats)"""
+        stream = LiveViewStream(self, target_fps=target_fps, max_queue=max_queue, policy=policy)
+        stream.start()
+        return stream
+
     def snap_command(self, data):
         """This command issues shooting instructions from the PC to the camera.
 
         Args:
             data (sigma_ptpy.schema.SnapCommand): a snap command object."""
-        return self.__send('SigmaSnapCommand', SnapCommand, data)
+        started = time.perf_counter()
+        ret = self.__send('SigmaSnapCommand', SnapCommand, data)
+        self.capture_tracker.snapped(started)
+        return ret
 
     def clear_image_db_single(self, image_id):
         """This instruction requests to clear the shooting result of the CaptStatus database in the camera."""
         logger.debug("SEND SigmaClearImageDBSingle")
         payload = b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # This payload is undocumented. What's this?
-        ptp = Container(
-            OperationCode='SigmaClearImageDBSingle',
-            SessionID=self._session,
-            TransactionID=self._transaction,
-            Parameter=[image_id])
-        return self.send(ptp, payload)
-
-    def get_big_partial_pict_file(self, store_address, start_address, max_length, timeout=5000):
+        with self.tracer.span('SigmaClearImageDBSingle', ImageId=image_id):
+            return self.__transact('SigmaClearImageDBSingle', params=[image_id], payload=payload)
+
+    def get_big_partial_pict_file(self, store_address, start_address, max_length, timeout=None):
         """This function downloads image data (image file) shot by the camera in pieces.
 
         Args:
             store_address (int): Image file storage location address (head address)
             start_address (int): Image file transfer starting position (offset address)
             max_length (int): Image file transfer size (units: bytes / Maximum value: 0x8000000)
+            timeout (int): a timeout in milliseconds. By default, it is computed by `timeout_policy`
+                from `max_length` and the observed throughput.
 
         Returns:
             sigma_ptpy.schema.BigPartialPictFile: BigPartialPictFile object."""
-        return self.__recv('SigmaGetBigPartialPictFile', BigPartialPictFile,
-                           params=[store_address, start_address, max_length],
-                           timeout=timeout)
+        with self.tracer.span('SigmaGetBigPartialPictFile', schema='BigPartialPictFile'):
+            pict = BigPartialPictFile()
+            rawdata = self.__request('SigmaGetBigPartialPictFile', params=[store_address, start_address, max_length],
+                                     timeout=timeout, length=max_length)
+            self.__decode('SigmaGetBigPartialPictFile', pict.decode, rawdata)
+            return pict
+
+    def get_big_partial_pict_file_into(self, buffer, store_address, start_address, max_length=None, timeout=None):
+        """This function downloads a piece of image data (image file) into a preallocated buffer.
+
+        Unlike `get_big_partial_pict_file`, the received data is copied into `buffer` directly
+        without intermediate `bytes` objects.
+
+        Args:
+            buffer (memoryview): a writable buffer such as a slice of `bytearray` or `mmap.mmap`.
+            store_address (int): Image file storage location address (head address)
+            start_address (int): Image file transfer starting position (offset address)
+            max_length (int): Image file transfer size (units: bytes / Maximum value: 0x8000000).
+                The length of `buffer` is used by default.
+            timeout (int): a timeout in milliseconds. By default, it is computed by `timeout_policy`.
+
+        Returns:
+            sigma_ptpy.schema.BigPartialPictFile: BigPartialPictFile object whose PartialData refers
+            to the filled part of `buffer`."""
+        buffer = memoryview(buffer)
+        if max_length is None:
+            max_length = buffer.nbytes
+        with self.tracer.span('SigmaGetBigPartialPictFile', schema='BigPartialPictFile'):
+            rawdata = self.__request('SigmaGetBigPartialPictFile',
+                                     params=[store_address, start_address, max_length],
+                                     timeout=timeout, length=max_length)
+            pict = BigPartialPictFile()
+            self.__decode('SigmaGetBigPartialPictFile', pict.decode_into, rawdata, buffer)
+            return pict
+
+    def iter_picture_chunks(self, info, chunk_size=None):
+        """Downloads a picture file piece by piece to keep memory usage bounded.
+
+        Args:
+            info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+            chunk_size (int): a fixed transfer size in bytes. When it is None, the size is tuned
+                automatically from the measured throughput.
+
+        Yields:
+            bytes: a piece of the picture file in order."""
+        return download.iter_picture_chunks(self, info, chunk_size=chunk_size)
+
+    def download_picture(self, info, sink, chunk_size=None):
+        """Downloads a picture file into a sink piece by piece.
+
+        Args:
+            info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+            sink (object): a file-like object having `write` method, or a callable receiving bytes.
+            chunk_size (int): a fixed transfer size in bytes. When it is None, the size is tuned
+                automatically from the measured throughput.
+
+        Returns:
+            int: the number of downloaded bytes.
+
+        Examples:
+            Save a shot picture as follows::
+
+                info = camera.get_pict_file_info2()
+                with open(info.FileName.decode("utf8"), "wb") as fout:
+                    camera.download_picture(info, fout)"""
+        return download.download_picture(self, info, sink, chunk_size=chunk_size)
+
+    def download_picture_into(self, info, buffer, chunk_size=None):
+        """Downloads a picture file into a preallocated buffer piece by piece.
+
+        Args:
+            info (sigma_ptpy.schema.PictFileInfo2): information of the picture file to be downloaded.
+            buffer (object): a writable buffer of at least `info.FileSize` bytes such as `bytearray`
+                or `mmap.mmap`.
+            chunk_size (int): a fixed transfer size in bytes. When it is None, the size is tuned
+                automatically from the measured throughput.
+
+        Returns:
+            int: the number of downloaded bytes.
+
+        Examples:
+            Write a shot picture into a memory-mapped file as follows::
+
+                info = camera.get_pict_file_info2()
+                with open(info.FileName.decode("utf8"), "w+b") as fout:
+                    fout.truncate(info.FileSize)
+                    with mmap.mmap(fout.fileno(), info.FileSize) as mm:
+                        camera.download_picture_into(info, mm)"""
+        return download.download_picture_into(self, info, buffer, chunk_size=chunk_size)
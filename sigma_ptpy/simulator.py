@@ -0,0 +1,516 @@
+"""A simulated SIGMA fp for tests and benchmarks without a camera
+
+`SimulatedCamera` implements the vendor operations of `sigma_ptpy.sigma_ptp.SigmaPTP` on an
+in-memory state, and `SimulatedSigmaPTPy` puts it in place of the USB transport under `SigmaPTPy`,
+so timeouts, retries, capture tracking, downloads and live view run unchanged::
+
+    from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+    camera = SimulatedSigmaPTPy(device=SimulatedCamera(latency=0.002, bandwidth=40e6))
+    with camera.session():
+        camera.config_api()
+
+Responses are built in the same layouts as a real camera (including header and parity bytes),
+and a transaction takes `latency` plus the transferred bytes divided by `bandwidth`. When it
+would exceed the USB timeout set by `SigmaPTPy`, it fails after the timeout like PyUSB does."""
+
+import collections
+import functools
+import logging
+import random
+import struct
+import threading
+import time
+import usb.core
+from construct import Container
+from ptpy import USB
+from . import ifd
+from .capture import exposure_time
+from .enum import CaptStatus, CaptureMode, DestToSave, DirectoryType
+from .schema import CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5
+from .sigma_ptpy import SigmaPTPy
+
+
+logger = logging.getLogger(__name__)
+
+# responses of a SIGMA fp
+_GROUPS = collections.OrderedDict([
+    ('SigmaGetCamDataGroup1', (
+        CamDataGroup1, b"\x13\xff\x7f\x20\x20\x00\x01\xf8\x00\x00\x01\tk\x03\x01\xd0\x02\x08\x00\x00\x1d")),
+    ('SigmaGetCamDataGroup2', (CamDataGroup2, b"\x0e\x3f\xfc\x07\x02\x04\x01\x00\x03\x00\x00\x00\x01\x01\x10l")),
+    ('SigmaGetCamDataGroup3', (
+        CamDataGroup3, b"\x10\xff\xa3\x00\x00\x00\x01\x03\x02\x00\xd0\x00\x00\x02\x05\x05\x02\x96")),
+    ('SigmaGetCamDataGroup4', (
+        CamDataGroup4, b"\x11\xf0\x3f\x00\x03\x01\x03\xff\x0e\x00\x01\x01\x02\x01\xfe\x02\x02\x05\x60")),
+    ('SigmaGetCamDataGroup5', (CamDataGroup5, b"\x0c\x2b\x00\x0a\x00\x01\x00\x00\x01\x58\x1b\x03\x01\xba")),
+])
+
+# tag: (type, value) of CamDataGroupFocus
+_FOCUS = {
+    1: (DirectoryType.UInt8, [3]),  # FocusMode.AF_S
+    2: (DirectoryType.UInt8, [0]),  # AFLock.Off
+    3: (DirectoryType.UInt8, [0]),  # FaceEyeAF.Off
+    4: (DirectoryType.UInt8, [0]),  # FaceEyeAFStatus.NonDetection
+    10: (DirectoryType.UInt8, [1]),  # FocusArea.MultiAutoFocusPoints
+    11: (DirectoryType.UInt8, [0]),  # OnePointSelection.Free
+    12: (DirectoryType.UInt8, [2]),
+    13: (DirectoryType.UInt16, [240, 320]),
+    51: (DirectoryType.UInt8, [0]),  # PreConstAF.Off
+    52: (DirectoryType.UInt8, [0]),  # FocusLimit.Off
+}
+_FOCUS_SETTABLE = frozenset([1, 2, 3, 10, 11, 12, 13, 51, 52])
+
+_CAN_SET_INFO5 = [
+    (1, DirectoryType.UInt8, [1, 2, 3, 4, 5]),  # DriveMode
+    (11, DirectoryType.UInt8, [2, 16, 32, 48, 18]),  # ImageQuality
+    (20, DirectoryType.UInt8, [1, 2, 3]),  # StillImageResolution
+    (200, DirectoryType.UInt8, [1, 2, 3, 4]),  # ExposureMode
+    (216, DirectoryType.UInt8, [0, 1]),  # ISOAuto
+    (301, DirectoryType.UInt8, [1, 2, 3, 4, 5, 6, 7]),  # WhiteBalance
+    (320, DirectoryType.UInt8, [0, 1, 2, 3, 4, 5, 6, 7]),  # ColorMode
+    (613, DirectoryType.UInt16, [10, 400, 20, 600]),  # FocusAreaValidArea
+    (700, DirectoryType.UInt8, [1]),  # LVImageTransferAvailable
+]
+
+_EMPTY_IFD = bytes(ifd.encode_entries([]))
+_PICT_FILE_INFO2 = struct.Struct("<IIIIIII4sHH")
+_CAPT_STATUS = struct.Struct("<BBBBHB")
+_IMAGE_CAPTURES = frozenset([CaptureMode.GeneralCapt, CaptureMode.NonAFCapt, CaptureMode.StartCap])
+_AF_CAPTURES = frozenset([CaptureMode.AFDriveOnly, CaptureMode.StartAF])
+
+
+def _frame(body):
+    """Adds a header (the length) and a parity (the sum of bytes) to a response."""
+    data = bytearray(body)
+    data[0] = len(data) - 1
+    data.append(sum(data) & 0xff)
+    return bytes(data)
+
+
+def _jpeg(size, seed):
+    """Returns a deterministic byte array of `size` bytes looking like a JPEG file."""
+    block = bytes((i + seed) & 0xff for i in range(256))
+    body = size - 4
+    return b"\xff\xd8" + (block * (body // 256 + 1))[:body] + b"\xff\xd9"
+
+
+class _Image(object):
+    def __init__(self, image_id, mode, started, shooting, processing, address=None):
+        self.ImageId = image_id
+        self.Mode = mode
+        self.Started = started
+        self.Shooting = shooting
+        self.Processing = processing
+        self.Address = address
+        self.Number = None
+        self.Failed = None
+
+    def status(self, now):
+        if self.Failed is not None:
+            return self.Failed
+        elapsed = now - self.Started
+        if elapsed < self.Shooting:
+            return CaptStatus.ShootInProgress
+        if self.Mode in _AF_CAPTURES:
+            return CaptStatus.AFSuccess
+        if elapsed < self.Shooting + self.Processing:
+            return CaptStatus.ImageGenInProgress
+        return CaptStatus.ImageGenCompleted
+
+
+class SimulatedCamera(object):
+    """An in-memory SIGMA fp which serves PTP transactions.
+
+    Data groups 1-5, CamDataGroupFocus and CamDataGroupMovie keep what is set. A snap command
+    registers an image in the CaptStatus database, which is ShootInProgress during the AF time and
+    the exposure time of the current ShutterSpeed, ImageGenInProgress for `processing` seconds, and
+    ImageGenCompleted after that. Image IDs go around a ring from 1 to 255 like the image database
+    of the camera, and a snap command with no free slot of `buffer_size` slots results in
+    BufferFull. Image ID 0 in SigmaGetCamCaptStatus and SigmaClearImageDBSingle means the latest
+    image, whose real image ID is reported. A completed image is a JPEG-like file of `file_size`
+    bytes served by SigmaGetBigPartialPictFile until it is cleared. Live view frames of
+    `frame_size` bytes change `frame_rate` times per second.
+
+    Faults are injected by `inject` or randomly at `failure_rate`. An injected error is raised
+    after the duration of the transaction.
+
+    Args:
+        latency (float): the duration of a transaction without data in seconds.
+        bandwidth (float): the throughput of data phases in bytes per second (None means infinite).
+        jitter (float): the relative random variation of durations.
+        failure_rate (float): the probability that a transaction fails with a USB timeout.
+        file_size (int): the size of picture files in bytes.
+        frame_size (int): the size of live view frames in bytes.
+        frame_rate (float): the rate of live view frames per second.
+        af_time (float): the time of AF in seconds.
+        processing (float): the time of image generation in seconds.
+        buffer_size (int): the number of images kept in the CaptStatus database.
+        seed (int): the seed of random variation and failures.
+
+    Attributes:
+        default_timeout (int): the USB timeout in milliseconds, which `SigmaPTPy` changes
+            per transaction like that of a PyUSB device.
+        operations (collections.Counter): the number of transactions of each operation."""
+
+    def __init__(self, latency=0.0, bandwidth=None, jitter=0.0, failure_rate=0.0, file_size=0x400000,
+                 frame_size=0x20000, frame_rate=30.0, af_time=0.02, processing=0.05, buffer_size=8, seed=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.file_size = file_size
+        self.frame_size = frame_size
+        self.frame_rate = frame_rate
+        self.af_time = af_time
+        self.processing = processing
+        self.buffer_size = buffer_size
+        self.default_timeout = 1000
+        self.operations = collections.Counter()
+
+        self.CameraModel = "SIGMA fp"
+        self.SerialNumber = "91402081"
+        self.FirmwareVersion = "5.00"
+        self.CommunicationVersion = 1.24
+
+        self.__lock = threading.Lock()
+        self.__random = random.Random(seed)
+        self.__faults = []
+        self.__started = time.perf_counter()
+        self.__groups = dict((opcode, raw) for opcode, (_, raw) in _GROUPS.items())
+        self.__focus = dict(_FOCUS)
+        self.__movie = _EMPTY_IFD
+        self.__can_set_info5 = bytes(ifd.encode_entries(_CAN_SET_INFO5))
+        self.__images = dict()
+        self.__next_image_id = 1
+        self.__files = dict()
+        self.__file_number = 0
+        self.__frame = (None, None)
+        self.__last_command = b""
+        self.__handlers = {
+            'OpenSession': self.__nothing,
+            'CloseSession': self.__nothing,
+            'SigmaConfigApi': self.__config_api,
+            'SigmaCloseApplication': self.__nothing,
+            'SigmaSetCamClockAdj': self.__nothing,
+            'SigmaGetCamDataGroupFocus': self.__get_focus,
+            'SigmaSetCamDataGroupFocus': self.__set_focus,
+            'SigmaGetCamDataGroupMovie': self.__get_movie,
+            'SigmaSetCamDataGroupMovie': self.__set_movie,
+            'SigmaGetCamCanSetInfo5': self.__get_can_set_info5,
+            'SigmaGetCamCaptStatus': self.__get_capt_status,
+            'SigmaSnapCommand': self.__snap_command,
+            'SigmaClearImageDBSingle': self.__clear_image_db_single,
+            'SigmaGetPictFileInfo2': self.__get_pict_file_info2,
+            'SigmaGetBigPartialPictFile': self.__get_partial_file,
+            'SigmaGetMovieFileInfo': self.__get_movie_file_info,
+            'SigmaGetPartialMovieFile': self.__get_partial_file,
+            'SigmaGetViewFrame': self.__get_view_frame,
+            'SigmaGetLastCommandData': self.__get_last_command_data,
+            'SigmaFreeArrayMemory': self.__nothing,
+        }
+        for opcode in _GROUPS:
+            self.__handlers[opcode] = functools.partial(self.__get_group, opcode)
+            self.__handlers[opcode.replace('Get', 'Set', 1)] = functools.partial(self.__set_group, opcode)
+        # 1/125 s instead of 8 s of the recorded response
+        self.__set_group('SigmaGetCamDataGroup1', [], CamDataGroup1(ShutterSpeed=0x70).encode())
+
+    def inject(self, error=None, opcode=None, count=1):
+        """Makes following transactions fail.
+
+        Args:
+            error (object): an exception to be raised, or a PTP response code such as 'DeviceBusy'
+                to be returned without data. A USB timeout by default.
+            opcode (str): the name of an operation to fail. Any operation fails by default.
+            count (int): the number of transactions to fail."""
+        with self.__lock:
+            self.__faults.append([opcode, error, count])
+
+    def group(self, opcode):
+        """Returns the current state of a data group.
+
+        Args:
+            opcode (str): the name of a get operation such as 'SigmaGetCamDataGroup1'.
+
+        Returns:
+            object: a schema object such as `sigma_ptpy.schema.CamDataGroup1`."""
+        klass, _ = _GROUPS[opcode]
+        obj = klass()
+        obj.decode(self.__groups[opcode])
+        return obj
+
+    def transact(self, opcode, params=(), data=None):
+        """Serves a transaction.
+
+        Args:
+            opcode (str): the name of an operation.
+            params (list): parameters of the operation.
+            data (bytes): data sent from a computer (None for operations without a data phase).
+
+        Returns:
+            tuple: a response code and returned data (None if no data are returned).
+
+        Raises:
+            usb.core.USBError: the transaction has timed out or a fault is injected."""
+        with self.__lock:
+            self.operations[opcode] += 1
+            error = self.__fault(opcode)
+            handler = self.__handlers.get(opcode)
+            response = None
+            if error is not None:
+                code = error
+            elif handler is None:
+                code = 'OperationNotSupported'
+            else:
+                try:
+                    response = handler(list(params), data)
+                    code = 'OK'
+                except (TypeError, ValueError) as e:  # missing or malformed data
+                    logger.debug("Invalid {}: {}".format(opcode, e))
+                    code = 'InvalidParameter'
+            self.__wait(len(data or b"") + len(response or b""))
+        if isinstance(code, BaseException):
+            raise code
+        return code, response
+
+    def __fault(self, opcode):
+        for fault in self.__faults:
+            if fault[0] is None or fault[0] == opcode:
+                fault[2] -= 1
+                if fault[2] <= 0:
+                    self.__faults.remove(fault)
+                return fault[1] if fault[1] is not None else _timeout_error()
+        if self.failure_rate and self.__random.random() < self.failure_rate:
+            return _timeout_error()
+        return None
+
+    def __wait(self, nbytes):
+        duration = self.latency
+        if self.bandwidth:
+            duration += nbytes / self.bandwidth
+        if self.jitter:
+            duration *= 1.0 + self.jitter * (2.0 * self.__random.random() - 1.0)
+        timeout = self.default_timeout
+        if timeout and duration > timeout / 1000.0:
+            time.sleep(timeout / 1000.0)
+            raise _timeout_error()
+        if duration > 0:
+            time.sleep(duration)
+
+    def __nothing(self, params, data):
+        return None
+
+    def __config_api(self, params, data):
+        return bytes(ifd.encode_entries([
+            (1, DirectoryType.String, self.CameraModel),
+            (2, DirectoryType.String, self.SerialNumber),
+            (3, DirectoryType.String, self.FirmwareVersion),
+            (5, DirectoryType.Float32, self.CommunicationVersion),
+        ]))
+
+    def __get_group(self, opcode, params, data):
+        return self.__groups[opcode]
+
+    def __set_group(self, opcode, params, data):
+        klass, _ = _GROUPS[opcode]
+        changes = klass()
+        changes.decode(data)
+        state = self.group(opcode)
+        state.as_dict()
+        for name in klass._Settable:
+            value = getattr(changes, name)
+            if value is not None:
+                setattr(state, name, value)
+        self.__groups[opcode] = _frame(klass._Codec.encode(state, klass._Fields)[:-1])
+
+    def __get_focus(self, params, data):
+        y, x = self.__focus[13][1][:2]
+        entries = [(tag, type_, value) for tag, (type_, value) in sorted(self.__focus.items())]
+        entries.insert(-2, (14, DirectoryType.UInt16, [y, x, 60, 60]))  # DMFDetection
+        return bytes(ifd.encode_entries(entries))
+
+    def __set_focus(self, params, data):
+        for tag, type_, count, view in ifd.iter_entries(data):
+            if tag in _FOCUS_SETTABLE:
+                self.__focus[tag] = (type_, ifd.decode_value(type_, view, count))
+
+    def __get_movie(self, params, data):
+        return self.__movie
+
+    def __set_movie(self, params, data):
+        for _ in ifd.iter_entries(data):
+            pass  # checks all entries
+        self.__movie = bytes(data)
+
+    def __get_can_set_info5(self, params, data):
+        return self.__can_set_info5
+
+    def __get_movie_file_info(self, params, data):
+        return _EMPTY_IFD
+
+    def __get_last_command_data(self, params, data):
+        return self.__last_command
+
+    def __snap_command(self, params, data):
+        if data is None or len(data) < 3:
+            raise ValueError("SnapCommand is too short")
+        self.__last_command = bytes(data)
+        mode, amount = CaptureMode(data[1]), max(1, data[2])
+        if mode not in _IMAGE_CAPTURES and mode not in _AF_CAPTURES:
+            return None
+
+        image_id = self.__next_image_id
+        while image_id in self.__images:
+            image_id = image_id % 255 + 1
+        self.__next_image_id = image_id % 255 + 1
+        shooting = self.af_time if mode != CaptureMode.NonAFCapt else 0.0
+        if mode in _IMAGE_CAPTURES:
+            shutter_speed = self.group('SigmaGetCamDataGroup1').ShutterSpeed
+            shooting += (exposure_time(shutter_speed) or 0.0) * amount
+        image = _Image(image_id, mode, time.perf_counter(), shooting, self.processing * amount)
+        if len(self.__images) >= self.buffer_size:
+            image.Failed = CaptStatus.BufferFull
+        elif mode in _IMAGE_CAPTURES:
+            self.__file_number += 1
+            image.Number = self.__file_number
+            image.Address = (0x10000000 + self.__file_number * 0x10000) & 0xffffffff
+        self.__images[image_id] = image
+
+    def __image(self, image_id):
+        if image_id == 0:
+            return max(self.__images.values(), key=lambda image: image.Started, default=None)
+        return self.__images.get(image_id)
+
+    def __get_capt_status(self, params, data):
+        image = self.__image(params[0] if params else 0)
+        if image is None:
+            image_id, status = params[0] if params else 0, CaptStatus.Cleared
+        else:
+            image_id, status = image.ImageId, image.status(time.perf_counter())
+        images = sorted(self.__images.values(), key=lambda image: image.Started)
+        head, tail = (images[0].ImageId, images[-1].ImageId + 1) if images else (0, 0)
+        dest = self.group('SigmaGetCamDataGroup3').DestToSave or DestToSave.InCamera
+        return _frame(_CAPT_STATUS.pack(0, image_id & 0xff, head, tail & 0xff, status, dest))
+
+    def __clear_image_db_single(self, params, data):
+        image = self.__image(params[0] if params else 0)
+        if image is not None:
+            del self.__images[image.ImageId]
+            self.__files.pop(image.Address, None)
+
+    def __completed(self, image):
+        return image.Address is not None and image.status(time.perf_counter()) == CaptStatus.ImageGenCompleted
+
+    def __get_pict_file_info2(self, params, data):
+        images = [image for image in self.__images.values() if self.__completed(image)]
+        if not images:
+            address, file_size, number = 0, 0, 0
+        else:
+            image = max(images, key=lambda image: image.Started)
+            address, file_size, number = image.Address, self.file_size, image.Number
+        path, name = b"100SIGMA\x00", b"SDIM%04d.JPG\x00" % number
+        size = _PICT_FILE_INFO2.size
+        length = size + len(path) + len(name)  # excluding 2 bytes at the end
+        return _PICT_FILE_INFO2.pack(length, 1, 12, address, file_size, size, size + len(path), b"JPG", 6000, 4000) + \
+            path + name + b"\x00\x00"
+
+    def __get_partial_file(self, params, data):
+        address, start, length = (list(params) + [0, 0, 0])[:3]
+        content = self.__files.get(address)
+        if content is None:
+            image = next((image for image in self.__images.values() if image.Address == address), None)
+            if image is None or not self.__completed(image):
+                raise ValueError("No file at {:#x}".format(address))
+            content = self.__files[address] = _jpeg(self.file_size, image.ImageId)
+        chunk = content[start:start + length]
+        return len(chunk).to_bytes(4, byteorder="little") + chunk
+
+    def __get_view_frame(self, params, data):
+        index = int((time.perf_counter() - self.__started) * self.frame_rate)
+        if self.__frame[0] != index:
+            self.__frame = (index, bytes(10) + _jpeg(self.frame_size, index))
+        return self.__frame[1]
+
+
+def _timeout_error():
+    return usb.core.USBError("Operation timed out", errno=110)
+
+
+class _SimulatedEndpoint(object):
+    """A bulk endpoint of a `SimulatedCamera`, which has no data left by failed transactions."""
+
+    wMaxPacketSize = 512
+
+    def __init__(self, device):
+        self.device = device
+
+    def read(self, size_or_buffer, timeout=None):
+        raise _timeout_error()
+
+    def clear_halt(self):
+        pass
+
+
+class SimulatedTransport(USB):
+    """A PTP transport passing transactions to a `SimulatedCamera` instead of a USB device.
+
+    It replaces `ptpy.USB` when it follows a PTP class in the bases of a class, as in
+    `SimulatedSigmaPTPy`. The attributes of `ptpy.USB` used by `SigmaPTPy` are emulated.
+
+    Args:
+        device (SimulatedCamera): a simulated camera (a new one by default)."""
+
+    def __init__(self, *args, device=None, **kwargs):
+        self._set_endian('little')
+        self.device = device if device is not None else SimulatedCamera()
+        self._USBTransport__inep = _SimulatedEndpoint(self.device)
+        self._USBTransport__outep = _SimulatedEndpoint(self.device)
+        self._USBTransport__event_shutdown = threading.Event()
+        self._USBTransport__event_proc = threading.Thread(name='EvtPolling', target=lambda: None)
+
+    def __transact(self, ptp_container, data=None, dataphase=False):
+        opcode = ptp_container.OperationCode
+        if not isinstance(opcode, str):
+            opcode = self._OperationCode.decoding.get(opcode, opcode)
+        code, response = self.device.transact(opcode, ptp_container.Parameter, data)
+        container = Container(
+            SessionID=ptp_container.SessionID,
+            TransactionID=ptp_container.TransactionID,
+            ResponseCode=code,
+            Parameter=[])
+        if dataphase and response is not None:
+            container['Data'] = response
+        return container
+
+    def send(self, ptp_container, data):
+        return self.__transact(ptp_container, data)
+
+    def recv(self, ptp_container):
+        return self.__transact(ptp_container, dataphase=True)
+
+    def mesg(self, ptp_container):
+        return self.__transact(ptp_container)
+
+    def event(self, wait=False):
+        return None
+
+    def _shutdown(self):
+        self._USBTransport__event_shutdown.set()
+
+
+class SimulatedSigmaPTPy(SigmaPTPy, SimulatedTransport):
+    """`SigmaPTPy` connected to a `SimulatedCamera`.
+
+    Args:
+        device (SimulatedCamera): a simulated camera (a new one by default).
+        kwargs: other arguments of `SigmaPTPy` such as `timeout_policy`.
+
+    Examples:
+        A download at 40 MB/s with a timeout on the first transfer::
+
+            device = SimulatedCamera(latency=0.001, bandwidth=40e6)
+            device.inject(opcode='SigmaGetBigPartialPictFile')
+            camera = SimulatedSigmaPTPy(device=device)
+            with camera.session():
+                camera.snap_command(SnapCommand())
+                camera.wait_for_capture(0)
+                camera.download_picture(camera.get_pict_file_info2(), io.BytesIO())"""
@@ -0,0 +1,191 @@
+"""Adaptive timeouts and retries of PTP transactions"""
+
+import collections
+import threading
+
+
+IDEMPOTENT_OPERATIONS = frozenset([
+    'SigmaGetCamDataGroup1',
+    'SigmaGetCamDataGroup2',
+    'SigmaGetCamDataGroup3',
+    'SigmaGetCamDataGroup4',
+    'SigmaGetCamDataGroup5',
+    'SigmaGetCamDataGroupFocus',
+    'SigmaGetCamDataGroupMovie',
+    'SigmaGetCamCanSetInfo5',
+    'SigmaGetCamCaptStatus',
+    'SigmaGetPictFileInfo2',
+    'SigmaGetMovieFileInfo',
+    'SigmaGetViewFrame',
+    'SigmaGetBigPartialPictFile',
+    'SigmaGetPartialMovieFile',
+])
+"""frozenset: read operations that are safe to be retried."""
+
+
+def _percentile(sorted_values, q):
+    i = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[i]
+
+
+class TimeoutPolicy(object):
+    """Per-operation timeouts learned from observed latencies and throughput.
+
+    The timeout of an operation is `margin * (p + length / throughput)` milliseconds, where `p` is
+    the `quantile` of recent latencies of the operation excluding transfer time, `length` is
+    the number of requested bytes, and `throughput` is the moving average of throughput observed
+    in large transfers. The result is clamped into `[minimum, maximum]`.
+
+    Until `min_samples` latencies are observed, `default` is used as `p` (None means the default
+    timeout of the USB device is kept for transactions without a requested length).
+
+    Idempotent reads (`IDEMPOTENT_OPERATIONS`) are retried up to `retries` times with exponential
+    backoff, and their timeout is doubled on each retry. Before a retry, `SigmaPTPy` clears halts of the
+    bulk endpoints and discards data left by the failed transfer.
+
+    Args:
+        default (int): the latency assumed for unobserved operations in milliseconds.
+        minimum (int): the lower bound of timeouts in milliseconds.
+        maximum (int): the upper bound of timeouts in milliseconds.
+        margin (float): the multiplier applied to expected durations.
+        quantile (float): the quantile of latencies used as the expected latency.
+        window (int): the number of latencies kept for each operation.
+        min_samples (int): the number of latencies required before learned values are used.
+        throughput (float): the initial estimate of throughput in bytes per second.
+        retries (int): the maximum number of retries of idempotent operations.
+        backoff (float): the initial backoff before a retry in seconds.
+        max_backoff (float): the upper bound of backoff in seconds.
+
+    Examples:
+        A fixed timeout can be assigned to an operation as follows::
+
+            camera = SigmaPTPy(timeout_policy=TimeoutPolicy(retries=3))
+            camera.timeout_policy.set_timeout('SigmaGetViewFrame', 300)"""
+
+    LARGE_TRANSFER = 0x10000
+    """int: the minimum size of transfers used for estimating throughput."""
+
+    def __init__(self, default=None, minimum=500, maximum=60000, margin=3.0, quantile=0.99, window=64,
+                 min_samples=8, throughput=5e6, retries=2, backoff=0.05, max_backoff=1.0):
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.margin = margin
+        self.quantile = quantile
+        self.window = window
+        self.min_samples = min_samples
+        self.throughput = throughput
+        self.retries = retries
+        self.initial_backoff = backoff
+        self.max_backoff = max_backoff
+        self.idempotent = set(IDEMPOTENT_OPERATIONS)
+
+        self.__lock = threading.Lock()
+        self.__latencies = dict()
+        self.__fixed = dict()
+        self.__failures = collections.Counter()
+
+    def set_timeout(self, opcode, timeout):
+        """Assigns a fixed timeout to an operation.
+
+        Args:
+            opcode (str): an operation name such as 'SigmaGetViewFrame'.
+            timeout (int): a timeout in milliseconds, or None to restore the adaptive timeout."""
+        with self.__lock:
+            if timeout is None:
+                self.__fixed.pop(opcode, None)
+            else:
+                self.__fixed[opcode] = timeout
+
+    def timeout_for(self, opcode, length=0, attempt=0):
+        """Computes the timeout of a transaction.
+
+        Args:
+            opcode (str): an operation name.
+            length (int): the number of bytes requested by the transaction.
+            attempt (int): the number of failed attempts of the transaction so far.
+
+        Returns:
+            int: a timeout in milliseconds, or None to keep the default timeout of a device."""
+        with self.__lock:
+            if opcode in self.__fixed:
+                return self.__fixed[opcode]
+            samples = self.__latencies.get(opcode)
+            if samples is not None and len(samples) >= self.min_samples:
+                latency = _percentile(sorted(samples), self.quantile)
+            elif self.default is not None or length > 0:
+                latency = self.default or 1000.0
+            else:
+                return None
+            expected = latency + 1000.0 * length / self.throughput
+
+        timeout = int(self.margin * expected) << attempt
+        return max(self.minimum, min(self.maximum, timeout))
+
+    def observe(self, opcode, elapsed, nbytes=0):
+        """Feeds the result of a successful transaction.
+
+        Args:
+            opcode (str): an operation name.
+            elapsed (float): the duration of the transaction in seconds.
+            nbytes (int): the number of transferred bytes."""
+        with self.__lock:
+            if nbytes >= self.LARGE_TRANSFER and elapsed > 0:
+                self.throughput = 0.8 * self.throughput + 0.2 * (nbytes / elapsed)
+            latency = max(0.0, 1000.0 * (elapsed - nbytes / self.throughput))
+            samples = self.__latencies.get(opcode)
+            if samples is None:
+                samples = self.__latencies[opcode] = collections.deque(maxlen=self.window)
+            samples.append(latency)
+
+    def observe_failure(self, opcode):
+        """Counts a failed transaction.
+
+        Args:
+            opcode (str): an operation name."""
+        with self.__lock:
+            self.__failures[opcode] += 1
+
+    def retries_for(self, opcode):
+        """Returns the number of retries allowed for an operation.
+
+        Args:
+            opcode (str): an operation name.
+
+        Returns:
+            int: the maximum number of retries."""
+        return self.retries if opcode in self.idempotent else 0
+
+    def backoff(self, attempt):
+        """Returns the time to sleep before a retry.
+
+        Args:
+            attempt (int): the number of failed attempts so far (1 for the first retry).
+
+        Returns:
+            float: seconds to sleep."""
+        return min(self.max_backoff, self.initial_backoff * (2 ** (attempt - 1)))
+
+    def latency(self, opcode, quantile=0.5):
+        """Returns a quantile of observed latencies of an operation excluding transfer time.
+
+        Args:
+            opcode (str): an operation name.
+            quantile (float): a quantile in [0, 1].
+
+        Returns:
+            float: a latency in milliseconds, or None if the operation is not observed."""
+        with self.__lock:
+            samples = self.__latencies.get(opcode)
+            return _percentile(sorted(samples), quantile) if samples else None
+
+    def failures(self, opcode):
+        """Returns the number of failed transactions of an operation.
+
+        Args:
+            opcode (str): an operation name.
+
+        Returns:
+            int: the number of failures."""
+        with self.__lock:
+            return self.__failures[opcode]
@@ -0,0 +1,147 @@
+"""Tracing of PTP transactions in the Chrome trace event format
+
+Traces can be opened with Perfetto (https://ui.perfetto.dev) or chrome://tracing. Every operation of
+`SigmaPTPy` becomes a span with child spans of USB transfers (one per attempt) and encoding or decoding
+of schemas. A transfer has an instant event when it changes the USB timeout, and is preceded by a
+`lock_wait` span when it waits for a transfer of another thread. Spans of live view and download threads
+are shown on their own tracks."""
+
+import collections
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span(object):
+    """A span recorded as a complete event ("ph": "X") when the context exits.
+
+    Attributes:
+        name (str): the name of the span such as an operation name.
+        args (dict): arguments shown in a trace viewer."""
+
+    def __init__(self, tracer, name, category, args):
+        self.__tracer = tracer
+        self.name = name
+        self.args = args
+        self.__category = category
+        self.__started = None
+
+    def __enter__(self):
+        self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        finished = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = "{}: {}".format(exc_type.__name__, exc_value)
+        self.__tracer._record({
+            "name": self.name,
+            "cat": self.__category,
+            "ph": "X",
+            "ts": self.__started * 1e6,
+            "dur": (finished - self.__started) * 1e6,
+            "args": self.args,
+        })
+        return False
+
+    def set(self, **args):
+        """Adds arguments to the span."""
+        self.args.update(args)
+
+
+class Tracer(object):
+    """A recorder of spans in the Chrome trace event format.
+
+    Events are kept in a ring buffer, so the oldest ones are dropped in long sessions.
+
+    Args:
+        enabled (bool): whether spans are recorded. It can be switched at any time.
+        max_events (int): the maximum number of kept events.
+
+    Examples:
+        Trace a capture cycle as follows::
+
+            camera = SigmaPTPy(tracer=True)
+            with camera.session():
+                camera.config_api()
+                camera.snap_command(SnapCommand())
+                ...
+            camera.tracer.save("capture.json")  # Open it in https://ui.perfetto.dev"""
+
+    def __init__(self, enabled=True, max_events=1000000):
+        self.enabled = enabled
+        self.__events = collections.deque(maxlen=max_events)
+        self.__threads = dict()
+        self.__lock = threading.Lock()
+
+    def span(self, name, category="ptp", **args):
+        """Returns a context manager recording a span.
+
+        Args:
+            name (str): the name of the span.
+            category (str): the category of the span.
+            args: arguments shown in a trace viewer.
+
+        Returns:
+            Span: a span, or a no-op context manager if the tracer is disabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def instant(self, name, category="ptp", **args):
+        """Records an instant event."""
+        if self.enabled:
+            self._record({"name": name, "cat": category, "ph": "i", "s": "t",
+                          "ts": time.perf_counter() * 1e6, "args": args})
+
+    def _record(self, event):
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        if thread.ident not in self.__threads:
+            with self.__lock:
+                self.__threads[thread.ident] = thread.name
+        self.__events.append(event)
+
+    def events(self):
+        """Returns recorded events.
+
+        Returns:
+            list: trace events including metadata of thread names."""
+        pid = os.getpid()
+        with self.__lock:
+            threads = list(self.__threads.items())
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in threads]
+        return metadata + list(self.__events)
+
+    def clear(self):
+        """Discards recorded events."""
+        self.__events.clear()
+
+    def to_chrome_trace(self):
+        """Returns recorded events as a JSON object of the Chrome trace event format."""
+        return {"traceEvents": self.events(), "displayTimeUnit": "ms"}
+
+    def save(self, path):
+        """Writes recorded events to a JSON file.
+
+        Args:
+            path (str): a path of the output."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=repr)
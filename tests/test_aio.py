@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import threading
+import unittest
+from sigma_ptpy.aio import AsyncSigmaPTPy
+from sigma_ptpy.schema import BigPartialPictFile, CamDataGroup1, PictFileInfo2, ViewFrame
+
+
+class _FakeCamera(object):
+    def __init__(self, content=b""):
+        self.content = content
+        self.log = []
+        self.threads = set()
+
+    def __record(self, *entry):
+        self.threads.add(threading.current_thread().name)
+        self.log.append(entry)
+
+    @contextlib.contextmanager
+    def session(self):
+        self.__record("open_session")
+        yield
+        self.__record("close_session")
+
+    def get_cam_data_group1(self):
+        self.__record("get_cam_data_group1")
+        res = CamDataGroup1()
+        res.decode(b"\x03\x01\x00\x10\x14")
+        return res
+
+    def set_cam_data_group1(self, data):
+        self.__record("set_cam_data_group1", data.ShutterSpeed)
+
+    def get_view_frame(self):
+        self.__record("get_view_frame")
+        frame = ViewFrame()
+        frame.decode(b"\x00" * 10 + b"\xff\xd8")
+        return frame
+
+    def get_big_partial_pict_file(self, store_address, start_address, max_length, timeout=5000):
+        self.__record("get_big_partial_pict_file", start_address, max_length)
+        data = self.content[start_address:start_address + max_length]
+        pict = BigPartialPictFile()
+        pict.decode(len(data).to_bytes(4, byteorder="little") + data)
+        return pict
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+class Test_AsyncSigmaPTPy(unittest.TestCase):
+    def test_ordering(self):
+        fake = _FakeCamera()
+        camera = AsyncSigmaPTPy(fake)
+
+        async def main():
+            async with camera.session():
+                await asyncio.gather(
+                    camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x10)),
+                    camera.get_cam_data_group1(),
+                    camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x20)))
+                return await camera.get_cam_data_group1()
+
+        d1 = _run(main())
+        camera.close()
+        self.assertEqual(d1.ShutterSpeed, 0x10)
+        self.assertEqual(fake.log, [
+            ("open_session",),
+            ("set_cam_data_group1", 0x10),
+            ("get_cam_data_group1",),
+            ("set_cam_data_group1", 0x20),
+            ("get_cam_data_group1",),
+            ("close_session",)])
+        self.assertEqual(len(fake.threads), 1)
+        self.assertNotIn(threading.current_thread().name, fake.threads)
+
+    def test_iter_picture_chunks(self):
+        content = bytes(range(256)) * 10
+        info = PictFileInfo2()
+        info.FileAddress = 0
+        info.FileSize = len(content)
+        camera = AsyncSigmaPTPy(_FakeCamera(content))
+
+        async def main():
+            return [chunk async for chunk in camera.iter_picture_chunks(info, chunk_size=1000)]
+
+        chunks = _run(main())
+        camera.close()
+        self.assertEqual([len(c) for c in chunks], [1000, 1000, 560])
+        self.assertEqual(b"".join(chunks), content)
+
+    def test_download_picture(self):
+        content = b"SIGMA fp" * 100
+        info = PictFileInfo2()
+        info.FileAddress = 0
+        info.FileSize = len(content)
+        camera = AsyncSigmaPTPy(_FakeCamera(content))
+        chunks = []
+
+        async def write(data):
+            chunks.append(data)
+
+        n = _run(camera.download_picture(info, write, chunk_size=300))
+        camera.close()
+        self.assertEqual(n, len(content))
+        self.assertEqual(b"".join(chunks), content)
+
+    def test_live_view(self):
+        camera = AsyncSigmaPTPy(_FakeCamera())
+
+        async def main():
+            frames = []
+            async for frame in camera.live_view():
+                frames.append(frame)
+                if len(frames) == 3:
+                    break
+            return frames
+
+        frames = _run(main())
+        camera.close()
+        self.assertEqual([f.SequenceNumber for f in frames], [0, 1, 2])
+        self.assertEqual(frames[0].Data, b"\xff\xd8")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
 import unittest
-from sigma_ptpy.apex import (ShutterSpeed2Converter, ShutterSpeed3Converter)
+from sigma_ptpy.apex import (
+    ApexConverter, Aperture3Converter, ExpComp3Converter, ShutterSpeed2Converter, ShutterSpeed3Converter)
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Test_ShutterSpeed2Converter(unittest.TestCase):
@@ -62,3 +67,38 @@ class Test_ShutterSpeed3Converter(unittest.TestCase):
 
         actual = ShutterSpeed3Converter.encode_uint8(1 / 34000)
         self.assertEqual(0b10110000, actual)  # 1/32000
+
+
+class Test_ApexConverter(unittest.TestCase):
+    def test_decode_uint8(self):
+        converter = ApexConverter([(0, 0.0), (3, 0.3), (253, -0.3)])
+        self.assertEqual(converter.decode_uint8(3), 0.3)
+        self.assertEqual(converter.decode_uint8(253), -0.3)
+        self.assertIsNone(converter.decode_uint8(4))
+        self.assertIsNone(converter.decode_uint8(-1))
+        self.assertIsNone(converter.decode_uint8(256))
+
+        self.assertEqual(Aperture3Converter.decode_uint8(101), 57)
+        self.assertEqual(ExpComp3Converter.decode_uint8(229), -3.3)
+
+    def test_encode_uint8(self):
+        converter = ApexConverter([(0, 0.0), (3, 0.3), (253, -0.3)])
+        self.assertEqual(converter.encode_uint8(0.1), 0)
+        self.assertEqual(converter.encode_uint8(0.2), 3)
+        self.assertEqual(converter.encode_uint8(-1.0), 253)
+        self.assertEqual(converter.encode_uint8(1.0), 3)
+
+        converter = ApexConverter([(1, 1), (2, 2)])
+        self.assertEqual(converter.encode_uint8(1.5), 2)  # the larger one
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_array(self):
+        codes = numpy.arange(256)
+        actual = ShutterSpeed3Converter.decode_array(codes)
+        expected = [ShutterSpeed3Converter.decode_uint8(c) for c in range(256)]
+        self.assertEqual([None if numpy.isnan(v) else v for v in actual.tolist()], expected)
+
+        vals = numpy.linspace(-1, 40, 1000)
+        actual = ShutterSpeed3Converter.encode_array(vals)
+        self.assertEqual(actual.dtype, numpy.uint8)
+        self.assertEqual(actual.tolist(), [ShutterSpeed3Converter.encode_uint8(v) for v in vals.tolist()])
@@ -0,0 +1,36 @@
+import json
+import os
+import tempfile
+import unittest
+from sigma_ptpy.bench import GROUPS, main, summarize
+
+
+class Test_bench(unittest.TestCase):
+    def test_summarize(self):
+        self.assertEqual(summarize([]), {"count": 0})
+        summary = summarize([0.001 * i for i in range(1, 101)])
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["p50"], 51.0)
+        self.assertAlmostEqual(summary["p99"], 99.0)
+        self.assertAlmostEqual(summary["max"], 100.0)
+
+    def test_simulate(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "bench.json")
+            main(["--simulate", "--latency", "0", "--bandwidth", "0", "--iterations", "5", "--live-view", "0.05",
+                  "--shots", "2", "--chunk-sizes", "0x100000,0x400000", "--repeat", "1", "--output", path])
+            with open(path) as f:
+                report = json.load(f)
+
+        self.assertTrue(report["simulated"])
+        self.assertEqual(report["camera"]["model"], "SIGMA fp")
+        self.assertEqual(sorted(report["groups"]), sorted(GROUPS))
+        self.assertEqual(report["groups"]["get_cam_data_group1"]["count"], 5)
+        self.assertGreater(report["live_view"]["fps"], 0)
+        self.assertEqual(report["capture"]["snap_to_completed"]["count"], 2)
+        self.assertEqual(sorted(report["download"]["chunks"]), ["1048576", "4194304"])
+        self.assertEqual(report["download"]["chunks"]["1048576"]["latency"]["count"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
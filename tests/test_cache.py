@@ -0,0 +1,135 @@
+import time
+import unittest
+from construct import Container
+from sigma_ptpy.cache import CameraStateCache, FIELD_GROUPS
+from sigma_ptpy.enum import ColorMode, FocusMode, WhiteBalance
+from sigma_ptpy.schema import (
+    CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroupFocus, SnapCommand)
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+class _FakeCamera(object):
+    def __init__(self):
+        self.log = []
+        self.events = []
+        self.battery = 100
+        self.group2 = CamDataGroup2(WhiteBalance=WhiteBalance.Auto)
+
+    def event(self):
+        return self.events.pop(0) if self.events else None
+
+    def get_cam_data_group1(self):
+        self.log.append("get_cam_data_group1")
+        group1 = CamDataGroup1(ShutterSpeed=56)
+        group1.BatteryState = self.battery
+        return group1
+
+    def get_cam_data_group2(self):
+        self.log.append("get_cam_data_group2")
+        return CamDataGroup2(WhiteBalance=self.group2.WhiteBalance)
+
+    def set_cam_data_group2(self, data):
+        self.log.append("set_cam_data_group2")
+        self.group2.WhiteBalance = data.WhiteBalance or self.group2.WhiteBalance
+        return Container(ResponseCode='OK')
+
+    def get_cam_data_group3(self):
+        self.log.append("get_cam_data_group3")
+        return CamDataGroup3(ColorMode=ColorMode.Standard)
+
+    def get_cam_data_group_focus(self):
+        self.log.append("get_cam_data_group_focus")
+        return CamDataGroupFocus(FocusMode=FocusMode.AF_S)
+
+    def snap_command(self, data):
+        self.log.append("snap_command")
+
+    def get_pict_file_info2(self):
+        self.log.append("get_pict_file_info2")
+
+
+class Test_CameraStateCache(unittest.TestCase):
+    def test_field_groups(self):
+        self.assertIs(FIELD_GROUPS["ShutterSpeed"], CamDataGroup1)
+        self.assertIs(FIELD_GROUPS["WhiteBalance"], CamDataGroup2)
+        self.assertIs(FIELD_GROUPS["FocusMode"], CamDataGroupFocus)
+
+    def test_hit_and_miss(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60)
+        self.assertEqual(cache.get_cam_data_group3().ColorMode, ColorMode.Standard)
+        self.assertEqual(cache.get_cam_data_group3().ColorMode, ColorMode.Standard)
+        self.assertEqual(cache.get("ColorMode"), ColorMode.Standard)
+        self.assertEqual(camera.log, ["get_cam_data_group3"])
+
+        stats = cache.stats
+        self.assertEqual((stats.Hits, stats.Misses), (2, 1))
+        self.assertEqual(stats.Groups["CamDataGroup3"], [2, 1])
+
+    def test_returns_copies(self):
+        cache = CameraStateCache(_FakeCamera(), ttl=60)
+        cache.get_cam_data_group3().ColorMode = ColorMode.Vivid
+        self.assertEqual(cache.get("ColorMode"), ColorMode.Standard)
+
+    def test_volatile_fields(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60, volatile_ttl=0.01)
+        self.assertEqual(cache.get("BatteryState"), 100)
+        camera.battery = 90
+        self.assertEqual(cache.get("ShutterSpeed"), 56)  # a non-volatile field keeps the long TTL
+        self.assertEqual(cache.get("BatteryState"), 100)
+        time.sleep(0.02)
+        self.assertEqual(cache.get("ShutterSpeed"), 56)
+        self.assertEqual(cache.get("BatteryState"), 90)
+        self.assertEqual(camera.log, ["get_cam_data_group1", "get_cam_data_group1"])
+
+    def test_write_through(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60)
+        cache.get_cam_data_group2()
+        cache.set_cam_data_group2(CamDataGroup2(WhiteBalance=WhiteBalance.Sunlight))
+        self.assertEqual(cache.get("WhiteBalance"), WhiteBalance.Sunlight)
+        self.assertEqual(camera.log, ["get_cam_data_group2", "set_cam_data_group2"])
+
+    def test_write_rejected(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True)
+        cache = CameraStateCache(camera, ttl=60)
+        with camera.session():
+            self.assertEqual(cache.get("ShutterSpeed"), 0x70)
+            camera.device.inject('DeviceBusy', opcode='SigmaSetCamDataGroup1')
+            ret = cache.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x40))
+            self.assertEqual(ret.ResponseCode, 'DeviceBusy')
+            self.assertEqual(cache.get("ShutterSpeed"), 0x70)
+        self.assertEqual(camera.device.operations['SigmaGetCamDataGroup1'], 2)
+
+    def test_invalidate_on_capture(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60)
+        cache.get_cam_data_group_focus()
+        cache.snap_command(SnapCommand())
+        cache.get_cam_data_group_focus()
+        self.assertEqual(camera.log, ["get_cam_data_group_focus", "snap_command", "get_cam_data_group_focus"])
+        self.assertEqual(cache.stats.Invalidations, 1)
+
+    def test_invalidate_on_event(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60, poll_events=True)
+        cache.get_cam_data_group2()
+        camera.events.append("DevicePropChanged")
+        cache.get_cam_data_group2()
+        self.assertEqual(camera.log, ["get_cam_data_group2", "get_cam_data_group2"])
+        self.assertEqual(list(cache.events), ["DevicePropChanged"])
+
+    def test_keep_events(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60)
+        cache.get_cam_data_group2()
+        camera.events.append("DevicePropChanged")
+        cache.get_cam_data_group2()
+        self.assertEqual(camera.log, ["get_cam_data_group2"])
+        self.assertEqual(camera.event(), "DevicePropChanged")
+
+    def test_delegation(self):
+        camera = _FakeCamera()
+        CameraStateCache(camera).get_pict_file_info2()
+        self.assertEqual(camera.log, ["get_pict_file_info2"])
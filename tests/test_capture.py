@@ -0,0 +1,99 @@
+import time
+import unittest
+from sigma_ptpy.capture import CaptureError, CaptureTracker, exposure_time
+from sigma_ptpy.enum import CaptStatus
+from sigma_ptpy.schema import CamCaptStatus, CamDataGroup1
+
+
+class _FakeCamera(object):
+    def __init__(self, states, shutter_speed=None):
+        self.states = list(states)
+        self.shutter_speed = shutter_speed
+        self.log = []
+
+    def get_cam_data_group1(self):
+        self.log.append("get_cam_data_group1")
+        return CamDataGroup1(ShutterSpeed=self.shutter_speed)
+
+    def snap_command(self, data):
+        self.log.append("snap_command")
+
+    def get_cam_capt_status(self, image_id):
+        self.log.append("get_cam_capt_status")
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        status = CamCaptStatus()
+        status.ImageId = image_id
+        status.CaptStatus = state
+        return status
+
+
+class Test_exposure_time(unittest.TestCase):
+    def test_decode(self):
+        self.assertEqual(exposure_time(56), 1)
+        self.assertEqual(exposure_time(16), 30)
+        self.assertIsNone(exposure_time(None))
+        self.assertIsNone(exposure_time(8))  # Bulb
+
+
+class Test_CaptureTracker(unittest.TestCase):
+    def test_completed(self):
+        camera = _FakeCamera([
+            CaptStatus.ShootInProgress, CaptStatus.ShootInProgress,
+            CaptStatus.ImageGenInProgress, CaptStatus.ImageGenCompleted], shutter_speed=200)
+        tracker = CaptureTracker(camera, min_interval=0.001, max_interval=0.002)
+        tracker.snap()
+        result = tracker.wait(0, timeout=1)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.Polls, 4)
+        self.assertEqual(result.CaptStatus, CaptStatus.ImageGenCompleted)
+        self.assertEqual(list(result.Durations), [
+            CaptStatus.ShootInProgress, CaptStatus.ImageGenInProgress, CaptStatus.ImageGenCompleted])
+        self.assertAlmostEqual(sum(result.Durations.values()), result.Elapsed)
+        self.assertEqual(camera.log[:2], ["get_cam_data_group1", "snap_command"])
+
+    def test_first_poll_after_exposure(self):
+        camera = _FakeCamera([CaptStatus.ImageGenCompleted], shutter_speed=200)
+        tracker = CaptureTracker(camera)
+        tracker.exposure = 0.05
+        tracker.snap()
+        result = tracker.wait(0, timeout=1)
+        self.assertEqual(result.Polls, 1)
+        self.assertGreaterEqual(result.Elapsed, 0.05)
+
+    def test_snapped(self):
+        camera = _FakeCamera([CaptStatus.ImageGenCompleted])
+        tracker = CaptureTracker(camera)
+        started = time.perf_counter()
+        tracker.snapped(started - 0.05, exposure=0.1)
+        result = tracker.wait(0, timeout=1)
+        self.assertEqual(camera.log, ["get_cam_capt_status"])
+        self.assertGreaterEqual(result.Elapsed, 0.1)
+        self.assertLess(time.perf_counter() - started, 0.1)
+
+    def test_default_timeout(self):
+        camera = _FakeCamera([CaptStatus.ImageGenInProgress])
+        tracker = CaptureTracker(camera, max_interval=0.01, timeout_margin=0.05)
+        tracker.exposure = 0.1
+        tracker.snap()
+        started = time.perf_counter()
+        with self.assertRaises(TimeoutError):
+            tracker.wait(0)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.14)
+
+    def test_until(self):
+        camera = _FakeCamera([CaptStatus.ShootInProgress, CaptStatus.AFSuccess, CaptStatus.ImageGenInProgress])
+        result = CaptureTracker(camera, min_interval=0.001).wait(0, until={CaptStatus.AFSuccess})
+        self.assertEqual(result.CaptStatus, CaptStatus.AFSuccess)
+        self.assertFalse(result.ok)
+
+    def test_buffer_full(self):
+        camera = _FakeCamera([CaptStatus.ImageGenInProgress, CaptStatus.BufferFull])
+        with self.assertRaises(CaptureError) as cm:
+            CaptureTracker(camera, min_interval=0.001).wait(0)
+        self.assertEqual(cm.exception.result.CaptStatus, CaptStatus.BufferFull)
+
+    def test_timeout(self):
+        camera = _FakeCamera([CaptStatus.ImageGenInProgress])
+        with self.assertRaises(TimeoutError):
+            CaptureTracker(camera, min_interval=0.001, max_interval=0.01).wait(0, timeout=0.05)
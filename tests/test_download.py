@@ -0,0 +1,126 @@
+import io
+import mmap
+import unittest
+from sigma_ptpy.download import ChunkSizeTuner, iter_picture_chunks, download_picture, download_picture_into
+from sigma_ptpy.schema import BigPartialPictFile, PictFileInfo2
+
+
+class _FakeCamera(object):
+    def __init__(self, content):
+        self.content = content
+        self.requests = []
+
+    def get_big_partial_pict_file(self, store_address, start_address, max_length, timeout=5000):
+        self.requests.append((store_address, start_address, max_length))
+        data = self.content[start_address:start_address + max_length]
+        pict = BigPartialPictFile()
+        pict.decode(len(data).to_bytes(4, byteorder="little") + data)
+        return pict
+
+    def get_big_partial_pict_file_into(self, buffer, store_address, start_address, max_length=None, timeout=5000):
+        self.requests.append((store_address, start_address, max_length))
+        data = self.content[start_address:start_address + max_length]
+        pict = BigPartialPictFile()
+        pict.decode_into(len(data).to_bytes(4, byteorder="little") + data, buffer)
+        return pict
+
+
+def _info(size):
+    info = PictFileInfo2()
+    info.FileAddress = 0x57000580
+    info.FileSize = size
+    return info
+
+
+class Test_ChunkSizeTuner(unittest.TestCase):
+    def test_grow_while_improving(self):
+        tuner = ChunkSizeTuner(initial=0x10000, minimum=0x10000, maximum=0x40000)
+        tuner.update(0x10000, 1.0)
+        self.assertEqual(tuner.size, 0x20000)
+        tuner.update(0x20000, 1.0)
+        self.assertEqual(tuner.size, 0x40000)
+        tuner.update(0x40000, 1.0)
+        self.assertEqual(tuner.size, 0x40000)  # bounded by maximum
+
+    def test_step_back_when_degraded(self):
+        tuner = ChunkSizeTuner(initial=0x10000, minimum=0x10000, maximum=0x100000)
+        tuner.update(0x10000, 1.0)
+        tuner.update(0x20000, 4.0)  # slower than before
+        self.assertEqual(tuner.size, 0x10000)
+        tuner.update(0x10000, 0.1)  # converged: never grows again
+        self.assertEqual(tuner.size, 0x10000)
+
+    def test_ignore_short_chunk(self):
+        tuner = ChunkSizeTuner(initial=0x10000, minimum=0x10000, maximum=0x100000)
+        tuner.update(0x100, 1.0)
+        self.assertEqual(tuner.size, 0x10000)
+        self.assertEqual(tuner.throughput, None)
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            ChunkSizeTuner(initial=0x100, minimum=0x1000, maximum=0x10000)
+
+
+class Test_iter_picture_chunks(unittest.TestCase):
+    def test_fixed_chunk_size(self):
+        content = bytes(range(256)) * 40
+        camera = _FakeCamera(content)
+        chunks = list(iter_picture_chunks(camera, _info(len(content)), chunk_size=3000))
+        self.assertEqual(b"".join(chunks), content)
+        self.assertEqual([len(c) for c in chunks], [3000, 3000, 3000, 1240])
+        self.assertEqual([r[1] for r in camera.requests], [0, 3000, 6000, 9000])
+
+    def test_auto_chunk_size(self):
+        content = b"\xab" * 0x90000
+        camera = _FakeCamera(content)
+        tuner = ChunkSizeTuner(initial=0x10000, minimum=0x10000, maximum=0x40000)
+        chunks = list(iter_picture_chunks(camera, _info(len(content)), tuner=tuner))
+        self.assertEqual(b"".join(chunks), content)
+        self.assertTrue(all(r[2] <= 0x40000 for r in camera.requests))
+
+    def test_empty_acquisition(self):
+        camera = _FakeCamera(b"")
+        with self.assertRaises(IOError):
+            list(iter_picture_chunks(camera, _info(10), chunk_size=4))
+
+
+class Test_download_picture(unittest.TestCase):
+    def test_file_sink(self):
+        content = b"SIGMA fp" * 1000
+        sink = io.BytesIO()
+        n = download_picture(_FakeCamera(content), _info(len(content)), sink, chunk_size=1024)
+        self.assertEqual(n, len(content))
+        self.assertEqual(sink.getvalue(), content)
+
+    def test_callable_sink(self):
+        content = b"SIGMA fp" * 1000
+        chunks = []
+        download_picture(_FakeCamera(content), _info(len(content)), chunks.append, chunk_size=1024)
+        self.assertEqual(b"".join(chunks), content)
+
+
+class Test_download_picture_into(unittest.TestCase):
+    def test_bytearray(self):
+        content = bytes(range(256)) * 40
+        buffer = bytearray(len(content))
+        n = download_picture_into(_FakeCamera(content), _info(len(content)), buffer, chunk_size=1000)
+        self.assertEqual(n, len(content))
+        self.assertEqual(bytes(buffer), content)
+
+    def test_mmap(self):
+        content = b"SIGMA fp" * 0x4000
+        with mmap.mmap(-1, len(content)) as mm:
+            download_picture_into(_FakeCamera(content), _info(len(content)), mm)
+            self.assertEqual(mm[:], content)
+
+    def test_small_buffer(self):
+        with self.assertRaises(ValueError):
+            download_picture_into(_FakeCamera(b"0123"), _info(4), bytearray(3))
+
+    def test_readonly_buffer(self):
+        with self.assertRaises(TypeError):
+            download_picture_into(_FakeCamera(b"0123"), _info(4), b"\x00" * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
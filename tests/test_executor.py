@@ -0,0 +1,117 @@
+import threading
+import unittest
+from sigma_ptpy.executor import DeviceExecutor
+from sigma_ptpy.schema import CamDataGroup1
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+class _FakeCamera(object):
+    def __init__(self):
+        self.log = []
+        self.threads = set()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def block(self):
+        self.entered.set()
+        self.gate.wait()
+
+    def get_cam_data_group1(self):
+        self.threads.add(threading.current_thread().name)
+        self.log.append("get_cam_data_group1")
+        return CamDataGroup1(ShutterSpeed=0x70)
+
+    def get_cam_capt_status(self, image_id):
+        self.log.append(("get_cam_capt_status", image_id))
+        return image_id
+
+    def snap_command(self, data):
+        self.log.append(("snap_command", data))
+        raise ValueError("injected")
+
+
+class Test_DeviceExecutor(unittest.TestCase):
+    def test_ordering(self):
+        fake = _FakeCamera()
+        executor = DeviceExecutor(fake)
+        futures = [executor.submit(fake.log.append, i) for i in range(100)]
+        for f in futures:
+            f.result()
+        executor.shutdown()
+        self.assertEqual(fake.log, list(range(100)))
+        with self.assertRaises(RuntimeError):
+            executor.submit(fake.log.append, 100)
+
+    def test_coalesce(self):
+        fake = _FakeCamera()
+        executor = DeviceExecutor(fake)
+        fake.gate.clear()
+        executor.submit(fake.block)
+        fake.entered.wait()
+        group1 = [executor.call('get_cam_data_group1') for _ in range(3)]
+        status = [executor.call('get_cam_capt_status', 1), executor.call('get_cam_capt_status', 2)]
+        snap = executor.call('snap_command', 'snap')
+        group1.append(executor.call('get_cam_data_group1'))
+        self.assertEqual(executor.stats.QueueDepth, 7)
+        fake.gate.set()
+
+        results = [f.result() for f in group1]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        results[1].ShutterSpeed = 0x60
+        self.assertEqual(results[0].ShutterSpeed, 0x70)
+        self.assertEqual(results[2].ShutterSpeed, 0x70)
+        self.assertEqual([f.result() for f in status], [1, 2])
+        with self.assertRaises(ValueError):
+            snap.result()
+        executor.shutdown()
+
+        self.assertEqual(fake.log, [
+            "get_cam_data_group1",
+            ("get_cam_capt_status", 1),
+            ("get_cam_capt_status", 2),
+            ("snap_command", "snap"),
+            "get_cam_data_group1"])
+        self.assertEqual(fake.threads, {"SigmaPTPyIO"})
+        stats = executor.stats
+        self.assertEqual(stats.Submitted, 8)
+        self.assertEqual(stats.Completed, 8)
+        self.assertEqual(stats.Failed, 1)
+        self.assertEqual(stats.Coalesced, 2)
+        self.assertEqual(stats.QueueDepth, 0)
+        self.assertEqual(stats.QueueDepthMax, 7)
+        self.assertGreater(stats.WaitTimeMax, 0.0)
+
+    def test_cancel(self):
+        fake = _FakeCamera()
+        executor = DeviceExecutor(fake)
+        fake.gate.clear()
+        blocking = executor.submit(fake.block)
+        fake.entered.wait()
+        pending = executor.call('get_cam_data_group1')
+        threading.Timer(0.05, fake.gate.set).start()
+        executor.shutdown(cancel_futures=True)
+        self.assertIsNone(blocking.result())
+        self.assertTrue(pending.cancelled())
+        self.assertEqual(fake.log, [])
+
+    def test_threads(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True)
+        executor = DeviceExecutor(camera)
+        executor.submit(camera.open_session).result()
+
+        def poll():
+            for _ in range(50):
+                self.assertEqual(executor.call('get_cam_data_group1').result().ShutterSpeed, 0x70)
+
+        threads = [threading.Thread(target=poll) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        executor.submit(camera.close_session).result()
+        executor.shutdown()
+        stats = executor.stats
+        self.assertEqual(stats.Submitted, 202)
+        self.assertEqual(camera.device.operations['SigmaGetCamDataGroup1'], 200 - stats.Coalesced)
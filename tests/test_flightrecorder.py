@@ -0,0 +1,56 @@
+import unittest
+import usb.core
+from sigma_ptpy.flightrecorder import FlightRecorder, PREFIX_SIZE
+from sigma_ptpy.schema import CamDataGroup1
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+class Test_FlightRecorder(unittest.TestCase):
+    def test_record(self):
+        recorder = FlightRecorder(size=2)
+        recorder.record('SigmaConfigApi', 1, [0], None, 'OK', b"\x01\x02", 0.001)
+        recorder.record('SigmaSetCamDataGroup1', 2, [], b"\xab" * 1000, 'OK', None, 0.002)
+        error = usb.core.USBError("Operation timed out", errno=110)
+        recorder.record('SigmaGetViewFrame', 3, [], None, None, None, 0.5, error=error)
+
+        entries = recorder.entries()
+        self.assertEqual([e[2] for e in entries], ['SigmaSetCamDataGroup1', 'SigmaGetViewFrame'])
+        self.assertEqual(len(entries[0][5]), PREFIX_SIZE)
+        self.assertEqual(entries[0][8], 1000)
+
+        lines = recorder.format().splitlines()
+        self.assertIn("#2 SigmaSetCamDataGroup1 [] OK 2.000ms SEND 1000 bytes: ab ab", lines[0])
+        self.assertTrue(lines[0].endswith(" ab ..."))
+        self.assertIn("#3 SigmaGetViewFrame [] USBError: [Errno 110] Operation timed out 500.000ms", lines[1])
+
+        recorder.clear()
+        self.assertEqual(recorder.format(), "")
+
+    def test_sigma_ptpy(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True)
+        with camera.session():
+            camera.config_api()
+            camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))
+            camera.device.inject(opcode='SigmaGetCamDataGroup1', count=3)
+            with self.assertLogs('sigma_ptpy.sigma_ptpy', 'ERROR') as logs:
+                with self.assertRaises(usb.core.USBError):
+                    camera.get_cam_data_group1()
+
+        entries = camera.flight_recorder.entries()
+        self.assertEqual([e[2] for e in entries],
+                         ['SigmaConfigApi', 'SigmaSetCamDataGroup1'] + ['SigmaGetCamDataGroup1'] * 3)
+        self.assertEqual(entries[0][6], 'OK')
+        self.assertIsInstance(entries[-1][10], usb.core.USBError)
+        self.assertIn("Latest transactions", logs.output[0])
+        self.assertIn("SigmaSetCamDataGroup1 [] OK", logs.output[0])
+
+    def test_debug_log(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(frame_size=1000), ignore_events=True)
+        with camera.session():
+            with self.assertLogs('sigma_ptpy.sigma_ptpy', 'DEBUG') as logs:
+                camera.get_cam_data_group1()
+                camera.get_view_frame()
+        lines = [line for line in logs.output if "RECV" in line]
+        self.assertFalse(lines[0].endswith("..."))
+        self.assertIn("RECV SigmaGetViewFrame 1010 bytes: ", lines[1])  # with a header of 10 bytes
+        self.assertTrue(lines[1].endswith(" ..."))
@@ -0,0 +1,105 @@
+import struct
+import unittest
+from sigma_ptpy import ifd
+from sigma_ptpy.enum import DirectoryType
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _ifd(*entries):
+    base = 8 + 12 * len(entries)
+    index, data = b"", b""
+    for tag, type_, count, payload in entries:
+        if len(payload) <= 4:
+            value = payload.ljust(4, b"\x00")
+        else:
+            value = struct.pack("<I", base + len(data))
+            data += payload
+        index += struct.pack("<HHI4s", tag, type_, count, value)
+    return struct.pack("<II", base + len(data), len(entries)) + index + data
+
+
+class Test_decode_entries(unittest.TestCase):
+    def test_types(self):
+        rawdata = _ifd(
+            (1, DirectoryType.Int8, 3, b"\xff\x01\x80"),
+            (2, DirectoryType.UInt16, 3, struct.pack("<3H", 1, 2, 65535)),
+            (3, DirectoryType.Int32, 2, struct.pack("<2i", -1, 7)),
+            (4, DirectoryType.Float64, 1, struct.pack("<d", 0.5)),
+            (5, DirectoryType.URational, 2, struct.pack("<4I", 1, 2, 3, 4)),
+            (6, DirectoryType.Rational, 1, struct.pack("<2i", -1, 3)),
+            (7, DirectoryType.String, 4, b"V82\x00"))
+        self.assertEqual(ifd.decode_entries(rawdata), [
+            (1, [-1, 1, -128]),
+            (2, [1, 2, 65535]),
+            (3, [-1, 7]),
+            (4, [0.5]),
+            (5, [(1, 2), (3, 4)]),
+            (6, [(-1, 3)]),
+            (7, "V82"),
+        ])
+
+    def test_bytearray(self):
+        rawdata = bytearray(_ifd((1, DirectoryType.UInt32, 2, struct.pack("<2I", 5, 6))))
+        self.assertEqual(ifd.decode_entries(rawdata), [(1, [5, 6])])
+
+    def test_bounds(self):
+        rawdata = _ifd((1, DirectoryType.UInt32, 2, struct.pack("<2I", 5, 6)))
+        with self.assertRaises(ValueError):
+            ifd.decode_entries(rawdata[:-1])  # shorter than DataLength
+        with self.assertRaises(ValueError):
+            ifd.decode_entries(rawdata[:4])
+        broken = rawdata[:16] + struct.pack("<I", 0x1000) + rawdata[20:]
+        with self.assertRaises(ValueError):
+            ifd.decode_entries(broken)  # an offset out of bounds
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            ifd.decode_entries(_ifd((1, 0x99, 1, b"\x00")))
+
+    def test_directory_count_beyond_data(self):
+        rawdata = bytearray(_ifd((1, DirectoryType.UInt8, 1, b"\x09")))
+        rawdata[4] = 5
+        self.assertEqual(ifd.decode_entries(rawdata), [(1, [9])])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        values = list(range(40))
+        rawdata = _ifd(
+            (14, DirectoryType.UInt16, 40, struct.pack("<40H", *values)),
+            (13, DirectoryType.UInt16, 2, struct.pack("<2H", 1, 2)))
+        (_, long_array), (_, short_array) = ifd.decode_entries(rawdata, numpy=True)
+        self.assertIsInstance(long_array, numpy.ndarray)
+        self.assertEqual(long_array.tolist(), values)
+        self.assertEqual(short_array, [1, 2])
+
+
+class Test_encode_entries(unittest.TestCase):
+    def test_round_trip(self):
+        entries = [
+            (1, DirectoryType.UInt8, 0x9c),
+            (2, DirectoryType.Int16, [-1, 2, -3]),
+            (3, DirectoryType.String, "SIGMA fp"),
+            (4, DirectoryType.Float32, 0.5),
+            (5, DirectoryType.URational, (1, 3)),
+            (6, DirectoryType.Rational, [(-1, 2), (3, -4)]),
+            (7, DirectoryType.UInt32, list(range(100))),
+        ]
+        rawdata = ifd.encode_entries(entries)
+        self.assertEqual(len(rawdata) % 4, 0)
+        self.assertEqual(struct.unpack_from("<II", rawdata), (len(rawdata), len(entries)))
+        self.assertEqual(ifd.decode_entries(rawdata), [
+            (1, [0x9c]),
+            (2, [-1, 2, -3]),
+            (3, "SIGMA fp"),
+            (4, [0.5]),
+            (5, [(1, 3)]),
+            (6, [(-1, 2), (3, -4)]),
+            (7, list(range(100))),
+        ])
+
+    def test_empty(self):
+        self.assertEqual(bytes(ifd.encode_entries([])), b"\x08\x00\x00\x00\x00\x00\x00\x00")
@@ -0,0 +1,34 @@
+import logging
+import subprocess
+import sys
+import unittest
+import sigma_ptpy
+
+
+class Test_Package(unittest.TestCase):
+    def test_lazy_imports(self):
+        code = (
+            "import sys, sigma_ptpy, sigma_ptpy.schema, sigma_ptpy.apex\n"
+            "print(','.join(m for m in ('ptpy', 'usb', 'construct', 'rainbow_logging_handler') if m in sys.modules))")
+        output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+        self.assertEqual(output.strip(), "")
+
+    def test_getattr(self):
+        from sigma_ptpy.sigma_ptpy import SigmaPTPy
+        from sigma_ptpy.aio import AsyncSigmaPTPy
+        self.assertIs(sigma_ptpy.SigmaPTPy, SigmaPTPy)
+        self.assertIs(sigma_ptpy.AsyncSigmaPTPy, AsyncSigmaPTPy)
+        self.assertIn("SigmaPTPy", dir(sigma_ptpy))
+        with self.assertRaises(AttributeError):
+            sigma_ptpy.Unknown
+
+    def test_setup_logging(self):
+        logger = logging.getLogger("sigma_ptpy")
+        self.assertTrue(all(isinstance(h, logging.NullHandler) for h in logger.handlers))
+        handler = sigma_ptpy.setup_logging("WARNING")
+        try:
+            self.assertIn(handler, logger.handlers)
+            self.assertEqual(logger.level, logging.WARNING)
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(logging.NOTSET)
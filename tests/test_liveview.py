@@ -0,0 +1,75 @@
+import threading
+import unittest
+from sigma_ptpy.liveview import LiveViewStream
+from sigma_ptpy.schema import ViewFrame
+
+
+class _FakeCamera(object):
+    def __init__(self, limit=None):
+        self.count = 0
+        self.limit = limit
+        self.produced = threading.Event()
+
+    def get_view_frame(self):
+        if self.limit is not None and self.count >= self.limit:
+            self.produced.set()
+            raise IOError("disconnected")
+        frame = ViewFrame()
+        frame.decode(b"\x00" * 10 + b"\xff\xd8" + self.count.to_bytes(4, byteorder="little"))
+        self.count += 1
+        return frame
+
+
+class Test_LiveViewStream(unittest.TestCase):
+    def test_sequence(self):
+        with LiveViewStream(_FakeCamera(), max_queue=4, policy="block") as stream:
+            frames = [stream.get(timeout=1) for _ in range(5)]
+        self.assertEqual([f.SequenceNumber for f in frames], [0, 1, 2, 3, 4])
+        self.assertTrue(all(f.Latency >= 0 for f in frames))
+        self.assertTrue(all(f.Timestamp > 0 for f in frames))
+        self.assertEqual(stream.stats.FramesDropped, 0)
+        self.assertEqual(stream.stats.FramesDelivered, 5)
+
+    def test_drop_oldest(self):
+        camera = _FakeCamera(limit=10)
+        stream = LiveViewStream(camera, max_queue=2, policy="drop_oldest")
+        stream.start()
+        camera.produced.wait(1)
+        frames = [stream.get(timeout=1) for _ in range(2)]
+        self.assertEqual([f.SequenceNumber for f in frames], [8, 9])
+        self.assertEqual(stream.stats.FramesCaptured, 10)
+        self.assertEqual(stream.stats.FramesDropped, 8)
+        with self.assertRaises(IOError):
+            stream.get(timeout=1)
+        self.assertIsNone(stream.get(timeout=1))
+        stream.stop()
+
+    def test_block(self):
+        camera = _FakeCamera()
+        stream = LiveViewStream(camera, max_queue=3, policy="block")
+        stream.start()
+        frames = [stream.get(timeout=1) for _ in range(10)]
+        stream.stop()
+        self.assertEqual([f.SequenceNumber for f in frames], list(range(10)))
+        self.assertEqual(stream.stats.FramesDropped, 0)
+        self.assertFalse(stream.running)
+
+    def test_iterate_until_stop(self):
+        stream = LiveViewStream(_FakeCamera(limit=3), max_queue=3, policy="block")
+        stream.start()
+        with self.assertRaises(IOError):
+            for frame in stream:
+                pass
+        self.assertEqual(stream.stats.FramesDelivered, 3)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            LiveViewStream(_FakeCamera(), policy="drop_newest")
+        with self.assertRaises(ValueError):
+            LiveViewStream(_FakeCamera(), max_queue=0)
+        with self.assertRaises(ValueError):
+            LiveViewStream(_FakeCamera(), target_fps=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
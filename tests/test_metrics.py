@@ -0,0 +1,99 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+import unittest
+from sigma_ptpy.metrics import MetricsRegistry
+from sigma_ptpy.schema import CamDataGroup1
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+class Test_MetricsRegistry(unittest.TestCase):
+    def test_observe(self):
+        metrics = MetricsRegistry(buckets=(0.01, 0.1))
+        metrics.observe('SigmaGetViewFrame', 0.005, bytes_in=100)
+        metrics.observe('SigmaGetViewFrame', 0.05, bytes_in=200)
+        metrics.observe('SigmaGetViewFrame', 0.5, error=True, lock_wait=0.2)
+        metrics.observe_decode('SigmaGetViewFrame', 0.001)
+        stats = metrics.stats()['SigmaGetViewFrame']
+        self.assertEqual(stats.Calls, 3)
+        self.assertEqual(stats.Errors, 1)
+        self.assertEqual(stats.BytesIn, 300)
+        self.assertEqual(stats.Buckets, [1, 1, 0])
+        self.assertAlmostEqual(stats.TransferTime, 0.555)
+        self.assertAlmostEqual(stats.SuccessTime, 0.055)
+        self.assertAlmostEqual(stats.ErrorTime, 0.5)
+        self.assertAlmostEqual(stats.LockWaitTime, 0.2)
+        self.assertAlmostEqual(stats.DecodeTime, 0.001)
+
+        metrics.reset()
+        self.assertEqual(metrics.stats(), {})
+
+    def test_prometheus(self):
+        metrics = MetricsRegistry(labels={"serial": "9\"1"}, buckets=(0.01, 0.1))
+        metrics.observe('SigmaGetViewFrame', 0.005, bytes_in=100)
+        metrics.observe('SigmaGetViewFrame', 0.05, bytes_in=200)
+        metrics.observe('SigmaGetViewFrame', 5.0, error=True)
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE sigma_ptpy_transaction_duration_seconds histogram', text)
+        self.assertIn('sigma_ptpy_transactions_total{serial="9\\"1",operation="SigmaGetViewFrame"} 3', text)
+        self.assertIn('sigma_ptpy_transaction_error_seconds_total{serial="9\\"1",operation="SigmaGetViewFrame"} 5.0', text)
+        self.assertIn('sigma_ptpy_received_bytes_total{serial="9\\"1",operation="SigmaGetViewFrame"} 300', text)
+        self.assertIn(
+            'sigma_ptpy_transaction_duration_seconds_bucket{serial="9\\"1",operation="SigmaGetViewFrame",le="0.1"} 2',
+            text)
+        self.assertIn(
+            'sigma_ptpy_transaction_duration_seconds_bucket{serial="9\\"1",operation="SigmaGetViewFrame",le="+Inf"} 2',
+            text)
+        self.assertIn('sigma_ptpy_transaction_duration_seconds_sum{serial="9\\"1",operation="SigmaGetViewFrame"} 0.055', text)
+        self.assertIn('sigma_ptpy_transaction_duration_seconds_count{serial="9\\"1",operation="SigmaGetViewFrame"} 2', text)
+
+    def test_serve(self):
+        metrics = MetricsRegistry()
+        metrics.observe('SigmaConfigApi', 0.001)
+        with metrics.serve(port=0) as server:
+            with urllib.request.urlopen(server.url) as response:
+                self.assertIn(b'operation="SigmaConfigApi"', response.read())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(server.url.replace("/metrics", "/"))
+
+
+class Test_SigmaPTPy(unittest.TestCase):
+    def test_disabled(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True)
+        self.assertFalse(camera.metrics.enabled)
+        with camera.session():
+            camera.config_api()
+        self.assertEqual(camera.metrics.stats(), {})
+
+    def test_transactions(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True, metrics=True)
+        with camera.session():
+            camera.config_api()
+            camera.get_cam_data_group1()
+            camera.device.inject(opcode='SigmaGetCamDataGroup1')
+            camera.get_cam_data_group1()  # retried
+            camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))
+
+        stats = camera.metrics.stats()
+        self.assertEqual(stats['SigmaGetCamDataGroup1'].Calls, 3)
+        self.assertEqual(stats['SigmaGetCamDataGroup1'].Errors, 1)
+        self.assertGreater(stats['SigmaGetCamDataGroup1'].BytesIn, 0)
+        self.assertGreater(stats['SigmaGetCamDataGroup1'].DecodeTime, 0.0)
+        self.assertGreater(stats['SigmaSetCamDataGroup1'].BytesOut, 0)
+        self.assertGreater(stats['SigmaSetCamDataGroup1'].EncodeTime, 0.0)
+        self.assertEqual(stats['SigmaConfigApi'].Calls, 1)
+
+    def test_lock_wait(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True, metrics=True)
+        with camera.session():
+            lock = camera._SigmaPTPy__lock
+            with lock:
+                thread = threading.Thread(target=camera.get_cam_data_group1)
+                thread.start()
+                time.sleep(0.05)
+            thread.join()
+
+        stats = camera.metrics.stats()['SigmaGetCamDataGroup1']
+        self.assertGreaterEqual(stats.LockWaitTime, 0.05)
+        self.assertLess(stats.SuccessTime, 0.05)
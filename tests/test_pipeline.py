@@ -0,0 +1,110 @@
+import threading
+import time
+import unittest
+from sigma_ptpy.enum import CaptStatus
+from sigma_ptpy.pipeline import STAGES, CapturePipeline
+from sigma_ptpy.schema import BigPartialPictFile, CamCaptStatus, CamDataGroup1, PictFileInfo2
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+class _FakeCamera(object):
+    def __init__(self, frame_buffer=2, fail_download=False):
+        self.frame_buffer = frame_buffer
+        self.fail_download = fail_download
+        self.lock = threading.Lock()
+        self.images = []  # the image database ring from head to tail
+        self.next_id = 250  # wraps around 0xff
+        self.cleared = []
+        self.max_images = 0
+        self.log = []
+
+    def get_cam_data_group1(self):
+        with self.lock:
+            group1 = CamDataGroup1(ShutterSpeed=200)
+            group1.FrameBufferState = self.frame_buffer - len(self.images)
+            return group1
+
+    def snap_command(self, data):
+        with self.lock:
+            self.log.append(("snap_command", len(self.images)))
+            self.images.append(self.next_id)
+            self.max_images = max(self.max_images, len(self.images))
+            self.next_id = (self.next_id + 1) & 0xff
+
+    def get_cam_capt_status(self, image_id):
+        with self.lock:
+            status = CamCaptStatus()
+            status.ImageId = self.images[-1]
+            status.ImageDBHead = self.images[0]
+            status.ImageDBTail = self.images[-1]
+            status.CaptStatus = CaptStatus.ImageGenCompleted
+            return status
+
+    def get_pict_file_info2(self):
+        with self.lock:
+            info = PictFileInfo2()  # the latest image
+            info.FileAddress = self.images[-1]
+            info.FileSize = 1000 + self.images[-1]
+            info.FileName = b"%d.JPG" % self.images[-1]
+            return info
+
+    def get_big_partial_pict_file_into(self, buffer, store_address, start_address, max_length=None, timeout=None):
+        if self.fail_download:
+            raise IOError("broken pipe")
+        data = bytes([store_address]) * max_length
+        pict = BigPartialPictFile()
+        pict.decode_into(len(data).to_bytes(4, byteorder="little") + data, buffer)
+        return pict
+
+    def clear_image_db_single(self, image_id):
+        with self.lock:
+            assert self.images[0] == image_id
+            self.images.pop(0)
+            self.cleared.append(image_id)
+
+
+class Test_CapturePipeline(unittest.TestCase):
+    def test_run(self):
+        camera = _FakeCamera(frame_buffer=2)
+        received = []
+        stats = CapturePipeline(camera, lambda info, data: received.append((info.FileName, bytes(data))),
+                                poll_interval=0.001).run(10)
+
+        self.assertEqual(stats.Shots, 10)
+        self.assertEqual(camera.cleared, [250, 251, 252, 253, 254, 255, 0, 1, 2, 3])
+        self.assertEqual([name for name, _ in received], [b"%d.JPG" % i for i in camera.cleared])
+        for i, (_, data) in zip(camera.cleared, received):
+            self.assertEqual(data, bytes([i]) * (1000 + i))
+        self.assertEqual(stats.Bytes, sum(len(data) for _, data in received))
+        self.assertLessEqual(camera.max_images, 2)
+        self.assertGreater(stats.ShotsPerMinute, 0)
+        self.assertGreater(stats.SustainedShotsPerMinute, 0)
+        self.assertEqual(list(stats.StageTimes), list(STAGES))
+
+    def test_max_pending(self):
+        camera = _FakeCamera(frame_buffer=10)
+        pipeline = CapturePipeline(camera, lambda info, data: None, max_pending=1)
+        pipeline.run(5)
+        self.assertTrue(all(pending == 0 for _, pending in camera.log))
+        self.assertEqual([shot.Index for shot in pipeline.shots], [0, 1, 2, 3, 4])
+
+    def test_slow_handler(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(file_size=0x4000, processing=0.01, af_time=0),
+                                    ignore_events=True)
+        received = []
+
+        def handler(info, data):
+            received.append((info.FileName, data[2]))
+            time.sleep(0.1)
+
+        with camera.session():
+            pipeline = CapturePipeline(camera, handler, max_pending=3)
+            pipeline.run(4)
+            self.assertEqual(camera.get_cam_capt_status(0).CaptStatus, CaptStatus.Cleared)
+        self.assertEqual(received, [(b"SDIM%04d.JPG" % i, i) for i in range(1, 5)])
+        self.assertEqual([shot.ImageId for shot in pipeline.shots], [1, 2, 3, 4])
+
+    def test_download_error(self):
+        camera = _FakeCamera(fail_download=True)
+        with self.assertRaises(IOError):
+            CapturePipeline(camera, lambda info, data: None, timeout=1, poll_interval=0.001).run(5)
@@ -0,0 +1,78 @@
+import threading
+import unittest
+from sigma_ptpy.pool import SigmaCameraPool
+from sigma_ptpy.schema import ApiConfig, SnapCommand
+from sigma_ptpy.enum import CaptureMode
+
+
+class _FakeCamera(object):
+    def __init__(self, serial, fail=False):
+        self.serial = serial
+        self.fail = fail
+        self.log = []
+        self.threads = set()
+
+    def open_session(self):
+        self.log.append("open_session")
+
+    def close_session(self):
+        self.log.append("close_session")
+
+    def config_api(self):
+        self.log.append("config_api")
+        config = ApiConfig()
+        config.SerialNumber = self.serial
+        return config
+
+    def close_application(self):
+        self.log.append("close_application")
+
+    def snap_command(self, data):
+        self.threads.add(threading.current_thread().name)
+        self.log.append(("snap_command", data.CaptureMode))
+        if self.fail:
+            raise IOError("busy")
+
+
+class Test_SigmaCameraPool(unittest.TestCase):
+    def test_open_snap_close(self):
+        cameras = [_FakeCamera(str(i)) for i in range(8)]
+        with SigmaCameraPool(cameras) as pool:
+            self.assertEqual(len(pool), 8)
+            for _ in range(3):
+                result = pool.snap(SnapCommand(CaptureMode=CaptureMode.NonAFCapt))
+                self.assertTrue(result.ok)
+                self.assertEqual(len(result.Started), 8)
+                self.assertGreaterEqual(result.Skew, 0)
+                self.assertEqual(min(result.Offsets), 0)
+
+        for camera in cameras:
+            self.assertEqual(camera.log, [
+                "open_session", "config_api",
+                ("snap_command", CaptureMode.NonAFCapt),
+                ("snap_command", CaptureMode.NonAFCapt),
+                ("snap_command", CaptureMode.NonAFCapt),
+                "close_application", "close_session"])
+            self.assertEqual(len(camera.threads), 1)
+
+    def test_open_returns_configs(self):
+        pool = SigmaCameraPool([_FakeCamera("A"), _FakeCamera("B")])
+        configs = pool.open()
+        pool.close()
+        self.assertEqual([c.SerialNumber for c in configs], ["A", "B"])
+
+    def test_errors(self):
+        cameras = [_FakeCamera("0"), _FakeCamera("1", fail=True)]
+        with SigmaCameraPool(cameras) as pool:
+            result = pool.snap()
+        self.assertFalse(result.ok)
+        self.assertIsNone(result.Errors[0])
+        self.assertIsInstance(result.Errors[1], IOError)
+
+    def test_no_camera(self):
+        with self.assertRaises(ValueError):
+            SigmaCameraPool([])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,7 @@
+import copy
+import pickle
 import unittest
+from sigma_ptpy import ifd
 from sigma_ptpy.enum import (
     DirectoryType,
     DriveMode, SpecialMode, ExposureMode, AEMeteringMode, FlashMode, FlashSetting,
@@ -7,10 +10,10 @@ from sigma_ptpy.enum import (
     DCCropMode, LVMagnifyRatio, HighISOExt, ContShootSpeed, HDR,
     DNGQuality, LOCDistortion, LOCChromaticAberration, LOCDiffraction,
     LOCVignetting, LOCColorShade, LOCColorShadeAcq, EImageStab,
-    ToneEffect, AspectRatio)
+    ToneEffect, AspectRatio, FocusMode, FocusArea)
 from sigma_ptpy.schema import (
     CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5,
-    CamCaptStatus, PictFileInfo2, _DirectoryEntrySchema)
+    CamDataGroupFocus, CamCaptStatus, CamCanSetInfo5, PictFileInfo2, BigPartialPictFile, _DirectoryEntrySchema)
 
 
 class Test_DirectoryEntrySchema(unittest.TestCase):
@@ -104,6 +107,65 @@ class Test_DirectoryEntrySchema(unittest.TestCase):
         self.assertEqual(actual, expected)
 
 
+class Test_CamDataGroupFocus(unittest.TestCase):
+    def test_encode(self):
+        focus = CamDataGroupFocus(FocusMode=FocusMode.AF_S, FocusArea=FocusArea(1), DMFSize=2, DMFPos=[120, 80])
+        res = CamDataGroupFocus()
+        res.decode(focus.encode())
+        self.assertEqual(res.FocusMode, FocusMode.AF_S)
+        self.assertEqual(res.FocusArea, FocusArea(1))
+        self.assertEqual(res.DMFSize, 2)
+        self.assertEqual(res.DMFPos, [120, 80])
+
+
+class Test_CamCanSetInfo5(unittest.TestCase):
+    def decode(self):
+        res = CamCanSetInfo5()
+        res.decode(ifd.encode_entries([
+            (1, DirectoryType.UInt8, [1, 5]),
+            (200, DirectoryType.UInt8, [1, 2, 9]),
+            (323, DirectoryType.UInt8, [0, 10]),
+            (613, DirectoryType.UInt16, [10, 400, 20, 600]),
+            (999, DirectoryType.UInt8, [1]),
+        ]))
+        return res
+
+    def test_decode(self):
+        res = self.decode()
+        self.assertEqual(res.DriveMode, [DriveMode.SingleCapture, DriveMode.IntervalTimer])
+        self.assertEqual(res.ExposureMode, [ExposureMode.ProgramAuto, ExposureMode.AperturePriority, 9])
+        self.assertEqual(res.FocusAreaValidArea, {'Top': 10, 'Bottom': 400, 'Left': 20, 'Right': 600})
+        self.assertEqual(res.ColorModeSaturation, [0, 10])
+        self.assertEqual(res.MonochromeFilterEffect, [0, 10])
+        self.assertIsNone(res.ShutterSpeed)
+        with self.assertRaises(AttributeError):
+            res.Unknown
+
+    def test_lazy(self):
+        res = self.decode()
+        self.assertNotIn("DriveMode", vars(res))
+        res.DriveMode
+        self.assertIn("DriveMode", vars(res))
+        self.assertNotIn("ExposureMode", vars(res))
+
+        res.decode(ifd.encode_entries([(1, DirectoryType.UInt8, [2])]))
+        self.assertEqual(res.DriveMode, [DriveMode(2)])
+        self.assertIsNone(res.ExposureMode)
+
+    def test_pickle(self):
+        res = self.decode()
+        res.ExposureMode
+        for res2 in [pickle.loads(pickle.dumps(res)), copy.deepcopy(res), copy.copy(res)]:
+            self.assertEqual(res2.ExposureMode, [ExposureMode.ProgramAuto, ExposureMode.AperturePriority, 9])
+            self.assertEqual(res2.FocusAreaValidArea, {'Top': 10, 'Bottom': 400, 'Left': 20, 'Right': 600})
+            self.assertIsNone(res2.ShutterSpeed)
+
+    def test_str(self):
+        s = str(self.decode())
+        self.assertTrue(s.startswith("CamCanSetInfo5(DriveMode="))
+        self.assertIn("ShutterSpeed=None", s)
+
+
 class Test_CamDataGroup1(unittest.TestCase):
     def test_ShutterSpeed(self):
         res = CamDataGroup1()
@@ -230,6 +292,12 @@ class Test_CamDataGroup4(unittest.TestCase):
         self.assertEqual(res.EImageStab, EImageStab.Off)
         self.assertEqual(res.ShutterSound, 5)
 
+    def test_encode_without_LOC(self):
+        res = CamDataGroup4()
+        res.decode(CamDataGroup4(EImageStab=EImageStab.Off).encode())
+        self.assertEqual(res.EImageStab, EImageStab.Off)
+        self.assertIsNone(res.LOCDistortion)
+
 
 class Test_CamDataGroup5(unittest.TestCase):
     def test_RecvData(self):
@@ -245,6 +313,125 @@ class Test_CamDataGroup5(unittest.TestCase):
         self.assertEqual(res.ToneEffect, ToneEffect.BAndW)
 
 
+class Test_LazySchema(unittest.TestCase):
+    rawdata = b"\x13\xff\x7f\x20\x20\x00\x01\xf8\x00\x00\x01\tk\x03\x01\xd0\x02\x08\x00\x00\x1d"
+
+    def decode(self, rawdata=rawdata):
+        res = CamDataGroup1()
+        res.decode(rawdata)
+        return res
+
+    def test_lazy(self):
+        res = self.decode()
+        self.assertFalse(hasattr(res, "__dict__"))
+        self.assertEqual(sorted(res.__getstate__()), ["_modified", "_raw"])
+        self.assertEqual(res.ISOAuto, 1)
+        self.assertEqual(sorted(res.__getstate__()), ["ISOAuto", "_modified", "_raw"])
+
+        # copies do not decode fields
+        res2 = copy.copy(res)
+        self.assertEqual(sorted(res2.__getstate__()), ["ISOAuto", "_modified", "_raw"])
+        self.assertEqual(res2.ShutterSpeed, 0x20)
+        res3 = pickle.loads(pickle.dumps(res))
+        self.assertEqual(res3.ShutterSpeed, 0x20)
+
+    def test_decode_again(self):
+        res = CamDataGroup1(ShutterSpeed=0x30)
+        res.decode(self.rawdata)
+        self.assertEqual(res.ShutterSpeed, 0x20)
+        res.decode(b"\x03\x01\x00\x10\x14")
+        self.assertEqual(res.ShutterSpeed, 0x10)
+        self.assertIsNone(res.ISOAuto)
+
+    def test_eq(self):
+        res = self.decode()
+        res2 = self.decode()
+        res.ISOSpeed
+        self.assertEqual(res, res2)
+        self.assertEqual(sorted(res2.__getstate__()), ["_modified", "_raw"])  # compared without decoding
+        self.assertEqual(copy.copy(res), res2)
+
+        # modified objects are compared by fields
+        res2.ShutterSpeed = 0x30
+        self.assertNotEqual(res, res2)
+        res2.ShutterSpeed = 0x20
+        self.assertEqual(res, res2)
+        self.assertNotEqual(res, self.decode(b"\x03\x01\x00\x20\x24"))
+        self.assertEqual(hash(res), hash(res2))
+        self.assertEqual(len({res, res2}), 1)
+        self.assertNotEqual(res, CamDataGroup1())
+        self.assertNotEqual(res, CamDataGroup2())
+
+    def test_diff(self):
+        res = self.decode()
+        res2 = self.decode()
+        self.assertEqual(res.diff(res2), {})
+
+        # modified fields are not overwritten by the response
+        res2.ShutterSpeed = 0x30
+        self.assertEqual(res.diff(res2), {"ShutterSpeed": (0x20, 0x30)})
+        self.assertEqual(res2.as_dict()["ShutterSpeed"], 0x30)
+        with self.assertRaises(TypeError):
+            res.diff(CamDataGroup2())
+
+    def test_short(self):
+        with self.assertRaises(ValueError):
+            self.decode(self.rawdata[:-2])
+        with self.assertRaises(ValueError):
+            CamCaptStatus().decode(b"\x06\x00\x00\x01\x01\x00")
+
+    def test_focus(self):
+        focus = CamDataGroupFocus(FocusMode=FocusMode.AF_S, DMFPos=[120, 80])
+        res = CamDataGroupFocus()
+        res.decode(focus.encode())
+        res2 = CamDataGroupFocus()
+        res2.decode(focus.encode())
+        self.assertEqual(res, res2)
+        self.assertEqual(hash(res), hash(res2))
+        self.assertEqual(res.as_dict()["DMFPos"], [120, 80])
+        self.assertIsNone(res.AFLock)
+
+
+class Test_FieldPresentCodec(unittest.TestCase):
+    recv_data = [
+        (CamDataGroup1, b"\x13\xff\x7f\x20\x20\x00\x01\xf8\x00\x00\x01\tk\x03\x01\xd0\x02\x08\x00\x00\x1d"),
+        (CamDataGroup2, b"\x0e\x3f\xfc\x07\x02\x04\x01\x00\x03\x00\x00\x00\x01\x01\x10l"),
+        (CamDataGroup3, b"\x10\xff\xa3\x00\x00\x00\x01\x03\x02\x00\xd0\x00\x00\x02\x05\x05\x02\x96"),
+        (CamDataGroup4, b"\x11\xf0\x3f\x00\x03\x01\x03\xff\x0e\x00\x01\x01\x02\x01\xfe\x02\x02\x05\x60"),
+        (CamDataGroup5, b"\x0c\x2b\x00\x0a\x00\x01\x00\x00\x01\x58\x1b\x03\x01\xba"),
+    ]
+
+    def test_decode_same_as_construct(self):
+        for klass, rawdata in self.recv_data:
+            self.assertEqual(klass._Codec.decode(rawdata), klass._Codec.decode_construct(rawdata))
+
+    def test_encode_byte_identical(self):
+        # expected data are encoded by the construct schemas before the precompiled codecs
+        send_data = [
+            (CamDataGroup1(ShutterSpeed=0x20, ISOAuto=1, ExpComp=0xf8), b"\x00\x29\x00\x20\x01\xf8\x00"),
+            (CamDataGroup2(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Auto),
+             b"\x00\x04\x20\x04\x01\x00"),
+            (CamDataGroup3(ColorMode=ColorMode.Standard, DestToSave=DestToSave.InComputer),
+             b"\x00\x10\x80\x03\x02\x00"),
+            (CamDataGroup4(HDR=HDR.Off, LOCVignetting=LOCVignetting.Auto),
+             b"\x00\x00\x09\xff\x00\x00\x00\x01\x00\x00\x00"),
+            (CamDataGroup5(IntervalTimerSecond=10, IntervalTimerFrame=3, AspectRatio=AspectRatio.W3H2),
+             b"\x00\x09\x00\x0a\x00\x03\x00\x00\x00\x03\x00"),
+            (CamDataGroup5(ColorTemp=7000), b"\x00\x02\x00\x58\x1b\x00"),
+        ]
+        for obj, senddata in send_data:
+            self.assertEqual(obj.encode(), senddata)
+            self.assertEqual(obj._Codec.encode_construct(obj, obj._Settable), senddata)
+
+    def test_encode(self):
+        self.assertEqual(CamDataGroup1(ShutterSpeed=0x20).encode(), b"\x00\x01\x00\x20\x00")
+        self.assertEqual(CamDataGroup1().encode(), b"\x00\x00\x00\x00")
+
+    def test_decode_short_data(self):
+        with self.assertRaises(ValueError):
+            CamDataGroup1().decode(b"\x03\x01\x00")
+
+
 class Test_CamCaptStatus(unittest.TestCase):
     def test_RecvData(self):
         res = CamCaptStatus()
@@ -281,5 +468,25 @@ class Test_PictFileInfo2(unittest.TestCase):
         self.assertEqual(res.FileName, b"SDIM0001.JPG")
 
 
+class Test_BigPartialPictFile(unittest.TestCase):
+    def test_RecvData(self):
+        res = BigPartialPictFile()
+        res.decode(b"\x04\x00\x00\x00\xff\xd8\xff\xe1")
+        self.assertEqual(res.AcquiredSize, 4)
+        self.assertEqual(res.PartialData, b"\xff\xd8\xff\xe1")
+
+    def test_decode_into(self):
+        buffer = bytearray(b"\x00" * 6)
+        res = BigPartialPictFile()
+        n = res.decode_into(b"\x04\x00\x00\x00\xff\xd8\xff\xe1", memoryview(buffer)[1:])
+        self.assertEqual(n, 4)
+        self.assertEqual(res.AcquiredSize, 4)
+        self.assertEqual(bytes(res.PartialData), b"\xff\xd8\xff\xe1")
+        self.assertEqual(buffer, b"\x00\xff\xd8\xff\xe1\x00")
+
+        with self.assertRaises(ValueError):
+            res.decode_into(b"\x04\x00\x00\x00\xff\xd8\xff\xe1", bytearray(3))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+import io
+import time
+import unittest
+import usb.core
+from sigma_ptpy.schema import CamDataGroup1, SnapCommand
+from sigma_ptpy.session import ReplayError, SessionRecorder, SessionReplayer, read_session
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+def _record(device, fn):
+    f = io.BytesIO()
+    with SessionRecorder(f) as recorder:
+        camera = SimulatedSigmaPTPy(device=device, ignore_events=True, recorder=recorder)
+        with camera.session():
+            result = fn(camera)
+    f.seek(0)
+    return f, result
+
+
+def _shoot(camera):
+    camera.config_api()
+    camera.snap_command(SnapCommand())
+    camera.wait_for_capture(0)
+    info = camera.get_pict_file_info2()
+    out = io.BytesIO()
+    camera.download_picture(info, out)
+    camera.close_application()
+    return out.getvalue()
+
+
+class Test_Session(unittest.TestCase):
+    def test_record(self):
+        device = SimulatedCamera()
+        device.inject(opcode='SigmaGetCamDataGroup1')
+        f, _ = _record(device, lambda camera: (
+            camera.get_cam_data_group1(), camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))))
+
+        transactions = list(read_session(f))
+        self.assertEqual([t.OperationCode for t in transactions],
+                         ['SigmaGetCamDataGroup1', 'SigmaGetCamDataGroup1', 'SigmaSetCamDataGroup1'])
+        self.assertIsInstance(transactions[0].Error, usb.core.USBError)
+        self.assertEqual(transactions[0].Error.errno, 110)
+        self.assertEqual(transactions[1].ResponseCode, 'OK')
+        self.assertEqual(transactions[1].Parameter, [])
+        self.assertIsNone(transactions[1].Payload)
+        self.assertGreater(len(transactions[1].Data), 0)
+        self.assertIsNone(transactions[2].Data)
+        self.assertGreater(len(transactions[2].Payload), 0)
+        self.assertLess(transactions[0].Started, transactions[2].Started)
+
+    def test_replay(self):
+        f, expected = _record(SimulatedCamera(file_size=0x8000), _shoot)
+
+        replayer = SessionReplayer(f)
+        camera = SimulatedSigmaPTPy(device=replayer, ignore_events=True)
+        with camera.session():
+            self.assertEqual(_shoot(camera), expected)
+        self.assertEqual(replayer.remaining, 0)
+
+        with self.assertRaises(ReplayError):
+            replayer.transact('SigmaGetViewFrame')
+
+    def test_replay_errors(self):
+        device = SimulatedCamera()
+        device.inject(opcode='SigmaGetCamDataGroup1', count=2)
+        f, _ = _record(device, lambda camera: camera.get_cam_data_group1())
+
+        camera = SimulatedSigmaPTPy(device=SessionReplayer(f), ignore_events=True)
+        with camera.session():
+            self.assertEqual(camera.get_cam_data_group1().ShutterSpeed, 0x70)  # after 2 retries
+        self.assertEqual(camera.device.operations['SigmaGetCamDataGroup1'], 3)
+
+    def test_pacing(self):
+        f, _ = _record(SimulatedCamera(latency=0.02), lambda camera: camera.get_cam_data_group1())
+        camera = SimulatedSigmaPTPy(device=SessionReplayer(f, speed=1.0), ignore_events=True)
+        with camera.session():
+            started = time.perf_counter()
+            camera.get_cam_data_group1()
+            self.assertGreaterEqual(time.perf_counter() - started, 0.02)
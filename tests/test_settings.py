@@ -0,0 +1,96 @@
+import unittest
+from construct import Container
+from sigma_ptpy.cache import CameraStateCache
+from sigma_ptpy.enum import (
+    ColorMode, ExposureMode, FocusMode, LOCChromaticAberration, LOCColorShade, LOCColorShadeAcq, LOCDiffraction,
+    LOCDistortion, LOCVignetting, WhiteBalance)
+from sigma_ptpy.schema import CamDataGroup1, CamDataGroup2, CamDataGroup3, CamDataGroup4, CamDataGroup5
+from sigma_ptpy.settings import apply_settings, route_fields
+
+
+class _FakeCamera(object):
+    def __init__(self):
+        self.log = []
+        self.group5 = CamDataGroup5(IntervalTimerSecond=10, IntervalTimerFrame=5)
+        self.rejected = set()
+
+    def get_cam_data_group2(self):
+        self.log.append(("get_cam_data_group2",))
+        return CamDataGroup2(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Auto)
+
+    def get_cam_data_group4(self):
+        self.log.append(("get_cam_data_group4",))
+        return CamDataGroup4(
+            LOCDistortion=LOCDistortion.Auto, LOCChromaticAberration=LOCChromaticAberration.Auto,
+            LOCDiffraction=LOCDiffraction.Off, LOCVignetting=LOCVignetting.Off,
+            LOCColorShade=LOCColorShade.Off, LOCColorShadeAcq=LOCColorShadeAcq.Off)
+
+    def get_cam_data_group5(self):
+        self.log.append(("get_cam_data_group5",))
+        return self.group5
+
+    def __getattr__(self, name):
+        if name.startswith("set_"):
+            code = 'DeviceBusy' if name in self.rejected else 'OK'
+            return lambda data: self.log.append((name, data)) or Container(ResponseCode=code)
+        raise AttributeError(name)
+
+
+class Test_route_fields(unittest.TestCase):
+    def test_route(self):
+        groups = route_fields(dict(ShutterSpeed=56, WhiteBalance=WhiteBalance.Auto,
+                                   ExposureMode=ExposureMode.Manual, FocusMode=FocusMode.AF_S))
+        self.assertEqual([k.__name__ for k in groups], ["CamDataGroup1", "CamDataGroup2", "CamDataGroupFocus"])
+        self.assertEqual(groups[CamDataGroup2], dict(WhiteBalance=WhiteBalance.Auto, ExposureMode=ExposureMode.Manual))
+
+    def test_read_only(self):
+        with self.assertRaises(ValueError):
+            route_fields(dict(BatteryState=1))
+        with self.assertRaises(ValueError):
+            route_fields(dict(Unknown=1))
+
+
+class Test_apply_settings(unittest.TestCase):
+    def test_one_transaction_per_group(self):
+        camera = _FakeCamera()
+        sent = apply_settings(camera, dict(
+            ShutterSpeed=56, Aperture=40, WhiteBalance=WhiteBalance.Auto, ColorMode=ColorMode.Standard))
+        self.assertEqual([name for name, _ in camera.log],
+                         ["set_cam_data_group1", "set_cam_data_group2", "set_cam_data_group3"])
+        self.assertIsInstance(sent[0], CamDataGroup1)
+        self.assertEqual((sent[0].ShutterSpeed, sent[0].Aperture), (56, 40))
+        self.assertIsInstance(sent[2], CamDataGroup3)
+
+    def test_linked_fields(self):
+        camera = _FakeCamera()
+        sent = apply_settings(camera, dict(IntervalTimerFrame=8, LOCDistortion=LOCDistortion.Off))
+        self.assertEqual((sent[0].LOCDistortion, sent[0].LOCVignetting), (LOCDistortion.Off, LOCVignetting.Off))
+        self.assertEqual((sent[1].IntervalTimerSecond, sent[1].IntervalTimerFrame), (10, 8))
+
+    def test_unknown_linked_fields(self):
+        camera = _FakeCamera()
+        camera.group5 = CamDataGroup5()
+        with self.assertRaisesRegex(ValueError, "IntervalTimerSecond must be specified with IntervalTimerFrame"):
+            apply_settings(camera, dict(IntervalTimerFrame=8))
+        self.assertEqual(camera.log, [("get_cam_data_group5",)])
+
+    def test_rejected(self):
+        camera = _FakeCamera()
+        camera.rejected.add("set_cam_data_group1")
+        sent = apply_settings(camera, dict(ShutterSpeed=56, WhiteBalance=WhiteBalance.Auto))
+        self.assertEqual([name for name, _ in camera.log], ["set_cam_data_group1", "set_cam_data_group2"])
+        self.assertEqual(len(sent), 1)
+        self.assertIsInstance(sent[0], CamDataGroup2)
+
+    def test_skip_cached(self):
+        camera = _FakeCamera()
+        cache = CameraStateCache(camera, ttl=60)
+        cache.get_cam_data_group2()
+        cache.apply(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Auto)
+        self.assertEqual(camera.log, [("get_cam_data_group2",)])
+
+        sent = cache.apply(ExposureMode=ExposureMode.Manual, WhiteBalance=WhiteBalance.Sunlight)
+        self.assertEqual(len(sent), 1)
+        self.assertIsNone(sent[0].ExposureMode)
+        self.assertEqual(sent[0].WhiteBalance, WhiteBalance.Sunlight)
+        self.assertEqual(cache.get("WhiteBalance"), WhiteBalance.Sunlight)
@@ -0,0 +1,215 @@
+import io
+import threading
+import time
+import unittest
+import usb.core
+from sigma_ptpy.capture import CaptureError, CaptureTracker
+from sigma_ptpy.enum import CaptStatus, CaptureMode, ExposureMode, FocusMode
+from sigma_ptpy.schema import CamDataGroup1, CamDataGroup2, CamDataGroupFocus, SnapCommand
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+
+
+class _Endpoint(object):
+    def __init__(self, leftovers=()):
+        self.leftovers = list(leftovers)
+        self.halts_cleared = 0
+
+    def read(self, size, timeout=None):
+        if not self.leftovers:
+            raise usb.core.USBError("Operation timed out", errno=110)
+        return self.leftovers.pop(0)
+
+    def clear_halt(self):
+        self.halts_cleared += 1
+
+
+class Test_SimulatedSigmaPTPy(unittest.TestCase):
+    def camera(self, **kwargs):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(**kwargs), ignore_events=True)
+        with camera.session():
+            camera.config_api()
+        return camera
+
+    def test_every_operation(self):
+        camera = self.camera()
+        names = [name for name in camera._OperationCode.encoding if str(name).startswith('Sigma')]
+        self.assertEqual(len(names), 28)
+        for name in names:
+            code, _ = camera.device.transact(name, [0, 0, 0])
+            self.assertNotEqual(code, 'OperationNotSupported', name)
+        self.assertEqual(camera.device.transact('GetDeviceInfo'), ('OperationNotSupported', None))
+
+    def test_groups(self):
+        camera = self.camera()
+        with camera.session():
+            self.assertEqual(camera.config_api().CameraModel, "SIGMA fp")
+            camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))
+            camera.set_cam_data_group2(CamDataGroup2(ExposureMode=ExposureMode.Manual))
+            camera.set_cam_data_group_focus(CamDataGroupFocus(FocusMode=FocusMode.MF, DMFPos=[10, 20]))
+
+            group1 = camera.get_cam_data_group1()
+            self.assertEqual(group1.ShutterSpeed, 0x68)
+            self.assertEqual(group1.CurrentLensFocalLength, 45.0)
+            self.assertEqual(camera.get_cam_data_group2().ExposureMode, ExposureMode.Manual)
+            focus = camera.get_cam_data_group_focus()
+            self.assertEqual(focus.FocusMode, FocusMode.MF)
+            self.assertEqual(focus.DMFPos, [10, 20])
+            self.assertEqual(focus.DMFDetection, [10, 20, 60, 60])
+            self.assertEqual(camera.get_cam_can_set_info5().ExposureMode[-1], ExposureMode.Manual)
+
+        code, data = camera.device.transact('SigmaGetCamDataGroup1')
+        self.assertEqual(data[0], len(data) - 2)
+        self.assertEqual(data[-1], sum(data[:-1]) & 0xff)
+
+    def test_capture(self):
+        camera = self.camera(file_size=0x12345, af_time=0.05, processing=0.05)
+        with camera.session():
+            camera.snap_command(SnapCommand())
+            result = camera.wait_for_capture(0, timeout=1)
+            self.assertEqual(list(result.Durations), [
+                CaptStatus.ShootInProgress, CaptStatus.ImageGenInProgress, CaptStatus.ImageGenCompleted])
+
+            info = camera.get_pict_file_info2()
+            self.assertEqual(info.FileSize, 0x12345)
+            self.assertEqual(info.FileName, b"SDIM0001.JPG")
+            sink = io.BytesIO()
+            self.assertEqual(camera.download_picture(info, sink, chunk_size=0x10000), 0x12345)
+            self.assertEqual(sink.getvalue()[:2], b"\xff\xd8")
+            self.assertEqual(sink.getvalue()[-2:], b"\xff\xd9")
+
+            status = camera.get_cam_capt_status(0)
+            self.assertEqual(status.ImageId, 1)
+            camera.clear_image_db_single(status.ImageId)
+            self.assertEqual(camera.get_cam_capt_status(1).CaptStatus, CaptStatus.Cleared)
+            self.assertEqual(camera.get_cam_capt_status(0).CaptStatus, CaptStatus.Cleared)
+            self.assertEqual(camera.device.operations['SigmaGetBigPartialPictFile'], 2)
+
+    def test_capture_tracker(self):
+        camera = self.camera(processing=0.01)
+        with camera.session():
+            camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x50))  # 1/8 s
+            started = time.perf_counter()
+            camera.snap_command(SnapCommand(CaptureMode.NonAFCapt))
+            result = camera.wait_for_capture(0)
+        self.assertEqual(camera.capture_tracker.exposure, 0.125)
+        self.assertEqual(camera.device.operations['SigmaGetCamDataGroup1'], 0)
+        self.assertGreaterEqual(result.Elapsed, 0.125)
+        self.assertLessEqual(result.Elapsed, time.perf_counter() - started)
+
+    def test_af_and_buffer_full(self):
+        camera = self.camera(buffer_size=1, af_time=0.01)
+        with camera.session():
+            tracker = CaptureTracker(camera)
+            tracker.snap(SnapCommand(CaptureMode.AFDriveOnly))
+            result = tracker.wait(0, timeout=1, until={CaptStatus.AFSuccess})
+            self.assertEqual(result.CaptStatus, CaptStatus.AFSuccess)
+            self.assertEqual(result.Status.ImageId, 1)
+
+            camera.snap_command(SnapCommand())
+            with self.assertRaises(CaptureError) as cm:
+                camera.wait_for_capture(0, timeout=1)
+            self.assertEqual(cm.exception.result.Status.ImageId, 2)
+            status = camera.get_cam_capt_status(2)
+            self.assertEqual((status.ImageDBHead, status.ImageDBTail), (1, 3))
+
+    def test_view_frame(self):
+        camera = self.camera(frame_size=1000, frame_rate=100)
+        with camera.session():
+            first = camera.get_view_frame().Data
+            time.sleep(0.02)
+            second = camera.get_view_frame().Data
+        self.assertEqual(len(first), 1000)
+        self.assertNotEqual(first, second)
+
+    def test_faults(self):
+        camera = self.camera()
+        with camera.session():
+            camera.device.inject(opcode='SigmaGetCamDataGroup1')
+            camera.get_cam_data_group1()  # retried
+            self.assertEqual(camera.device.operations['SigmaGetCamDataGroup1'], 2)
+
+            camera.device.inject(opcode='SigmaSnapCommand', error='DeviceBusy')
+            self.assertEqual(camera.snap_command(SnapCommand()).ResponseCode, 'DeviceBusy')
+
+            camera.device.inject(opcode='SigmaSetCamDataGroup1', error=ValueError("injected"))
+            with self.assertRaises(ValueError):
+                camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))
+
+    def test_recover_before_retry(self):
+        camera = self.camera()
+        inep = camera._USBTransport__inep = _Endpoint([b"\x00" * 512, b"\x00" * 100])
+        with camera.session():
+            camera.device.inject(opcode='SigmaGetViewFrame')
+            camera.get_view_frame()  # retried after the endpoint is drained
+        self.assertEqual(inep.leftovers, [])
+        self.assertEqual(inep.halts_cleared, 1)
+        self.assertEqual(camera.device.operations['SigmaGetViewFrame'], 2)
+
+    def test_recover_under_lock(self):
+        class Camera(SimulatedSigmaPTPy):
+            def recv(self, ptp_container):
+                if waiter.ident is None:
+                    waiter.start()
+                    time.sleep(0.05)  # the waiter is blocked by the lock
+                    inep.leftovers.append(b"\x00" * 100)
+                    raise usb.core.USBError("Operation timed out", errno=110)
+                leftovers.append(len(inep.leftovers))
+                return super(Camera, self).recv(ptp_container)
+
+        class Recorder(object):
+            def record(self, *args, error=None):
+                if error is not None:
+                    time.sleep(0.05)  # the lock is free for the waiter if it is released here
+
+        leftovers = []
+        camera = Camera(device=SimulatedCamera(), ignore_events=True, recorder=Recorder())
+        inep = camera._USBTransport__inep = _Endpoint()
+        waiter = threading.Thread(target=camera.get_cam_data_group2)
+        with camera.session():
+            camera.get_cam_data_group1()
+            waiter.join()
+        self.assertEqual(leftovers, [0, 0])
+        self.assertEqual(inep.halts_cleared, 1)
+
+    def test_transaction_ids(self):
+        class Camera(SimulatedSigmaPTPy):
+            def recv(self, ptp_container):
+                transaction_ids.append(ptp_container.TransactionID)
+                return super(Camera, self).recv(ptp_container)
+
+        transaction_ids = []
+        camera = Camera(device=SimulatedCamera(latency=0.001), ignore_events=True)
+
+        def poll():
+            for _ in range(20):
+                camera.get_cam_data_group1()
+
+        with camera.session():
+            threads = [threading.Thread(target=poll) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(transaction_ids), 80)
+        self.assertEqual(transaction_ids, sorted(set(transaction_ids)))
+
+    def test_timing(self):
+        camera = self.camera(latency=0.03, bandwidth=1e6, file_size=0x8000)
+        camera.timeout_policy.set_timeout('SigmaSetCamDataGroup1', 10)
+        with camera.session():
+            started = time.perf_counter()
+            with self.assertRaises(usb.core.USBError):
+                camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))
+            self.assertLess(time.perf_counter() - started, 0.03)
+
+            camera.device.processing = 0
+            camera.snap_command(SnapCommand(CaptureMode.NonAFCapt))
+            camera.wait_for_capture(0)
+            info = camera.get_pict_file_info2()
+            started = time.perf_counter()
+            camera.get_big_partial_pict_file(info.FileAddress, 0, 0x8000)
+            self.assertGreaterEqual(time.perf_counter() - started, 0.03 + 0x8000 / 1e6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from sigma_ptpy.timeout import TimeoutPolicy
+
+
+class Test_TimeoutPolicy(unittest.TestCase):
+    def test_default(self):
+        policy = TimeoutPolicy()
+        self.assertIsNone(policy.timeout_for('SigmaGetCamDataGroup1'))
+        self.assertEqual(TimeoutPolicy(default=2000).timeout_for('SigmaGetCamDataGroup1'), 6000)
+
+    def test_scale_with_length(self):
+        policy = TimeoutPolicy(throughput=1e6, maximum=10 ** 6)
+        small = policy.timeout_for('SigmaGetBigPartialPictFile', 0x10000)
+        large = policy.timeout_for('SigmaGetBigPartialPictFile', 0x1000000)
+        self.assertLess(small, large)
+        self.assertEqual(large, int(3.0 * (1000.0 + 1000.0 * 0x1000000 / 1e6)))
+
+    def test_learn_latency(self):
+        policy = TimeoutPolicy(minimum=10)
+        for _ in range(7):
+            policy.observe('SigmaGetCamDataGroup1', 0.020)
+        self.assertIsNone(policy.timeout_for('SigmaGetCamDataGroup1'))
+        policy.observe('SigmaGetCamDataGroup1', 0.100)
+        self.assertEqual(policy.timeout_for('SigmaGetCamDataGroup1'), 300)
+        self.assertAlmostEqual(policy.latency('SigmaGetCamDataGroup1'), 20.0)
+        self.assertIsNone(policy.latency('SigmaGetViewFrame'))
+
+    def test_learn_throughput(self):
+        policy = TimeoutPolicy(throughput=1e6)
+        policy.observe('SigmaGetBigPartialPictFile', 0.1, 0x100000)
+        self.assertGreater(policy.throughput, 1e6)
+        policy.observe('SigmaGetBigPartialPictFile', 0.1, 0x100)  # too small to estimate throughput
+        self.assertAlmostEqual(policy.throughput, 0.8e6 + 0.2 * 0x100000 / 0.1)
+
+    def test_clamp(self):
+        policy = TimeoutPolicy(minimum=500, maximum=1000, min_samples=1)
+        policy.observe('SigmaGetViewFrame', 0.001)
+        self.assertEqual(policy.timeout_for('SigmaGetViewFrame'), 500)
+        policy.observe('SigmaGetBigPartialPictFile', 10.0)
+        self.assertEqual(policy.timeout_for('SigmaGetBigPartialPictFile'), 1000)
+
+    def test_retry_timeout(self):
+        policy = TimeoutPolicy(default=1000)
+        self.assertEqual(policy.timeout_for('SigmaGetCamDataGroup1', attempt=1), 6000)
+        self.assertEqual(policy.timeout_for('SigmaGetCamDataGroup1', attempt=2), 12000)
+
+    def test_fixed_timeout(self):
+        policy = TimeoutPolicy()
+        policy.set_timeout('SigmaGetViewFrame', 250)
+        self.assertEqual(policy.timeout_for('SigmaGetViewFrame'), 250)
+        policy.set_timeout('SigmaGetViewFrame', None)
+        self.assertIsNone(policy.timeout_for('SigmaGetViewFrame'))
+
+    def test_retries(self):
+        policy = TimeoutPolicy(retries=3, backoff=0.1, max_backoff=0.3)
+        self.assertEqual(policy.retries_for('SigmaGetCamDataGroup1'), 3)
+        self.assertEqual(policy.retries_for('SigmaSnapCommand'), 0)
+        self.assertEqual(policy.retries_for('SigmaConfigApi'), 0)
+        self.assertEqual([policy.backoff(i) for i in range(1, 4)], [0.1, 0.2, 0.3])
+
+    def test_failures(self):
+        policy = TimeoutPolicy()
+        policy.observe_failure('SigmaGetViewFrame')
+        self.assertEqual(policy.failures('SigmaGetViewFrame'), 1)
+        self.assertEqual(policy.failures('SigmaGetCamDataGroup1'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
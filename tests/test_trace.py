@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from sigma_ptpy.schema import CamDataGroup1
+from sigma_ptpy.simulator import SimulatedCamera, SimulatedSigmaPTPy
+from sigma_ptpy.trace import Tracer
+
+
+class Test_Tracer(unittest.TestCase):
+    def test_span(self):
+        tracer = Tracer()
+        with tracer.span('outer', x=1) as span:
+            span.set(y=2)
+            with tracer.span('inner'):
+                pass
+        with self.assertRaises(ValueError):
+            with tracer.span('failed'):
+                raise ValueError("oops")
+        thread = threading.Thread(name="Worker", target=lambda: tracer.instant('tick'))
+        thread.start()
+        thread.join()
+
+        events = dict((e['name'], e) for e in tracer.events() if e['ph'] != 'M')
+        self.assertEqual(events['outer']['args'], {'x': 1, 'y': 2})
+        self.assertLessEqual(events['outer']['ts'], events['inner']['ts'])
+        self.assertGreaterEqual(events['outer']['dur'], events['inner']['dur'])
+        self.assertEqual(events['failed']['args'], {'error': 'ValueError: oops'})
+        names = [e['args']['name'] for e in tracer.events() if e['ph'] == 'M']
+        self.assertIn("Worker", names)
+
+    def test_disabled(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span('ignored') as span:
+            span.set(x=1)
+        tracer.instant('ignored')
+        self.assertEqual(tracer.events(), [])
+
+    def test_max_events(self):
+        tracer = Tracer(max_events=2)
+        for i in range(3):
+            tracer.instant(str(i))
+        self.assertEqual([e['name'] for e in tracer.events() if e['ph'] != 'M'], ['1', '2'])
+
+
+class Test_SigmaPTPy(unittest.TestCase):
+    def test_transactions(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True, tracer=True)
+        camera.timeout_policy.set_timeout('SigmaGetCamDataGroup1', 500)
+        with camera.session():
+            camera.device.inject(opcode='SigmaGetCamDataGroup1')
+            camera.get_cam_data_group1()
+            camera.set_cam_data_group1(CamDataGroup1(ShutterSpeed=0x68))
+            camera.close_application()
+
+        events = [e for e in camera.tracer.events() if e['ph'] != 'M']
+        self.assertEqual(
+            [e['name'] for e in events],
+            ['timeout', 'transfer', 'retry', 'timeout', 'transfer', 'decode', 'SigmaGetCamDataGroup1',
+             'encode', 'transfer', 'SigmaSetCamDataGroup1',
+             'transfer', 'SigmaCloseApplication'])
+        self.assertEqual(events[0]['args'], {'timeout': 500, 'previous': 1000})
+        self.assertIn('error', events[1]['args'])
+        self.assertEqual(events[4]['args']['attempt'], 1)
+        self.assertGreater(events[4]['args']['bytes_in'], 0)
+        self.assertIn('TransactionID', events[4]['args'])
+        self.assertGreater(events[8]['args']['bytes_out'], 0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "trace.json")
+            camera.tracer.save(path)
+            with open(path) as f:
+                self.assertEqual(len(json.load(f)['traceEvents']), len(camera.tracer.events()))
+
+    def test_lock_wait(self):
+        camera = SimulatedSigmaPTPy(device=SimulatedCamera(), ignore_events=True, tracer=True)
+        with camera.session():
+            with camera._SigmaPTPy__lock:
+                thread = threading.Thread(target=camera.get_cam_data_group1)
+                thread.start()
+                time.sleep(0.05)
+            thread.join()
+
+        events = dict((e['name'], e) for e in camera.tracer.events() if e['ph'] != 'M')
+        self.assertGreaterEqual(events['lock_wait']['dur'], 50000)
+        self.assertGreaterEqual(events['transfer']['ts'], events['lock_wait']['ts'] + events['lock_wait']['dur'] - 1)
+        self.assertLess(events['transfer']['dur'], 50000)